@@ -0,0 +1,221 @@
+import math
+import threading
+import time
+from bisect import bisect_left
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse
+from django.views import View
+from rest_framework import views
+
+from backend.timing import RequestMetrics, active_metrics
+from inventory.permissions import IsAdmin
+from inventory.profiling import query_stack, save_slow_queries
+
+SECONDS_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 200)
+BYTES_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+UNMATCHED = 'unmatched'
+# Methods are client input; anything else shares one label so series stay bounded
+METHODS = frozenset(name.upper() for name in View.http_method_names)
+OTHER_METHOD = 'other'
+
+
+def count_query(execute, sql, params, many, context):
+    """
+    Installed with connection.execute_wrapper() on every connection for its
+    whole life, rather than per request: entering the context manager costs
+    several microseconds, while this costs a context variable lookup.
+    """
+    metrics = active_metrics.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        elapsed = time.perf_counter() - start
+        metrics.db_time += elapsed
+        metrics.queries += 1
+        if elapsed >= metrics.slow_query_seconds:
+            metrics.slow_queries.append((sql, elapsed, query_stack()))
+
+
+def install_query_counter(sender, connection, **kwargs):
+    if count_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(count_query)
+
+
+class Histogram:
+    """Prometheus-style histogram with fixed buckets, exposed per label tuple."""
+
+    def __init__(self, name, help_text, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+
+    def new_series(self):
+        # Bucket counts, with one more for values above the last bound, then the sum
+        return [0] * (len(self.buckets) + 1) + [0]
+
+    def exposition(self, label_names, series):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        for labels, values in series:
+            label_text = ','.join(f'{name}="{escape(value)}"' for name, value in zip(label_names, labels))
+            cumulative = 0
+            for bound, count in zip(self.buckets, values):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{label_text},le="{bound}"}} {cumulative}')
+            cumulative += values[-2]
+            lines.append(f'{self.name}_bucket{{{label_text},le="+Inf"}} {cumulative}')
+            lines.append(f'{self.name}_sum{{{label_text}}} {values[-1]:.9g}')
+            lines.append(f'{self.name}_count{{{label_text}}} {cumulative}')
+        return lines
+
+
+def escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+HISTOGRAMS = (
+    Histogram('http_request_duration_seconds', 'Wall time spent handling the request.', SECONDS_BUCKETS),
+    Histogram('http_request_db_queries', 'Database queries run by the request.', QUERY_BUCKETS),
+    Histogram('http_request_db_seconds', 'Time spent waiting on database queries.', SECONDS_BUCKETS),
+    Histogram('http_request_serializer_seconds', 'Time spent serializing and rendering the response.', SECONDS_BUCKETS),
+    Histogram('http_response_size_bytes', 'Response body size; streamed bodies are left out.', BYTES_BUCKETS),
+)
+
+
+class MetricsRegistry:
+    """
+    Request histograms per URL name and method, kept in this process. Each
+    worker process has its own; Prometheus adds them up when every worker is
+    scraped, as with any multi-process exporter. A request takes the lock
+    once and finds all of its series with one dict lookup.
+    """
+    label_names = ('route', 'method')
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.series = {}
+
+    def record(self, route, method, status_code, duration, metrics, size):
+        # Unrolled, as this runs on every request
+        with self.lock:
+            series = self.series.get((route, method))
+            if series is None:
+                series = self.series[(route, method)] = [histogram.new_series() for histogram in HISTOGRAMS] + [{}]
+            counts = series[0]
+            counts[bisect_left(SECONDS_BUCKETS, duration)] += 1
+            counts[-1] += duration
+            counts = series[1]
+            counts[bisect_left(QUERY_BUCKETS, metrics.queries)] += 1
+            counts[-1] += metrics.queries
+            counts = series[2]
+            counts[bisect_left(SECONDS_BUCKETS, metrics.db_time)] += 1
+            counts[-1] += metrics.db_time
+            counts = series[3]
+            counts[bisect_left(SECONDS_BUCKETS, metrics.serializer_time)] += 1
+            counts[-1] += metrics.serializer_time
+            if size is not None:
+                counts = series[4]
+                counts[bisect_left(BYTES_BUCKETS, size)] += 1
+                counts[-1] += size
+            statuses = series[5]
+            statuses[status_code] = statuses.get(status_code, 0) + 1
+
+    def exposition(self):
+        with self.lock:
+            series = sorted(
+                (labels, [list(values) for values in histograms[:-1]], dict(histograms[-1]))
+                for labels, histograms in self.series.items()
+            )
+        lines = []
+        for index, histogram in enumerate(HISTOGRAMS):
+            lines.extend(histogram.exposition(self.label_names, [(labels, values[index]) for labels, values, _ in series]))
+        lines.append('# HELP http_responses_total Responses sent, by status code.')
+        lines.append('# TYPE http_responses_total counter')
+        for (route, method), _, statuses in series:
+            for status_code, count in sorted(statuses.items()):
+                lines.append(f'http_responses_total{{route="{escape(route)}",method="{method}",status="{status_code}"}} {count}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+
+class RequestMetricsMiddleware:
+    """
+    Records wall time, query count, database time, serializer time and
+    response size for every request into the registry, labelled with the
+    URL name the request resolved to. Place it first, so the time covers
+    the other middleware too.
+
+    Statements slower than SLOW_QUERY_THRESHOLD_MS are logged and stored
+    with their view name and stack once the response is ready, see
+    inventory/profiling.py.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+        threshold = settings.SLOW_QUERY_THRESHOLD_MS
+        self.slow_query_seconds = threshold / 1000 if threshold >= 0 else math.inf
+        connection_created.connect(install_query_counter, dispatch_uid='request_metrics')
+        for connection in connections.all(initialized_only=True):
+            install_query_counter(None, connection)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        metrics = RequestMetrics(self.slow_query_seconds)
+        token = active_metrics.set(metrics)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            active_metrics.reset(token)
+        route = self.record(request, response, time.perf_counter() - start, metrics)
+        if metrics.slow_queries:
+            save_slow_queries(request, route, metrics.slow_queries)
+        return response
+
+    async def __acall__(self, request):
+        metrics = RequestMetrics(self.slow_query_seconds)
+        token = active_metrics.set(metrics)
+        start = time.perf_counter()
+        try:
+            # Sync views run under sync_to_async, which carries this context along
+            response = await self.get_response(request)
+        finally:
+            active_metrics.reset(token)
+        route = self.record(request, response, time.perf_counter() - start, metrics)
+        if metrics.slow_queries:
+            await sync_to_async(save_slow_queries)(request, route, metrics.slow_queries)
+        return response
+
+    def record(self, request, response, duration, metrics):
+        match = request.resolver_match
+        route = (match.view_name if match else None) or UNMATCHED
+        size = None if response.streaming else len(response.content)
+        method = request.method if request.method in METHODS else OTHER_METHOD
+        registry.record(route, method, response.status_code, duration, metrics, size)
+        return route
+
+
+class MetricsView(views.APIView):
+    permission_classes = [IsAdmin]
+
+    def get(self, request):
+        return HttpResponse(registry.exposition(), content_type='text/plain; version=0.0.4; charset=utf-8')
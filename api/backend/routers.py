@@ -0,0 +1,138 @@
+import contextvars
+import random
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DEFAULT_DB_ALIAS
+
+# Sent on responses to writes and echoed back by the client while it lasts
+PIN_HEADER = 'X-Primary-Pin'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+_read_database = contextvars.ContextVar('read_database', default=None)
+
+
+def read_database():
+    """The alias the current replica_reads handler reads from, or None outside one."""
+    return _read_database.get()
+
+
+def reading_from_replica():
+    return _read_database.get() not in (None, DEFAULT_DB_ALIAS)
+
+
+@contextmanager
+def primary_reads():
+    """Send the reads of a replica_reads handler to the primary inside the block."""
+    token = _read_database.set(DEFAULT_DB_ALIAS)
+    try:
+        yield
+    finally:
+        _read_database.reset(token)
+
+
+def is_pinned(request):
+    try:
+        return float(request.headers.get(PIN_HEADER, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+def choose_database(request):
+    if is_pinned(request):
+        return DEFAULT_DB_ALIAS
+    return random.choice(settings.DATABASE_REPLICAS)
+
+
+def replica_reads(handler):
+    """
+    Decorator for APIView.get handlers that may be served from a replica.
+    Queries inside the handler, and inside the decorators below it, read
+    from one of DATABASE_REPLICAS, picked per request, or from the primary
+    while the client is pinned by PrimaryPinMiddleware. conditional_get
+    still reads its validators from the primary and falls back to it when
+    the replica is behind. Without replicas it does nothing. Works on sync
+    and async handlers.
+    """
+    if iscoroutinefunction(handler):
+        @wraps(handler)
+        async def async_wrapper(self, request, *args, **kwargs):
+            if not settings.DATABASE_REPLICAS:
+                return await handler(self, request, *args, **kwargs)
+            token = _read_database.set(choose_database(request))
+            try:
+                return await handler(self, request, *args, **kwargs)
+            finally:
+                _read_database.reset(token)
+        return async_wrapper
+
+    @wraps(handler)
+    def wrapper(self, request, *args, **kwargs):
+        if not settings.DATABASE_REPLICAS:
+            return handler(self, request, *args, **kwargs)
+        token = _read_database.set(choose_database(request))
+        try:
+            return handler(self, request, *args, **kwargs)
+        finally:
+            _read_database.reset(token)
+    return wrapper
+
+
+class ReplicaRouter:
+    """
+    Sends reads in replica_reads handlers to the database chosen for the
+    request and everything else, writes included, to the primary. Replicas
+    hold the same rows, so relations between them are allowed.
+    """
+
+    def db_for_read(self, model, **hints):
+        return _read_database.get()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = [DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS]
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+
+class PrimaryPinMiddleware:
+    """
+    Read-your-writes for replica reads: a successful write answers with an
+    X-Primary-Pin header holding an expiry time, DATABASE_PRIMARY_PIN_SECONDS
+    ahead, which should cover replication lag. Clients send it back on their
+    requests until then (frontend/src/utilities/Axios.jsx does), and their
+    replica_reads handlers stay on the primary. A header rather than a
+    cookie, as the API is cross-origin and authenticated by bearer token.
+    Unused without replicas.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.DATABASE_REPLICAS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.pin_seconds = settings.DATABASE_PRIMARY_PIN_SECONDS
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        return self.pin(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.pin(request, await self.get_response(request))
+
+    def pin(self, request, response):
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            response[PIN_HEADER] = f'{time.time() + self.pin_seconds:.3f}'
+        return response
@@ -15,6 +15,7 @@ import dj_database_url
 from dotenv import load_dotenv
 import os
 import datetime
+from corsheaders.defaults import default_headers
 
 # Load environment variables from '.env.local'
 load_dotenv(dotenv_path=Path('.') / '.env.local')
@@ -54,6 +55,12 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # First, so its timings cover the rest of the stack; served at /metrics
+    'backend.metrics.RequestMetricsMiddleware',
+    # cProfile runs on an admin's request, kept in the Django admin
+    'inventory.profiling.RequestProfilingMiddleware',
+    # Keeps clients that just wrote off the read replicas, if any
+    'backend.routers.PrimaryPinMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -66,19 +73,52 @@ MIDDLEWARE = [
 ]
 
 CORS_ALLOW_ALL_ORIGINS = True
+# The read-your-writes pin travels in a header, see backend/routers.py
+CORS_ALLOW_HEADERS = (*default_headers, 'x-primary-pin')
+CORS_EXPOSE_HEADERS = ['X-Primary-Pin']
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'user_authentication.authentication.ClaimsJWTAuthentication',
+    ],
+    # JSON rendering counts towards serializer time, see backend/timing.py
+    'DEFAULT_RENDERER_CLASSES': [
+        'backend.timing.TimedJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
     ],
 }
+# Fallback user cache for tokens without role claims, see user_authentication/authentication.py
+AUTH_USER_CACHE_SIZE = int(os.environ.get('AUTH_USER_CACHE_SIZE', 1024))
+AUTH_USER_CACHE_TTL = int(os.environ.get('AUTH_USER_CACHE_TTL', 60))
 
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': datetime.timedelta(minutes=10),
     'REFRESH_TOKEN_LIFETIME': datetime.timedelta(days=1),
+    'TOKEN_REFRESH_SERIALIZER': 'user_authentication.revocation.RevocableTokenRefreshSerializer',
 }
+# Revoked refresh tokens, see user_authentication/revocation.py. Other
+# processes see a logout within the sync interval (seconds).
+TOKEN_REVOCATION_SYNC_INTERVAL = int(os.environ.get('TOKEN_REVOCATION_SYNC_INTERVAL', 5))
+TOKEN_REVOCATION_PURGE_INTERVAL = int(os.environ.get('TOKEN_REVOCATION_PURGE_INTERVAL', 3600))
+
+# Statements slower than this (milliseconds) during a request are logged and
+# kept in the admin with their view and stack; 0 keeps every one, -1 none
+SLOW_QUERY_THRESHOLD_MS = int(os.environ.get('SLOW_QUERY_THRESHOLD_MS', 500))
+# Days stored slow queries and request profiles are kept; manage.py
+# purge_profiling deletes older ones
+PROFILING_RETENTION_DAYS = int(os.environ.get('PROFILING_RETENTION_DAYS', 14))
 
 ROOT_URLCONF = 'backend.urls'
+# Route names served by their async view variant (see inventory/async_views.py),
+# e.g. ASYNC_VIEW_ROUTES=inventory_items,categories. Only worth it under ASGI.
+ASYNC_VIEW_ROUTES = [name for name in os.environ.get('ASYNC_VIEW_ROUTES', '').split(',') if name]
+# Inventory change stream, see inventory/events.py: events kept for
+# Last-Event-ID resume, and seconds between keep-alive comments
+INVENTORY_EVENTS_BUFFER = int(os.environ.get('INVENTORY_EVENTS_BUFFER', 1000))
+INVENTORY_EVENTS_HEARTBEAT = int(os.environ.get('INVENTORY_EVENTS_HEARTBEAT', 15))
+# Days deleted item ids are kept for delta sync (see inventory/changes.py);
+# older cursors get 410 Gone and must reload everything
+INVENTORY_TOMBSTONE_DAYS = int(os.environ.get('INVENTORY_TOMBSTONE_DAYS', 30))
 
 TEMPLATES = [
     {
@@ -105,6 +145,38 @@ WSGI_APPLICATION = 'backend.wsgi.application'
 DATABASES = {
     'default': dj_database_url.config(default=os.getenv('POSTGRES_URL'))
 }
+# Read replicas as a comma-separated POSTGRES_REPLICA_URLS, named replica1,
+# replica2, ... Item, category and update request GETs read from them, see
+# backend/routers.py; a client that wrote stays on the primary for
+# DATABASE_PRIMARY_PIN_SECONDS. Two local SQLite files work too, e.g.
+# POSTGRES_REPLICA_URLS=sqlite:////tmp/replica.sqlite3 after a copy of the
+# primary's file. Run the tests without it; they set up their own replica.
+DATABASE_REPLICAS = []
+for number, url in enumerate(filter(None, os.environ.get('POSTGRES_REPLICA_URLS', '').split(',')), 1):
+    DATABASES[f'replica{number}'] = dict(dj_database_url.parse(url), TEST={'MIRROR': 'default'})
+    DATABASE_REPLICAS.append(f'replica{number}')
+DATABASE_ROUTERS = ['backend.routers.ReplicaRouter']
+DATABASE_PRIMARY_PIN_SECONDS = int(os.environ.get('DATABASE_PRIMARY_PIN_SECONDS', 10))
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.0/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # Response cache for inventory reads (see inventory/cache.py). LocMemCache
+    # is per process; point INVENTORY_CACHE_BACKEND at
+    # django.core.cache.backends.filebased.FileBasedCache and
+    # INVENTORY_CACHE_LOCATION at a directory to share it between workers.
+    'inventory': {
+        'BACKEND': os.environ.get('INVENTORY_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('INVENTORY_CACHE_LOCATION', 'inventory'),
+    },
+}
+INVENTORY_CACHE_ALIAS = 'inventory'
+INVENTORY_CACHE_TIMEOUT = int(os.environ.get('INVENTORY_CACHE_TIMEOUT', 300))
 
 
 # Password validation
@@ -162,4 +234,12 @@ EMAIL_USE_TLS = True
 EMAIL_HOST = 'smtp-mail.outlook.com'
 EMAIL_PORT = 587
 EMAIL_HOST_USER = os.environ.get('OUTLOOK_EMAIL')
-EMAIL_HOST_PASSWORD = os.environ.get('OUTLOOK_EMAIL_PASSWORD')
\ No newline at end of file
+EMAIL_HOST_PASSWORD = os.environ.get('OUTLOOK_EMAIL_PASSWORD')
+EMAIL_TIMEOUT = int(os.environ.get('EMAIL_TIMEOUT', 30))
+
+# Outbox worker (manage.py send_outbox), see user_authentication/outbox.py
+OUTBOX_BATCH_SIZE = int(os.environ.get('OUTBOX_BATCH_SIZE', 100))
+OUTBOX_MAX_ATTEMPTS = int(os.environ.get('OUTBOX_MAX_ATTEMPTS', 6))
+# Seconds before the first retry; doubles per attempt up to the maximum
+OUTBOX_RETRY_DELAY = int(os.environ.get('OUTBOX_RETRY_DELAY', 60))
+OUTBOX_MAX_RETRY_DELAY = int(os.environ.get('OUTBOX_MAX_RETRY_DELAY', 3600))
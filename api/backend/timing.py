@@ -0,0 +1,61 @@
+import contextvars
+import math
+import time
+from functools import wraps
+
+from rest_framework.renderers import JSONRenderer
+
+# The current request's RequestMetrics, set by RequestMetricsMiddleware in metrics.py
+active_metrics = contextvars.ContextVar('request_metrics', default=None)
+
+
+class RequestMetrics:
+    __slots__ = ('queries', 'db_time', 'serializer_time', 'serializing', 'slow_query_seconds', 'slow_queries')
+
+    def __init__(self, slow_query_seconds=math.inf):
+        self.queries = 0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+        self.serializing = False
+        self.slow_query_seconds = slow_query_seconds
+        self.slow_queries = []
+
+
+def timed_serializer(func):
+    """Add the time spent in func to the current request's serializer time."""
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        metrics = active_metrics.get()
+        # Nested calls are already inside the outer one's timing
+        if metrics is None or metrics.serializing:
+            return func(*args, **kwargs)
+        metrics.serializing = True
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            metrics.serializer_time += time.perf_counter() - start
+            metrics.serializing = False
+    return wrapper
+
+
+class TimedSerializerMixin:
+    """
+    First base of the project's DRF serializers, so building their .data
+    counts towards serializer time. With many=True the list calls this once
+    per row. ValuesSerializer.serialize and TimedJSONRenderer cover the
+    rest: serializer time is building response data plus rendering it.
+    """
+
+    @timed_serializer
+    def to_representation(self, instance):
+        return super().to_representation(instance)
+
+
+class TimedJSONRenderer(JSONRenderer):
+    """
+    The API's JSON renderer (REST_FRAMEWORK in settings.py). Kept apart from
+    metrics.py, which imports rest_framework.views, as DRF loads its renderer
+    settings from there.
+    """
+    render = timed_serializer(JSONRenderer.render)
@@ -1,28 +1,58 @@
+from django.conf import settings
 from django.urls import path
 from django.contrib import admin
 from rest_framework_simplejwt.views import TokenRefreshView
 
-from inventory.views import InventoryItemAPIView, CategoryAPIView, InventoryUpdateRequestAPIView, InventoryRequestActionAPIView
+from inventory.views import (
+    InventoryItemAPIView, CategoryAPIView, InventoryUpdateRequestAPIView, InventoryRequestActionAPIView,
+    InventoryDashboardAPIView, InventoryCacheStatsAPIView, InventoryRequestBulkActionAPIView,
+    InventoryItemExportAPIView, InventoryItemImportAPIView, InventoryItemBulkAPIView, InventoryEventsAPIView,
+    InventoryItemChangesAPIView, InventorySearchAPIView, InventoryItemUsageAPIView, InventoryForecastAPIView,
+)
+from inventory.async_views import AsyncInventoryItemAPIView, AsyncCategoryAPIView, AsyncInventoryUpdateRequestAPIView
 from user_authentication import views as authentication_views
+from backend.metrics import MetricsView
 
 base_url = 'api/v1'
 
+def api_path(route, view, name, async_view=None):
+    # Routes named in settings.ASYNC_VIEW_ROUTES are served by the async variant
+    if async_view is not None and name in settings.ASYNC_VIEW_ROUTES:
+        view = async_view
+    return path(route, view.as_view(), name=name)
+
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('metrics', MetricsView.as_view(), name='metrics'),
 
     # Inventory Items
-    path(f'{base_url}/inventory/items/', InventoryItemAPIView.as_view(), name='inventory_items'),
-    path(f'{base_url}/inventory/items/<int:item_id>/', InventoryItemAPIView.as_view(), name='inventory_item_detail'),
-    path(f'{base_url}/inventory/items/category/<str:category_name>/', InventoryItemAPIView.as_view(), name='inventory_items_by_category'),
+    api_path(f'{base_url}/inventory/items/', InventoryItemAPIView, 'inventory_items', AsyncInventoryItemAPIView),
+    api_path(f'{base_url}/inventory/items/<int:item_id>/', InventoryItemAPIView, 'inventory_item_detail', AsyncInventoryItemAPIView),
+    api_path(f'{base_url}/inventory/items/category/<str:category_name>/', InventoryItemAPIView, 'inventory_items_by_category', AsyncInventoryItemAPIView),
+    path(f'{base_url}/inventory/items/<int:item_id>/usage/', InventoryItemUsageAPIView.as_view(), name='inventory_item_usage'),
+    path(f'{base_url}/inventory/items/bulk/', InventoryItemBulkAPIView.as_view(), name='inventory_items_bulk'),
+    path(f'{base_url}/inventory/items/changes/', InventoryItemChangesAPIView.as_view(), name='inventory_items_changes'),
+    path(f'{base_url}/inventory/items/export/<str:export_format>/', InventoryItemExportAPIView.as_view(), name='inventory_items_export'),
+    path(f'{base_url}/inventory/items/import/', InventoryItemImportAPIView.as_view(), name='inventory_items_import'),
+    path(f'{base_url}/inventory/forecast/', InventoryForecastAPIView.as_view(), name='inventory_forecast'),
+
+    # Search
+    path(f'{base_url}/inventory/search/', InventorySearchAPIView.as_view(), name='inventory_search'),
+
+    # Dashboard
+    path(f'{base_url}/inventory/dashboard/', InventoryDashboardAPIView.as_view(), name='inventory_dashboard'),
+    path(f'{base_url}/inventory/cache/stats/', InventoryCacheStatsAPIView.as_view(), name='inventory_cache_stats'),
+    path(f'{base_url}/inventory/events/', InventoryEventsAPIView.as_view(), name='inventory_events'),
 
     # Categories
-    path(f'{base_url}/inventory/categories/', CategoryAPIView.as_view(), name='categories'),
-    path(f'{base_url}/inventory/categories/<int:category_id>/', CategoryAPIView.as_view(), name='category_detail'),
+    api_path(f'{base_url}/inventory/categories/', CategoryAPIView, 'categories', AsyncCategoryAPIView),
+    api_path(f'{base_url}/inventory/categories/<int:category_id>/', CategoryAPIView, 'category_detail', AsyncCategoryAPIView),
 
     # Inventory Update Requests
-    path(f'{base_url}/inventory/requests/', InventoryUpdateRequestAPIView.as_view(), name='inventory_requests'),
-    path(f'{base_url}/inventory/requests/<int:request_id>/', InventoryUpdateRequestAPIView.as_view(), name='inventory_request_detail'),
+    api_path(f'{base_url}/inventory/requests/', InventoryUpdateRequestAPIView, 'inventory_requests', AsyncInventoryUpdateRequestAPIView),
+    api_path(f'{base_url}/inventory/requests/<int:request_id>/', InventoryUpdateRequestAPIView, 'inventory_request_detail', AsyncInventoryUpdateRequestAPIView),
     path(f'{base_url}/inventory/requests/<int:request_id>/action/<str:action>/', InventoryRequestActionAPIView.as_view(), name='inventory_request_action'),
+    path(f'{base_url}/inventory/requests/bulk-action/', InventoryRequestBulkActionAPIView.as_view(), name='inventory_request_bulk_action'),
 
 
     # User Authentication 
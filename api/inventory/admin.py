@@ -1,6 +1,9 @@
 from django.contrib import admin
-from django.utils import timezone
-from .models import Category, InventoryItem, InventoryUpdateRequest
+from django.http import HttpResponse
+from django.utils.html import format_html
+from .ledger import movement_source
+from .models import Category, InventoryItem, InventoryUpdateRequest, RequestProfile, SlowQuery, StockMovement
+from .services import apply_request_action, APPROVE, REJECT
 
 @admin.register(Category)
 class CategoryAdmin(admin.ModelAdmin):
@@ -14,6 +17,59 @@ class InventoryItemAdmin(admin.ModelAdmin):
     search_fields = ['name']
     actions = ['update_quantities']
 
+    def save_model(self, request, obj, form, change):
+        with movement_source(StockMovement.ADMIN_EDIT, request.user):
+            super().save_model(request, obj, form, change)
+
+class DiagnosticsAdmin(admin.ModelAdmin):
+    # Written by the middleware only; admins read and clear them
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+@admin.register(RequestProfile)
+class RequestProfileAdmin(DiagnosticsAdmin):
+    list_display = ['created_at', 'method', 'path', 'view_name', 'status_code', 'duration', 'user']
+    list_filter = ['view_name', 'created_at']
+    list_select_related = ['user']
+    search_fields = ['path']
+    fields = ['created_at', 'user', 'method', 'path', 'view_name', 'status_code', 'duration', 'profile_stats']
+    readonly_fields = ['profile_stats']
+    actions = ['download_profile']
+
+    def profile_stats(self, obj):
+        return format_html('<pre>{}</pre>', obj.stats)
+    profile_stats.short_description = "Stats"
+
+    def download_profile(self, request, queryset):
+        profile = queryset.order_by('-created_at').first()
+        response = HttpResponse(bytes(profile.data), content_type='application/octet-stream')
+        response['Content-Disposition'] = f'attachment; filename="request-{profile.pk}.prof"'
+        return response
+    download_profile.short_description = "Download the newest selected profile (.prof)"
+
+@admin.register(SlowQuery)
+class SlowQueryAdmin(DiagnosticsAdmin):
+    list_display = ['created_at', 'view_name', 'method', 'duration', 'short_sql']
+    list_filter = ['view_name', 'created_at']
+    search_fields = ['sql', 'path']
+    fields = ['created_at', 'view_name', 'method', 'path', 'duration', 'query', 'query_stack']
+    readonly_fields = ['query', 'query_stack']
+
+    def short_sql(self, obj):
+        return obj.sql[:120]
+    short_sql.short_description = "SQL"
+
+    def query(self, obj):
+        return format_html('<pre>{}</pre>', obj.sql)
+    query.short_description = "SQL"
+
+    def query_stack(self, obj):
+        return format_html('<pre>{}</pre>', obj.stack)
+    query_stack.short_description = "Stack"
+
 @admin.register(InventoryUpdateRequest)
 class InventoryUpdateRequestAdmin(admin.ModelAdmin):
     list_display = ['item', 'requested_quantity', 'status', 'submitted_by', 'approved_by', 'created_at', 'approved_at']
@@ -21,14 +77,25 @@ class InventoryUpdateRequestAdmin(admin.ModelAdmin):
     actions = ['approve_requests', 'reject_requests']
 
     def approve_requests(self, request, queryset):
-        for update_request in queryset.filter(status='pending'):
-            update_request.item.update_quantity(update_request.requested_quantity, request.user)
-            update_request.status = 'approved'
-            update_request.approved_by = request.user
-            update_request.approved_at = timezone.now()
-            update_request.save()
+        apply_request_action(queryset.values_list('id', flat=True), APPROVE, request.user)
     approve_requests.short_description = "Approve selected requests"
 
     def reject_requests(self, request, queryset):
-        queryset.filter(status='pending').update(status='rejected', approved_by=request.user, approved_at=timezone.now())
+        apply_request_action(queryset.values_list('id', flat=True), REJECT, request.user)
     reject_requests.short_description = "Reject selected requests"
+
+@admin.register(StockMovement)
+class StockMovementAdmin(admin.ModelAdmin):
+    list_display = ['item', 'quantity_before', 'quantity_after', 'delta', 'source', 'actor', 'created_at']
+    list_filter = ['source', 'created_at']
+    list_select_related = ['item', 'actor']
+
+    # The ledger is append-only
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
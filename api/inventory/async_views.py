@@ -0,0 +1,160 @@
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse
+from django.shortcuts import aget_object_or_404
+from rest_framework import status, views
+from rest_framework.response import Response
+
+from backend.routers import replica_reads
+
+from .cache import cached_get
+from .conditional import conditional_get
+from .fast_serializers import InventoryItemValuesSerializer, CategoryValuesSerializer, InventoryUpdateRequestValuesSerializer
+from .filters import filter_items, get_item_ordering
+from .models import Category, InventoryItem, InventoryUpdateRequest
+from .pagination import KeysetPagination
+from .serializers import InventoryItemSerializer, CategorySerializer, InventoryUpdateRequestSerializer
+from .views import (
+    InventoryItemAPIView, CategoryAPIView, InventoryUpdateRequestAPIView, item_generations, category_generations,
+)
+
+
+class AsyncAPIView(views.APIView):
+    """
+    APIView with coroutine GET handlers that use the async ORM, for serving
+    reads under ASGI.
+
+    dispatch() is APIView's, except that the authenticators and the handler
+    are awaited; content negotiation, permissions, throttles, exception
+    handling and finalize_response are APIView's own. Every other method is
+    passed to sync_view, the APIView for the same route, in a worker thread,
+    so writes keep their serializers, validation and signals unchanged.
+    """
+    sync_view = None
+    sync_handler = None
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        if cls.sync_view is not None:
+            initkwargs.setdefault('sync_handler', sync_to_async(cls.sync_view.as_view()))
+        return super().as_view(**initkwargs)
+
+    async def dispatch(self, request, *args, **kwargs):
+        if request.method.lower() not in ('get', 'head') and self.sync_handler is not None:
+            return await self.sync_handler(request, *args, **kwargs)
+
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            # With the user set, initial() finds nothing left to authenticate
+            await self.authenticate(request)
+            self.initial(request, *args, **kwargs)
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(self, request.method.lower(), self.http_method_not_allowed)
+            else:
+                handler = self.http_method_not_allowed
+            response = await handler(request, *args, **kwargs)
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+    async def authenticate(self, request):
+        # Authenticators with an aauthenticate() method are awaited directly;
+        # others run in a worker thread
+        for authenticator in request.authenticators:
+            if hasattr(authenticator, 'aauthenticate'):
+                user_auth = await authenticator.aauthenticate(request)
+            else:
+                user_auth = await sync_to_async(authenticator.authenticate)(request)
+            if user_auth is not None:
+                request._authenticator = authenticator
+                request.user, request.auth = user_auth
+                return
+        request._not_authenticated()
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if not isinstance(response, Response):
+            return response
+        # Render here; left deferred, Django would render it in a worker thread
+        return HttpResponse(response.rendered_content, status=response.status_code, headers=response.headers)
+
+
+class AsyncInventoryItemAPIView(AsyncAPIView):
+    sync_view = InventoryItemAPIView
+
+    @replica_reads
+    @conditional_get(InventoryItem, Category)
+    @cached_get(item_generations)
+    async def get(self, request, item_id=None, category_name=None):
+        if item_id:
+            try:
+                item = await InventoryItem.objects.select_related('category').aget(id=item_id)
+            except InventoryItem.DoesNotExist:
+                return Response({"error": "Item not found"}, status=status.HTTP_404_NOT_FOUND)
+            return Response(InventoryItemSerializer(item).data, status=status.HTTP_200_OK)
+
+        items = InventoryItem.objects.all()
+        if category_name:
+            category = await aget_object_or_404(Category, name=category_name)
+            items = items.filter(category=category)
+        items = InventoryItemValuesSerializer.get_values(filter_items(items, request))
+
+        paginator = KeysetPagination(get_item_ordering(request, default='name'))
+        if paginator.is_requested(request):
+            page = await paginator.apaginate_queryset(items, request)
+            return paginator.get_paginated_response(InventoryItemValuesSerializer.serialize(page))
+
+        ordering = get_item_ordering(request)
+        if ordering:
+            items = items.order_by(ordering, f"{'-' if ordering.startswith('-') else ''}id")
+        return Response(InventoryItemValuesSerializer.serialize([row async for row in items]), status=status.HTTP_200_OK)
+
+
+class AsyncCategoryAPIView(AsyncAPIView):
+    sync_view = CategoryAPIView
+
+    @replica_reads
+    @conditional_get(Category)
+    @cached_get(category_generations)
+    async def get(self, request, category_id=None):
+        if category_id:
+            try:
+                category = await Category.objects.aget(id=category_id)
+            except Category.DoesNotExist:
+                return Response({"error": "Category not found"}, status=status.HTTP_404_NOT_FOUND)
+            return Response(CategorySerializer(category).data, status=status.HTTP_200_OK)
+
+        categories = CategoryValuesSerializer.get_values(Category.objects.all())
+        return Response(CategoryValuesSerializer.serialize([row async for row in categories]), status=status.HTTP_200_OK)
+
+
+class AsyncInventoryUpdateRequestAPIView(AsyncAPIView):
+    sync_view = InventoryUpdateRequestAPIView
+
+    @replica_reads
+    @conditional_get(InventoryUpdateRequest)
+    async def get(self, request, request_id=None):
+        if request_id:
+            try:
+                update_request = await (
+                    InventoryUpdateRequest.objects.select_related('submitted_by', 'approved_by').aget(id=request_id)
+                )
+            except InventoryUpdateRequest.DoesNotExist:
+                return Response({"error": "Update request not found"}, status=status.HTTP_404_NOT_FOUND)
+            return Response(InventoryUpdateRequestSerializer(update_request).data, status=status.HTTP_200_OK)
+
+        update_requests = InventoryUpdateRequest.objects.order_by('created_at', 'id')
+        request_status = request.query_params.get('status')
+        if request_status:
+            update_requests = update_requests.filter(status=request_status)
+        update_requests = InventoryUpdateRequestValuesSerializer.get_values(update_requests)
+        return Response(
+            InventoryUpdateRequestValuesSerializer.serialize([row async for row in update_requests]),
+            status=status.HTTP_200_OK,
+        )
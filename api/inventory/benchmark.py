@@ -0,0 +1,269 @@
+import itertools
+import json
+import operator
+import statistics
+import time
+import tracemalloc
+from collections import Counter, namedtuple
+
+from django.contrib.auth.tokens import PasswordResetTokenGenerator
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import Client
+from django.urls import URLPattern, get_resolver, reverse
+from django.utils.encoding import smart_bytes
+from django.utils.http import urlencode, urlsafe_base64_encode
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .models import Category, InventoryItem, InventoryUpdateRequest
+from user_authentication.models import User
+
+# Routes in backend/urls.py the runner leaves out on purpose
+SKIPPED_ROUTES = {
+    'inventory_events': 'an endless event stream; there is no response to time',
+}
+
+ANONYMOUS, EMPLOYEE, MANAGER, ADMIN = None, 'employee', 'manager', 'admin'
+
+# prepare(bench) runs before every request, outside the timing, and
+# returns (url kwargs, body); a dict body with files is sent as multipart.
+# query is a dict, or a function of the bench for values made per request
+Scenario = namedtuple('Scenario', ['route', 'method', 'label', 'user', 'query', 'prepare'])
+
+
+def no_body(bench):
+    return {}, None
+
+
+def scenarios():
+    return [
+        Scenario('inventory_items', 'GET', 'first page', EMPLOYEE, {'page_size': 50}, no_body),
+        Scenario('inventory_items', 'POST', 'create', MANAGER, {}, lambda b: ({}, b.new_item())),
+        Scenario('inventory_item_detail', 'GET', 'one item', EMPLOYEE, {}, lambda b: ({'item_id': b.item_id()}, None)),
+        Scenario('inventory_item_detail', 'PUT', 'edit', MANAGER, {}, lambda b: b.item_edit()),
+        Scenario('inventory_items_by_category', 'GET', 'one category', EMPLOYEE, {}, lambda b: ({'category_name': b.category_name}, None)),
+        Scenario('inventory_item_usage', 'GET', '90 days', EMPLOYEE, {'days': 90}, lambda b: ({'item_id': b.item_id()}, None)),
+        Scenario('inventory_items_bulk', 'POST', '50 rows', MANAGER, {}, lambda b: ({}, b.bulk_rows(50))),
+        Scenario('inventory_items_changes', 'GET', 'first page', EMPLOYEE, {}, no_body),
+        Scenario('inventory_items_export', 'GET', 'csv, one category', MANAGER, lambda b: {'category': b.category_name}, lambda b: ({'export_format': 'csv'}, None)),
+        Scenario('inventory_items_import', 'POST', '20 new rows', MANAGER, {}, lambda b: ({}, b.import_file(20))),
+        Scenario('inventory_forecast', 'POST', 'dry run', MANAGER, {}, lambda b: ({}, {'dry_run': True, 'limit': 10})),
+        Scenario('inventory_search', 'GET', 'typo', EMPLOYEE, {'q': 'towl'}, no_body),
+        Scenario('inventory_dashboard', 'GET', 'summary', EMPLOYEE, {}, no_body),
+        Scenario('inventory_cache_stats', 'GET', 'stats', MANAGER, {}, no_body),
+        Scenario('categories', 'GET', 'all', EMPLOYEE, {}, no_body),
+        Scenario('categories', 'POST', 'create', MANAGER, {}, lambda b: ({}, {'name': f'Benchmark category {b.next()}'})),
+        Scenario('category_detail', 'GET', 'one category', EMPLOYEE, {}, lambda b: ({'category_id': b.category_id}, None)),
+        Scenario('inventory_requests', 'GET', 'pending queue', MANAGER, {'status': 'pending'}, no_body),
+        Scenario('inventory_requests', 'POST', 'submit', EMPLOYEE, {}, lambda b: ({}, {'item': b.item_id(), 'requested_quantity': 5})),
+        Scenario('inventory_request_detail', 'GET', 'one request', MANAGER, {}, lambda b: ({'request_id': b.pending_request()}, None)),
+        Scenario('inventory_request_action', 'POST', 'approve', MANAGER, {}, lambda b: ({'request_id': b.pending_request(), 'action': 'approve'}, None)),
+        Scenario('inventory_request_bulk_action', 'POST', 'approve 20', MANAGER, {}, lambda b: ({}, b.bulk_action(20))),
+        Scenario('register', 'POST', 'new account', ANONYMOUS, {}, lambda b: ({}, b.registration())),
+        Scenario('email-verify', 'GET', 'valid token', ANONYMOUS, lambda b: {'token': b.unverified.tokens()['access']}, no_body),
+        Scenario('login', 'POST', 'password', ANONYMOUS, {}, lambda b: ({}, {'email': b.manager.email, 'password': b.password})),
+        Scenario('logout', 'POST', 'revoke', MANAGER, {}, lambda b: ({}, {'refresh': str(RefreshToken.for_user(b.manager))})),
+        Scenario('token_refresh', 'POST', 'refresh', ANONYMOUS, {}, lambda b: ({}, {'refresh': str(RefreshToken.for_user(b.manager))})),
+        Scenario('request-reset-email', 'POST', 'known email', ANONYMOUS, {}, lambda b: ({}, {'email': b.manager.email})),
+        Scenario('password-reset-confirm', 'GET', 'valid token', ANONYMOUS, {}, lambda b: (b.reset_token(), None)),
+        Scenario('password-reset-complete', 'PATCH', 'new password', ANONYMOUS, {}, lambda b: ({}, dict(b.reset_token(), password=b.password))),
+        Scenario('metrics', 'GET', 'scrape', ADMIN, {}, no_body),
+    ]
+
+
+def route_names():
+    """Names of the top level routes in the root URLconf; included URLconfs such as the admin are left out."""
+    return [pattern.name for pattern in get_resolver().url_patterns if isinstance(pattern, URLPattern) and pattern.name]
+
+
+def percentile(sorted_values, fraction):
+    index = fraction * (len(sorted_values) - 1)
+    low = int(index)
+    high = min(low + 1, len(sorted_values) - 1)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (index - low)
+
+
+class ApiBenchmark:
+    """
+    Times every route in backend/urls.py through the full request handler
+    and middleware stack, in-process, against whatever data the current
+    database holds (see seed.py). Each scenario is warmed up, then timed over
+    a number of sequential requests for latency percentiles, throughput and
+    queries per request; a few more requests run under tracemalloc for the
+    peak Python memory one request allocates. Writing scenarios change the
+    data, so point this at a throwaway database.
+    """
+    password = 'benchmark-password'
+
+    def __init__(self, iterations=50, warmup=3, memory_samples=3, only=None, log=None):
+        self.iterations = iterations
+        self.warmup = warmup
+        self.memory_samples = memory_samples
+        self.only = set(only) if only else None
+        self.log = log or (lambda message: None)
+        self.counter = itertools.count()
+
+    def next(self):
+        return next(self.counter)
+
+    def set_up(self):
+        self.manager = self.user('bench-manager@example.com', User.MANAGER)
+        self.employee = self.user('bench-staff@example.com', User.EMPLOYEE)
+        self.admin = self.user('bench-admin@example.com', User.ADMIN)
+        self.reset_user = self.user('bench-reset@example.com', User.EMPLOYEE)
+        self.unverified = self.user('bench-unverified@example.com', User.EMPLOYEE, verified=False)
+        category = Category.objects.order_by('id').first() or Category.objects.create(name='Benchmark category')
+        self.category_id, self.category_name = category.id, category.name
+        if not InventoryItem.objects.exists():
+            InventoryItem.objects.create(name='Benchmark item', quantity=10, price='1.00', category=category)
+        self.item_ids = list(InventoryItem.objects.order_by('id').values_list('id', flat=True)[:1000])
+
+    def user(self, email, role, verified=True):
+        user = User.objects.filter(email=email).first() or User.objects.create_user(email, 'Bench', 'Mark', self.password, role=role)
+        User.objects.filter(id=user.id).update(is_verified=verified, is_active=True)
+        user.refresh_from_db()
+        return user
+
+    def item_id(self):
+        return self.item_ids[self.next() % len(self.item_ids)]
+
+    def new_item(self):
+        return {'name': f'Benchmark item {self.next()}', 'quantity': 10, 'price': '2.50', 'category': self.category_name}
+
+    def item_edit(self):
+        item = InventoryItem.objects.select_related('category').get(id=self.item_id())
+        return {'item_id': item.id}, {
+            'name': item.name, 'quantity': self.next() % 200, 'price': str(item.price), 'category': item.category.name,
+        }
+
+    def bulk_rows(self, count):
+        items = InventoryItem.objects.filter(id__in=[self.item_id() for _ in range(count)]).values(
+            'id', 'name', 'price', 'category__name',
+        )
+        return [
+            {'id': item['id'], 'name': item['name'], 'quantity': self.next() % 200, 'price': str(item['price']),
+             'category': item['category__name']}
+            for item in items
+        ]
+
+    def import_file(self, count):
+        lines = ['name,quantity,price,category']
+        lines.extend(f'Imported item {self.next()},{count},1.00,{self.category_name}' for _ in range(count))
+        return {'file': SimpleUploadedFile('items.csv', '\n'.join(lines).encode(), content_type='text/csv')}
+
+    def pending_request(self):
+        return InventoryUpdateRequest.objects.create(item_id=self.item_id(), requested_quantity=7, submitted_by=self.employee).id
+
+    def bulk_action(self, count):
+        return {'action': 'approve', 'request_ids': [self.pending_request() for _ in range(count)]}
+
+    def registration(self):
+        return {
+            'email': f'bench-register-{self.next()}@example.com', 'first_name': 'Bench', 'last_name': 'Mark',
+            'password': self.password,
+        }
+
+    def reset_token(self):
+        self.reset_user.refresh_from_db()
+        return {
+            'uidb64': urlsafe_base64_encode(smart_bytes(self.reset_user.id)),
+            'token': PasswordResetTokenGenerator().make_token(self.reset_user),
+        }
+
+    def selected(self):
+        return [scenario for scenario in scenarios() if self.only is None or scenario.route in self.only]
+
+    def coverage(self):
+        """Routes that have no scenario and are not skipped on purpose; they should get one."""
+        covered = set(scenario.route for scenario in scenarios()) | set(SKIPPED_ROUTES)
+        return [name for name in route_names() if name not in covered]
+
+    def client_for(self, scenario):
+        client = Client(raise_request_exception=False)
+        user = {EMPLOYEE: self.employee, MANAGER: self.manager, ADMIN: self.admin}.get(scenario.user)
+        if user is not None:
+            # A fresh token per scenario, so a long run never hits expiry
+            client.defaults['HTTP_AUTHORIZATION'] = f"Bearer {user.tokens()['access']}"
+        return client
+
+    def request(self, client, scenario):
+        kwargs, body = scenario.prepare(self)
+        query = scenario.query(self) if callable(scenario.query) else scenario.query
+        path = reverse(scenario.route, kwargs=kwargs or None)
+        if query:
+            path = f'{path}?{urlencode(query)}'
+        send = getattr(client, scenario.method.lower())
+        if body is None:
+            return lambda: send(path)
+        if isinstance(body, dict) and any(hasattr(value, 'read') for value in body.values()):
+            return lambda: send(path, body)
+        return lambda: send(path, json.dumps(body), content_type='application/json')
+
+    def measure(self, call):
+        queries = [0]
+
+        def count(execute, sql, params, many, context):
+            queries[0] += 1
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(count):
+            start = time.perf_counter()
+            response = call()
+            if response.streaming:
+                b''.join(response.streaming_content)
+            elapsed = time.perf_counter() - start
+        return response.status_code, elapsed, queries[0]
+
+    def run_scenario(self, scenario):
+        client = self.client_for(scenario)
+        for _ in range(self.warmup):
+            self.measure(self.request(client, scenario))
+
+        statuses, latencies, queries = Counter(), [], []
+        for _ in range(self.iterations):
+            status_code, elapsed, query_count = self.measure(self.request(client, scenario))
+            statuses[status_code] += 1
+            latencies.append(elapsed)
+            queries.append(query_count)
+
+        peak = 0
+        for _ in range(self.memory_samples):
+            call = self.request(client, scenario)
+            tracemalloc.start()
+            try:
+                self.measure(call)
+                peak = max(peak, tracemalloc.get_traced_memory()[1])
+            finally:
+                tracemalloc.stop()
+
+        latencies.sort()
+        return {
+            'route': scenario.route,
+            'method': scenario.method,
+            'label': scenario.label,
+            'requests': self.iterations,
+            'status': statuses.most_common(1)[0][0],
+            'errors': sum(count for code, count in statuses.items() if code >= 400),
+            'p50_ms': round(percentile(latencies, 0.50) * 1000, 3),
+            'p95_ms': round(percentile(latencies, 0.95) * 1000, 3),
+            'p99_ms': round(percentile(latencies, 0.99) * 1000, 3),
+            'mean_ms': round(statistics.fmean(latencies) * 1000, 3),
+            'throughput_rps': round(self.iterations / sum(latencies), 1),
+            'queries_per_request': round(statistics.fmean(queries), 2),
+            'peak_memory_kb': round(peak / 1024, 1),
+        }
+
+    def run(self):
+        self.set_up()
+        results = []
+        for scenario in self.selected():
+            self.log(f'{scenario.method} {scenario.route} ({scenario.label})')
+            results.append(self.run_scenario(scenario))
+        return results
+
+
+def compare(baseline, results):
+    """Pair each result with the baseline run of the same scenario: [(result, baseline result or None)]."""
+    key = operator.itemgetter('route', 'method', 'label')
+    previous = dict((key(result), result) for result in baseline['results'])
+    return [(result, previous.get(key(result))) for result in results]
@@ -0,0 +1,251 @@
+import csv
+import json
+
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.utils.encoding import force_str
+from rest_framework import serializers
+from rest_framework.fields import empty
+
+from . import events, ledger
+from .cache import response_cache, ITEMS, CATEGORY_NAMES, category_generation
+from .models import Category, InventoryItem, StockMovement, TableVersion
+from .serializers import InventoryItemSerializer, validate_item_quantities
+from .summary import apply_item_changes, current_stock_rows
+
+EXPORT_FIELDS = [
+    'id', 'name', 'category', 'quantity', 'price',
+    'recommended_quantity', 'warning_quantity', 'last_updated',
+]
+VALUE_FIELDS = ['name', 'quantity', 'price', 'recommended_quantity', 'warning_quantity']
+UPSERT_FIELDS = VALUE_FIELDS + ['category', 'last_updated']
+
+
+# Export
+
+class Echo:
+    # csv.writer only needs write(); hand each line straight back to the stream
+    def write(self, value):
+        return value
+
+
+def export_rows(queryset, chunk_size=2000):
+    lookups = ['category__name' if field == 'category' else field for field in EXPORT_FIELDS]
+    return queryset.order_by('id').values_list(*lookups).iterator(chunk_size=chunk_size)
+
+
+def stream_csv(rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(EXPORT_FIELDS)
+    for row in rows:
+        yield writer.writerow(row[:-1] + (row[-1].isoformat(),))
+
+
+def stream_ndjson(rows):
+    for row in rows:
+        record = dict(zip(EXPORT_FIELDS, row))
+        record['price'] = str(record['price'])
+        record['last_updated'] = record['last_updated'].isoformat()
+        yield json.dumps(record) + '\n'
+
+
+# Import
+
+class ImportFileError(Exception):
+    """
+    The upload cannot be read at `line`. ItemImporter.run writes the valid
+    rows before it, pending chunk included, before passing this on.
+    """
+
+    def __init__(self, line, message):
+        super().__init__(message)
+        self.line = line
+
+
+def decode_lines(binary_lines):
+    # Decoded line by line rather than through io.TextIOWrapper, so a bad
+    # byte is reported on the line it is on
+    for line_number, line in enumerate(binary_lines, start=1):
+        try:
+            yield line.decode('utf-8-sig' if line_number == 1 else 'utf-8')
+        except UnicodeDecodeError:
+            raise ImportFileError(line_number, 'The file is not valid UTF-8.') from None
+
+
+def read_csv(lines):
+    reader = csv.DictReader(lines)
+    try:
+        for line_number, row in enumerate(reader, start=2):
+            # Empty cells count as missing so optional columns fall back to defaults
+            yield line_number, {key: value for key, value in row.items() if key and value not in ('', None)}
+    except csv.Error as exc:
+        raise ImportFileError(reader.reader.line_num, f'The file is not valid CSV: {exc}.') from None
+
+
+def read_ndjson(lines):
+    for line_number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            yield line_number, None
+            continue
+        yield line_number, row if isinstance(row, dict) else None
+
+
+class ItemRowValidator:
+    """
+    Validates plain item dicts with the same field rules and validate()
+    checks as InventoryItemSerializer, but resolves categories from one
+    up-front query instead of a lookup per row.
+    """
+    name_max_length = InventoryItem._meta.get_field('name').max_length
+
+    def __init__(self, create_categories=False):
+        fields = InventoryItemSerializer().fields
+        self.fields = [(name, fields[name]) for name in VALUE_FIELDS]
+        self.id_field = serializers.IntegerField(min_value=1, required=False)
+        self.create_categories = create_categories
+        self.categories = dict(Category.objects.values_list('name', 'id'))
+
+    def get_category_id(self, name):
+        if name not in self.categories and self.create_categories:
+            self.categories[name] = Category.objects.get_or_create(name=name)[0].id
+        return self.categories.get(name)
+
+    def validate(self, row):
+        """Return (data, errors); data holds model field values when errors is empty."""
+        if not isinstance(row, dict):
+            return None, {'non_field_errors': ['Expected an object.']}
+
+        data, errors = {}, {}
+        try:
+            item_id = self.id_field.run_validation(row.get('id', empty))
+        except serializers.SkipField:
+            item_id = None
+        except serializers.ValidationError as exc:
+            errors['id'] = exc.detail
+        else:
+            data['id'] = item_id
+
+        for name, field in self.fields:
+            try:
+                data[name] = field.run_validation(row.get(name, empty))
+            except serializers.ValidationError as exc:
+                errors[name] = exc.detail
+        if 'name' in data and len(data['name']) > self.name_max_length:
+            errors['name'] = [f'Ensure this field has no more than {self.name_max_length} characters.']
+
+        category = row.get('category')
+        if category in (None, ''):
+            errors['category'] = ['This field is required.']
+        else:
+            data['category_id'] = self.get_category_id(force_str(category))
+            if data['category_id'] is None:
+                errors['category'] = [f'Object with name={category} does not exist.']
+
+        if not errors:
+            try:
+                validate_item_quantities(data['quantity'], data['recommended_quantity'], data['warning_quantity'])
+            except serializers.ValidationError as exc:
+                errors.update(exc.detail)
+        return data, errors
+
+
+class ItemImporter:
+    """
+    Streams validated rows into InventoryItem in chunks, one transaction per
+    chunk. Rows with an id are upserted with bulk_create(update_conflicts=True);
+    rows without one are inserted. Invalid rows are skipped and reported. An
+    ImportFileError from the reader stops the import once the valid rows
+    read before it are written; self.result counts them.
+    """
+
+    def __init__(self, chunk_size=5000, create_categories=False, max_errors=1000, actor=None):
+        self.chunk_size = chunk_size
+        self.actor = actor
+        self.max_errors = max_errors
+        self.validator = ItemRowValidator(create_categories=create_categories)
+        self.result = {'created': 0, 'updated': 0, 'failed': 0, 'errors': []}
+        self.explicit_ids = False
+
+    def run(self, numbered_rows):
+        chunk = {}
+        new_rows = []
+        try:
+            for line_number, row in numbered_rows:
+                data, errors = self.validator.validate(row)
+                if errors:
+                    self.add_error(line_number, errors)
+                    continue
+                if data.get('id'):
+                    # A later row for the same id wins, as it would row by row
+                    chunk[data['id']] = data
+                else:
+                    data.pop('id', None)
+                    new_rows.append(data)
+                if len(chunk) + len(new_rows) >= self.chunk_size:
+                    self.write_chunk(list(chunk.values()), new_rows)
+                    chunk, new_rows = {}, []
+        except ImportFileError:
+            # Everything before the unreadable line is kept, as it would be
+            # had the file ended there
+            if chunk or new_rows:
+                self.write_chunk(list(chunk.values()), new_rows)
+            raise
+        else:
+            if chunk or new_rows:
+                self.write_chunk(list(chunk.values()), new_rows)
+        finally:
+            # Written chunks are committed, so invalidate for them either way
+            self.finish()
+        return self.result
+
+    def add_error(self, line_number, errors):
+        self.result['failed'] += 1
+        if len(self.result['errors']) < self.max_errors:
+            self.result['errors'].append({'line': line_number, 'errors': errors})
+
+    def write_chunk(self, keyed_rows, new_rows):
+        with transaction.atomic():
+            existing = {}
+            if keyed_rows:
+                existing = current_stock_rows([row['id'] for row in keyed_rows])
+                InventoryItem.objects.bulk_create(
+                    [InventoryItem(**row) for row in keyed_rows],
+                    update_conflicts=True,
+                    unique_fields=['id'],
+                    update_fields=UPSERT_FIELDS,
+                )
+                self.result['updated'] += len(existing)
+                self.result['created'] += len(keyed_rows) - len(existing)
+                self.explicit_ids = self.explicit_ids or len(existing) < len(keyed_rows)
+            created = []
+            if new_rows:
+                created = InventoryItem.objects.bulk_create([InventoryItem(**row) for row in new_rows])
+                self.result['created'] += len(new_rows)
+            apply_item_changes(
+                [(existing.get(row['id']), row) for row in keyed_rows] + [(None, row) for row in new_rows]
+            )
+            ledger.record_movements(
+                [
+                    ledger.movement(row['id'], existing.get(row['id'], {}).get('quantity'), row['quantity'], StockMovement.IMPORT, self.actor)
+                    for row in keyed_rows
+                ] + [
+                    ledger.movement(item.pk, 0, item.quantity, StockMovement.IMPORT, self.actor) for item in created
+                ]
+            )
+
+    def finish(self):
+        if self.explicit_ids:
+            # Inserting explicit ids leaves sequences behind on some backends
+            with connection.cursor() as cursor:
+                for sql in connection.ops.sequence_reset_sql(no_style(), [InventoryItem]):
+                    cursor.execute(sql)
+        if self.result['created'] or self.result['updated']:
+            # bulk_create sends no model signals, so invalidate cached reads
+            # here; upserts may move items between categories, so drop them all
+            TableVersion.bump_on_commit(InventoryItem)
+            response_cache.bump_on_commit(ITEMS, CATEGORY_NAMES, *[category_generation(name) for name in self.validator.categories])
+            events.items_reloaded()
@@ -0,0 +1,166 @@
+import hashlib
+import threading
+import time
+from functools import wraps
+from inspect import iscoroutinefunction
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, transaction
+from rest_framework import status
+from rest_framework.response import Response
+
+from backend.routers import read_database
+
+# Generation names. Each cached response is stored under a key that embeds
+# the current value of every generation it depends on, so bumping one makes
+# those entries unreachable without touching anything else in the cache.
+ITEMS = 'items'
+CATEGORIES = 'categories'
+CATEGORY_NAMES = 'category-names'
+
+
+def item_generation(item_id):
+    return f'item:{item_id}'
+
+
+def category_generation(category_name):
+    # Names may hold spaces and control characters, which memcached keys cannot
+    return f"category:{hashlib.md5(category_name.encode('utf-8')).hexdigest()}"
+
+
+class ResponseCache:
+    key_prefix = 'inventory'
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def backend(self):
+        return caches[getattr(settings, 'INVENTORY_CACHE_ALIAS', 'inventory')]
+
+    def generation_key(self, name):
+        return f'{self.key_prefix}:gen:{name}'
+
+    def get_generations(self, names):
+        keys = [self.generation_key(name) for name in names]
+        found = self.backend.get_many(keys)
+        missing = {key: time.time_ns() for key in keys if key not in found}
+        if missing:
+            # Seed from the clock so an evicted generation never restarts at
+            # a value that old entries were stored under
+            self.backend.set_many(missing, timeout=None)
+            found.update(missing)
+        return [found[key] for key in keys]
+
+    async def aget_generations(self, names):
+        keys = [self.generation_key(name) for name in names]
+        found = await self.backend.aget_many(keys)
+        missing = {key: time.time_ns() for key in keys if key not in found}
+        if missing:
+            await self.backend.aset_many(missing, timeout=None)
+            found.update(missing)
+        return [found[key] for key in keys]
+
+    def bump(self, *names):
+        for name in set(names):
+            key = self.generation_key(name)
+            try:
+                self.backend.incr(key)
+            except ValueError:
+                self.backend.set(key, time.time_ns(), timeout=None)
+
+    def bump_on_commit(self, *names):
+        """
+        bump() once the current transaction commits. Bumping earlier lets a
+        concurrent read cache the uncommitted, old rows under the new
+        generation, where they stay until the timeout.
+        """
+        transaction.on_commit(lambda: self.bump(*names))
+
+    def response_key(self, request, generations):
+        raw = f"{request.build_absolute_uri()}|{'.'.join(str(g) for g in generations)}"
+        return f'{self.key_prefix}:response:{hashlib.md5(raw.encode("utf-8")).hexdigest()}'
+
+    def record(self, hit):
+        with self.lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def stats(self):
+        with self.lock:
+            hits, misses = self.hits, self.misses
+        lookups = hits + misses
+        return {
+            'backend': f'{type(self.backend).__module__}.{type(self.backend).__name__}',
+            'hits': hits,
+            'misses': misses,
+            'hit_ratio': round(hits / lookups, 4) if lookups else None,
+        }
+
+    def reset_stats(self):
+        with self.lock:
+            self.hits = self.misses = 0
+
+
+response_cache = ResponseCache()
+
+
+def cache_timeout():
+    timeout = getattr(settings, 'INVENTORY_CACHE_TIMEOUT', 300)
+    if read_database() in (None, DEFAULT_DB_ALIAS):
+        return timeout
+    # A lagging replica can serve rows older than the generation they are
+    # stored under, so its copies only live as long as the lag may last
+    return min(timeout, settings.DATABASE_PRIMARY_PIN_SECONDS)
+
+
+def skips_cache():
+    # Reads pinned to the primary, after a write, must not get a replica's copy
+    return read_database() == DEFAULT_DB_ALIAS
+
+
+def cached_get(get_generations):
+    """
+    Decorator for APIView.get handlers. get_generations(request, *args, **kwargs)
+    names the generations the response depends on; 200 responses are cached
+    until one of them is bumped or INVENTORY_CACHE_TIMEOUT passes. Works on
+    sync and async handlers; the latter use the cache backend's async API.
+    Under replica_reads, see cache_timeout() and skips_cache().
+    """
+    def decorator(handler):
+        if iscoroutinefunction(handler):
+            @wraps(handler)
+            async def async_wrapper(self, request, *args, **kwargs):
+                generations = await response_cache.aget_generations(get_generations(request, *args, **kwargs))
+                key = response_cache.response_key(request, generations)
+                data = None if skips_cache() else await response_cache.backend.aget(key)
+                response_cache.record(data is not None)
+                if data is not None:
+                    return Response(data, status=status.HTTP_200_OK)
+
+                response = await handler(self, request, *args, **kwargs)
+                if response.status_code == 200:
+                    await response_cache.backend.aset(key, response.data, timeout=cache_timeout())
+                return response
+            return async_wrapper
+
+        @wraps(handler)
+        def wrapper(self, request, *args, **kwargs):
+            generations = response_cache.get_generations(get_generations(request, *args, **kwargs))
+            key = response_cache.response_key(request, generations)
+            data = None if skips_cache() else response_cache.backend.get(key)
+            response_cache.record(data is not None)
+            if data is not None:
+                return Response(data, status=status.HTTP_200_OK)
+
+            response = handler(self, request, *args, **kwargs)
+            if response.status_code == 200:
+                response_cache.backend.set(key, response.data, timeout=cache_timeout())
+            return response
+        return wrapper
+    return decorator
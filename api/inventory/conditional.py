@@ -0,0 +1,90 @@
+from functools import wraps
+from inspect import iscoroutinefunction
+
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.cache import get_conditional_response, patch_cache_control
+
+from backend.routers import primary_reads, reading_from_replica
+from .models import TableVersion
+
+# Responses are for an authenticated caller, so only their client may keep
+# a copy, and it must revalidate it on every use, which costs a single version
+# lookup when nothing has changed. There is no Last-Modified: it has one-second
+# resolution, so a write in the same second as a read would still get a 304.
+CACHE_CONTROL = {'private': True, 'max_age': 0, 'must_revalidate': True}
+
+
+def version_rows(models, using=None):
+    names = sorted(model._meta.label_lower for model in models)
+    return names, TableVersion.objects.using(using).filter(name__in=names).values_list('name', 'version')
+
+
+def build_etag(names, rows):
+    versions = dict(rows)
+    return '"%s"' % '.'.join(str(versions.get(name, 0)) for name in names)
+
+
+def get_etag(models, using=DEFAULT_DB_ALIAS):
+    # Validators always come from the primary, so a lagging replica can
+    # never answer 304 for rows that have changed since
+    names, rows = version_rows(models, using)
+    return build_etag(names, rows)
+
+
+async def aget_etag(models, using=DEFAULT_DB_ALIAS):
+    names, rows = version_rows(models, using)
+    return build_etag(names, [row async for row in rows])
+
+
+def tag_response(response, etag):
+    if response.status_code == 200:
+        response.headers['ETag'] = etag
+    patch_cache_control(response, **CACHE_CONTROL)
+    return response
+
+
+def conditional_get(*models):
+    """
+    Decorator for APIView.get handlers whose output only depends on the
+    given models. Answers If-None-Match with a 304 before the handler
+    runs, and tags fresh responses with an ETag built from the models'
+    TableVersion counters.
+    Works on sync and async handlers.
+
+    Under replica_reads (applied outside this one) a handler whose replica
+    is behind the primary on these tables runs on the primary instead, so a
+    response never carries a newer ETag than its body.
+    """
+    def decorator(handler):
+        if iscoroutinefunction(handler):
+            @wraps(handler)
+            async def async_wrapper(self, request, *args, **kwargs):
+                etag = await aget_etag(models)
+                response = get_conditional_response(request, etag=etag)
+                if response is None:
+                    if reading_from_replica() and await aget_etag(models, using=None) != etag:
+                        with primary_reads():
+                            response = await handler(self, request, *args, **kwargs)
+                    else:
+                        response = await handler(self, request, *args, **kwargs)
+                    if response.status_code != 200:
+                        return response
+                return tag_response(response, etag)
+            return async_wrapper
+
+        @wraps(handler)
+        def wrapper(self, request, *args, **kwargs):
+            etag = get_etag(models)
+            response = get_conditional_response(request, etag=etag)
+            if response is None:
+                if reading_from_replica() and get_etag(models, using=None) != etag:
+                    # The replica has not caught up with these tables yet
+                    with primary_reads():
+                        response = handler(self, request, *args, **kwargs)
+                else:
+                    response = handler(self, request, *args, **kwargs)
+                if response.status_code != 200:
+                    return response
+            return tag_response(response, etag)
+        return wrapper
+    return decorator
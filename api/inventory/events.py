@@ -0,0 +1,180 @@
+import asyncio
+import itertools
+import json
+import threading
+import time
+from collections import deque
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+
+ITEM = 'item'
+REQUEST = 'request'
+RESET = 'reset'
+CREATED = 'created'
+UPDATED = 'updated'
+DELETED = 'deleted'
+
+# Item fields reported in change events, by attribute name -> API name
+EVENT_FIELDS = {
+    'name': 'name',
+    'category_id': 'category',
+    'quantity': 'quantity',
+    'price': 'price',
+    'recommended_quantity': 'recommended_quantity',
+    'warning_quantity': 'warning_quantity',
+}
+
+
+def changed_fields(previous, item):
+    """API names of the EVENT_FIELDS that differ between a previous values() row and item."""
+    changed = []
+    for attname, name in EVENT_FIELDS.items():
+        old, new = previous.get(attname), getattr(item, attname)
+        if attname == 'price' and old is not None and new is not None:
+            # Assigned prices may still be strings
+            old, new = Decimal(str(old)), Decimal(str(new))
+        if old != new:
+            changed.append(name)
+    return changed
+
+
+def format_event(event_id, event_type, data):
+    payload = json.dumps(data, separators=(',', ':'))
+    return f'id: {event_id}\nevent: {event_type}\ndata: {payload}\n\n'.encode()
+
+
+class EventHub:
+    """
+    In-process fan-out of inventory change events to server-sent event
+    streams. Published events are kept in a ring buffer of buffer_size so a
+    reconnecting client can resume from its Last-Event-ID. Ids are
+    '<epoch>-<sequence>', the epoch changing with every process start, so a
+    client whose id is unknown here (another process, a restart, or fallen
+    out of the buffer) is sent a reset event and should reload its lists.
+
+    Waiting streams cost no work until something is published: sync
+    generators block on a Condition, async ones await an asyncio.Event that
+    publish() sets on their loop.
+    """
+    retry_ms = 3000
+
+    def __init__(self, buffer_size=1000, heartbeat=15):
+        self.heartbeat = heartbeat
+        self.epoch = format(int(time.time() * 1000), 'x')
+        self.sequence = 0
+        self.events = deque(maxlen=buffer_size)
+        self.condition = threading.Condition()
+        self.waiters = set()
+
+    def publish(self, event_type, data):
+        with self.condition:
+            self.sequence += 1
+            self.events.append((self.sequence, format_event(f'{self.epoch}-{self.sequence}', event_type, data)))
+            self.condition.notify_all()
+            waiters = list(self.waiters)
+        for loop, waiter in waiters:
+            loop.call_soon_threadsafe(waiter.set)
+
+    def resume_point(self, last_event_id):
+        """Sequence to continue after, or None when the client has missed events."""
+        with self.condition:
+            if not last_event_id:
+                return self.sequence
+            epoch, _, sequence = last_event_id.partition('-')
+            if epoch != self.epoch or not sequence.isdigit():
+                return None
+            sequence = int(sequence)
+            oldest = self.events[0][0] if self.events else self.sequence + 1
+            if sequence > self.sequence or sequence < oldest - 1:
+                return None
+            return sequence
+
+    def since(self, sequence):
+        """(last sequence, bytes to send) for events after sequence; call with the condition held."""
+        if not self.events or sequence >= self.sequence:
+            return sequence, None
+        # Sequences are contiguous, so the first new event's offset is known
+        oldest = self.events[0][0]
+        pending = list(itertools.islice(self.events, max(0, sequence - oldest + 1), None))
+        payload = b''.join(message for _, message in pending)
+        if sequence < oldest - 1:
+            # A slow reader fell behind the buffer
+            payload = format_event(f'{self.epoch}-{sequence}', RESET, {}) + payload
+        return pending[-1][0], payload
+
+    def opening(self, last_event_id):
+        sequence = self.resume_point(last_event_id)
+        opening = f'retry: {self.retry_ms}\n\n'.encode()
+        if sequence is None:
+            with self.condition:
+                sequence = self.sequence
+            opening += format_event(f'{self.epoch}-{sequence}', RESET, {})
+        return sequence, opening
+
+    def stream(self, last_event_id=None):
+        """Event stream for WSGI; holds a worker thread for as long as the client stays."""
+        sequence, opening = self.opening(last_event_id)
+        yield opening
+        while True:
+            with self.condition:
+                sequence, payload = self.since(sequence)
+                if payload is None:
+                    self.condition.wait(self.heartbeat)
+                    sequence, payload = self.since(sequence)
+            yield payload or b': keep-alive\n\n'
+
+    async def astream(self, last_event_id=None):
+        """Event stream for ASGI; an idle client is one suspended coroutine."""
+        sequence, opening = self.opening(last_event_id)
+        yield opening
+        waiter = asyncio.Event()
+        entry = (asyncio.get_running_loop(), waiter)
+        try:
+            while True:
+                with self.condition:
+                    sequence, payload = self.since(sequence)
+                    if payload is None:
+                        waiter.clear()
+                        self.waiters.add(entry)
+                if payload is None:
+                    try:
+                        await asyncio.wait_for(waiter.wait(), self.heartbeat)
+                    except asyncio.TimeoutError:
+                        pass
+                    with self.condition:
+                        self.waiters.discard(entry)
+                        sequence, payload = self.since(sequence)
+                yield payload or b': keep-alive\n\n'
+        finally:
+            with self.condition:
+                self.waiters.discard(entry)
+
+
+event_hub = EventHub(buffer_size=settings.INVENTORY_EVENTS_BUFFER, heartbeat=settings.INVENTORY_EVENTS_HEARTBEAT)
+
+
+def publish_on_commit(event_type, data):
+    transaction.on_commit(lambda: event_hub.publish(event_type, data))
+
+
+def item_changed(item_id, action, fields=None, quantity=None):
+    """
+    Publish an item event once the transaction commits. fields is None when
+    the writer does not know which fields changed; clients refetch the item.
+    """
+    data = {'id': item_id, 'action': action}
+    if action != DELETED:
+        data['fields'] = fields
+        data['quantity'] = quantity
+    publish_on_commit(ITEM, data)
+
+
+def request_changed(request_id, item_id, action, request_status):
+    publish_on_commit(REQUEST, {'id': request_id, 'item': item_id, 'action': action, 'status': request_status})
+
+
+def items_reloaded():
+    """For writes too large to describe item by item; clients reload their lists."""
+    publish_on_commit(RESET, {})
@@ -0,0 +1,68 @@
+from rest_framework import serializers
+
+from backend.timing import timed_serializer
+from .serializers import InventoryItemSerializer, CategorySerializer, InventoryUpdateRequestSerializer
+
+
+class ValuesSerializer:
+    """
+    Read-only list serializer that renders rows fetched with .values()
+    instead of model instances. Field names and order come from the wrapped
+    ModelSerializer, and fields whose representation is not the raw database
+    value (decimals, datetimes) reuse that serializer's own field, so the
+    rendered JSON matches serializer_class(..., many=True).data exactly.
+    """
+    serializer_class = None
+    # Output field name -> .values() lookup, for fields that follow a relation
+    sources = {}
+    converted_fields = (serializers.DecimalField, serializers.DateTimeField, serializers.DateField)
+
+    _converters = None
+
+    @classmethod
+    def get_converters(cls):
+        if cls._converters is None:
+            fields = cls.serializer_class().fields
+            converters = []
+            for name, field in fields.items():
+                convert = field.to_representation if isinstance(field, cls.converted_fields) else None
+                converters.append((name, cls.sources.get(name, name), convert))
+            cls._converters = converters
+        return cls._converters
+
+    @classmethod
+    def get_values(cls, queryset):
+        return queryset.values(*[lookup for _, lookup, _ in cls.get_converters()])
+
+    @classmethod
+    def to_representation(cls, row):
+        data = {}
+        for name, lookup, convert in cls.get_converters():
+            value = row[lookup]
+            data[name] = convert(value) if convert is not None and value is not None else value
+        return data
+
+    @classmethod
+    @timed_serializer
+    def serialize(cls, rows):
+        return [cls.to_representation(row) for row in rows]
+
+
+class InventoryItemValuesSerializer(ValuesSerializer):
+    serializer_class = InventoryItemSerializer
+    sources = {'category': 'category__name'}
+
+
+class CategoryValuesSerializer(ValuesSerializer):
+    serializer_class = CategorySerializer
+
+
+class InventoryUpdateRequestValuesSerializer(ValuesSerializer):
+    serializer_class = InventoryUpdateRequestSerializer
+    sources = {
+        'item': 'item_id',
+        'submitted_by_username': 'submitted_by__email',
+        'submitted_by_first_name': 'submitted_by__first_name',
+        'submitted_by_last_name': 'submitted_by__last_name',
+        'approved_by': 'approved_by__email',
+    }
@@ -0,0 +1,28 @@
+from rest_framework.exceptions import ValidationError
+
+ITEM_ORDERINGS = ['name', '-name', 'last_updated', '-last_updated']
+TRUE_VALUES = {'1', 'true', 'yes', 'on'}
+
+
+def get_item_ordering(request, default=None):
+    ordering = request.query_params.get('ordering', default)
+    if ordering is not None and ordering not in ITEM_ORDERINGS:
+        raise ValidationError({'ordering': f"Must be one of: {', '.join(ITEM_ORDERINGS)}."})
+    return ordering
+
+
+def filter_items(queryset, request):
+    params = request.query_params
+
+    category = params.get('category')
+    if category:
+        queryset = queryset.filter(category__name=category)
+
+    search = params.get('search', '').strip()
+    if search:
+        queryset = queryset.filter(name__icontains=search)
+
+    if params.get('low_stock', '').lower() in TRUE_VALUES:
+        queryset = queryset.low_stock()
+
+    return queryset
@@ -0,0 +1,170 @@
+import math
+from statistics import NormalDist
+
+import numpy as np
+from django.db import transaction
+from django.db.models import FloatField, Func
+from django.utils import timezone
+
+from . import events
+from .models import Category, InventoryItem, InventoryUpdateRequest
+from .services import items_changed
+from .summary import apply_item_changes, current_stock_rows
+
+HISTORY_DTYPE = np.dtype([('item', np.int64), ('day', np.float64), ('quantity', np.int64)])
+
+
+class EpochDays(Func):
+    """A datetime column as fractional days since 1970-01-01 UTC."""
+    template = 'EXTRACT(EPOCH FROM %(expressions)s) / 86400.0'
+    output_field = FloatField()
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        return self.as_sql(compiler, connection, template='(julianday(%(expressions)s) - 2440587.5)', **extra_context)
+
+
+class ReorderForecaster:
+    """
+    Suggests warning and recommended quantities from approved update
+    requests. Each approval records a counted stock level, so a drop
+    between two approvals for an item is consumption over that interval;
+    rises are restocks, which hide consumption, and are left out.
+
+    Per item this gives a daily depletion rate (units used over days
+    observed) and its variability (the duration-weighted standard deviation
+    of the per-interval rates). Then, with the usual reorder point formula:
+
+        warning     = rate * lead_time_days + z * std * sqrt(lead_time_days)
+        recommended = warning + rate * review_days
+
+    z comes from service_level. The history is read in one query into NumPy
+    arrays and every item is computed at once with grouped reductions, so
+    the cost is a few passes over the arrays whatever the item count.
+    """
+
+    def __init__(self, lead_time_days=7, review_days=14, service_level=0.95, min_intervals=3, chunk_size=5000):
+        self.lead_time_days = lead_time_days
+        self.review_days = review_days
+        self.z = NormalDist().inv_cdf(service_level)
+        self.min_intervals = min_intervals
+        self.chunk_size = chunk_size
+
+    def load_history(self):
+        rows = (
+            InventoryUpdateRequest.objects
+            .filter(status='approved', approved_at__isnull=False)
+            .annotate(day=EpochDays('approved_at'))
+            .values_list('item_id', 'day', 'requested_quantity')
+        )
+        # Sorting here is cheaper than an ORDER BY the database cannot serve from an index
+        return np.fromiter(rows.iterator(chunk_size=20000), dtype=HISTORY_DTYPE)
+
+    def compute(self, history):
+        """
+        Suggestions for every item with enough usable history, as a dict of
+        equal-length arrays: item, rate, std, warning, recommended.
+        """
+        empty = {
+            'item': np.empty(0, np.int64), 'rate': np.empty(0), 'std': np.empty(0),
+            'warning': np.empty(0, np.int64), 'recommended': np.empty(0, np.int64),
+        }
+        if len(history) < 2:
+            return empty
+
+        # One int64 key per row, item id above second-resolution time: it
+        # sorts several times faster than np.lexsort over the two columns, and
+        # both columns come back out of it, so only quantity is gathered
+        seconds = np.round((history['day'] - history['day'].min()) * 86400).astype(np.int64)
+        key = (history['item'] << 32) | seconds
+        quantities = history['quantity']
+        if np.any(key[1:] < key[:-1]):
+            order = np.argsort(key)
+            key, quantities = key[order], quantities[order]
+        items = key >> 32
+        days = (key & 0xFFFFFFFF) / 86400
+
+        # Rows are grouped by item now, so group numbers are a running count of item boundaries
+        starts = np.empty(len(items), dtype=bool)
+        starts[0] = True
+        np.not_equal(items[1:], items[:-1], out=starts[1:])
+        group_ids = items[starts]
+        row_group = np.cumsum(starts) - 1
+        count = len(group_ids)
+
+        # Consecutive approvals of the same item make an interval
+        elapsed = np.diff(days)
+        used = quantities[:-1] - quantities[1:]
+        usable = ~starts[1:] & (elapsed > 0) & (used >= 0)
+        group = row_group[1:][usable]
+        elapsed, used = elapsed[usable], used[usable]
+
+        intervals = np.bincount(group, minlength=count)
+        # Items without a usable interval are dropped by keep below
+        observed_days = np.maximum(np.bincount(group, weights=elapsed, minlength=count), 1e-9)
+        rate = np.bincount(group, weights=used, minlength=count) / observed_days
+        variance = np.bincount(group, weights=elapsed * (used / elapsed - rate[group]) ** 2, minlength=count) / observed_days
+        std = np.sqrt(variance)
+
+        warning = np.ceil(rate * self.lead_time_days + self.z * std * math.sqrt(self.lead_time_days))
+        recommended = np.maximum(np.ceil(warning + rate * self.review_days), warning)
+        # Items never drawn down keep their hand-set levels rather than dropping to zero
+        keep = (intervals >= self.min_intervals) & (rate > 0)
+        return {
+            'item': group_ids[keep],
+            'rate': rate[keep],
+            'std': std[keep],
+            'warning': warning[keep].astype(np.int64),
+            'recommended': recommended[keep].astype(np.int64),
+        }
+
+    def apply(self, suggestions):
+        """Write suggestions that differ from the stored levels; returns how many items changed."""
+        levels = dict(zip(
+            suggestions['item'].tolist(),
+            zip(suggestions['warning'].tolist(), suggestions['recommended'].tolist()),
+        ))
+        item_ids = sorted(levels)
+        updated = 0
+        for start in range(0, len(item_ids), self.chunk_size):
+            updated += self.apply_chunk(item_ids[start:start + self.chunk_size], levels)
+        if updated:
+            events.items_reloaded()
+        return updated
+
+    def apply_chunk(self, item_ids, levels):
+        now = timezone.now()
+        with transaction.atomic():
+            previous = current_stock_rows(item_ids)
+            changed = [
+                InventoryItem(id=item_id, warning_quantity=levels[item_id][0], recommended_quantity=levels[item_id][1], last_updated=now)
+                for item_id, row in previous.items()
+                if (row['warning_quantity'], row['recommended_quantity']) != levels[item_id]
+            ]
+            if not changed:
+                return 0
+            InventoryItem.objects.bulk_update(changed, ['warning_quantity', 'recommended_quantity', 'last_updated'], batch_size=1000)
+            # Thresholds decide low and critical stock, so the summary counters move too
+            apply_item_changes(
+                (previous[item.id], dict(previous[item.id], warning_quantity=item.warning_quantity,
+                                         recommended_quantity=item.recommended_quantity))
+                for item in changed
+            )
+            category_ids = set(previous[item.id]['category_id'] for item in changed)
+            items_changed([item.id for item in changed], Category.objects.filter(id__in=category_ids).values_list('name', flat=True))
+        return len(changed)
+
+    def run(self, dry_run=False):
+        suggestions = self.compute(self.load_history())
+        updated = 0 if dry_run else self.apply(suggestions)
+        return suggestions, updated
+
+
+def suggestion_rows(suggestions, limit=None):
+    """The first limit suggestions as plain dicts, for responses and command output."""
+    columns = {name: values[:limit].tolist() for name, values in suggestions.items()}
+    return [
+        {'item': item, 'rate': round(rate, 3), 'std': round(std, 3), 'warning_quantity': warning, 'recommended_quantity': recommended}
+        for item, rate, std, warning, recommended in zip(
+            columns['item'], columns['rate'], columns['std'], columns['warning'], columns['recommended'],
+        )
+    ]
@@ -0,0 +1,144 @@
+import contextvars
+from collections import defaultdict
+from contextlib import contextmanager
+
+from django.db import connection, transaction
+from django.db.models import Count, Q, Sum, Value
+from django.db.models.functions import Abs, Coalesce, TruncDay, TruncHour
+from django.utils import timezone
+
+from .models import StockMovement, StockRollup
+
+ROLLUP_COUNTERS = ['quantity_in', 'quantity_out', 'net_change', 'movement_count']
+TRUNCATE = {StockRollup.HOUR: TruncHour, StockRollup.DAY: TruncDay}
+UPSERT_BATCH = 500
+
+_source = contextvars.ContextVar('stock_movement_source', default=(StockMovement.OTHER, None))
+
+
+@contextmanager
+def movement_source(source, actor=None):
+    """Attribute quantity changes saved inside the block, through the item signals, to source and actor."""
+    token = _source.set((source, actor))
+    try:
+        yield
+    finally:
+        _source.reset(token)
+
+
+def bucket_start(moment, period):
+    # Buckets follow the current time zone, as TruncHour and TruncDay do
+    moment = timezone.localtime(moment)
+    if period == StockRollup.HOUR:
+        return moment.replace(minute=0, second=0, microsecond=0)
+    return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def movement(item_id, before, after, source, actor=None, update_request_id=None, created_at=None):
+    """An unsaved StockMovement, or None when the quantity did not change."""
+    before = int(before or 0)
+    after = int(after)
+    if before == after:
+        return None
+    return StockMovement(
+        item_id=item_id, quantity_before=before, quantity_after=after, delta=after - before,
+        source=source, actor_id=getattr(actor, 'pk', actor), update_request_id=update_request_id,
+        created_at=created_at or timezone.now(),
+    )
+
+
+def record_movements(movements):
+    """
+    Append movements to the ledger and add them to the rollups. Call inside
+    the transaction that changed the quantities; None entries are skipped.
+    """
+    movements = [entry for entry in movements if entry is not None]
+    if not movements:
+        return []
+    StockMovement.objects.bulk_create(movements)
+    add_to_rollups(movements)
+    return movements
+
+
+def record_change(item_id, before, after):
+    """Record one change using the source and actor set by movement_source()."""
+    source, actor = _source.get()
+    return record_movements([movement(item_id, before, after, source, actor)])
+
+
+def add_to_rollups(movements):
+    totals = defaultdict(lambda: dict.fromkeys(ROLLUP_COUNTERS, 0))
+    for entry in movements:
+        for period in TRUNCATE:
+            counters = totals[(period, entry.item_id, bucket_start(entry.created_at, period))]
+            counters['quantity_in'] += max(entry.delta, 0)
+            counters['quantity_out'] += max(-entry.delta, 0)
+            counters['net_change'] += entry.delta
+            counters['movement_count'] += 1
+    # A fixed order keeps concurrent transactions from deadlocking on rows
+    upsert_rollups(sorted(totals.items()))
+
+
+def upsert_rollups(rows):
+    """
+    INSERT ... ON CONFLICT DO UPDATE SET counter = counter + excluded.counter,
+    so concurrent writers add to a bucket without reading it first. SQLite
+    and Postgres share the syntax.
+    """
+    table = connection.ops.quote_name(StockRollup._meta.db_table)
+    columns = ['period', 'item_id', 'bucket_start'] + ROLLUP_COUNTERS
+    quoted = [connection.ops.quote_name(column) for column in columns]
+    updates = ', '.join(f'{column} = {table}.{column} + excluded.{column}' for column in quoted[3:])
+    placeholders = f"({', '.join(['%s'] * len(columns))})"
+    with connection.cursor() as cursor:
+        for start in range(0, len(rows), UPSERT_BATCH):
+            batch = rows[start:start + UPSERT_BATCH]
+            params = []
+            for (period, item_id, bucket), counters in batch:
+                params.extend([period, item_id, connection.ops.adapt_datetimefield_value(bucket)])
+                params.extend(counters[name] for name in ROLLUP_COUNTERS)
+            cursor.execute(
+                f"INSERT INTO {table} ({', '.join(quoted)}) VALUES {', '.join([placeholders] * len(batch))} "
+                f"ON CONFLICT ({', '.join(quoted[:3])}) DO UPDATE SET {updates}",
+                params,
+            )
+
+
+def compute_rollups(period):
+    """Recompute one period's rollups from the ledger in a single grouped query."""
+    return (
+        StockMovement.objects
+        .annotate(bucket=TRUNCATE[period]('created_at'))
+        .values('item_id', 'bucket')
+        .annotate(
+            quantity_in=Coalesce(Sum('delta', filter=Q(delta__gt=0)), Value(0)),
+            quantity_out=Coalesce(Sum(Abs('delta'), filter=Q(delta__lt=0)), Value(0)),
+            net_change=Sum('delta'),
+            movement_count=Count('id'),
+        )
+        .order_by()
+    )
+
+
+def rebuild():
+    """Replace every rollup row with ones recomputed from the ledger; returns the row count."""
+    with transaction.atomic():
+        StockRollup.objects.all().delete()
+        rollups = [
+            StockRollup(period=period, item_id=row['item_id'], bucket_start=row['bucket'],
+                        **{name: row[name] for name in ROLLUP_COUNTERS})
+            for period in TRUNCATE
+            for row in compute_rollups(period).iterator()
+        ]
+        StockRollup.objects.bulk_create(rollups, batch_size=UPSERT_BATCH)
+    return len(rollups)
+
+
+def usage(item_id, period, since):
+    """Rollup rows for one item from since onwards, oldest first; reads the unique index."""
+    return (
+        StockRollup.objects
+        .filter(period=period, item_id=item_id, bucket_start__gte=bucket_start(since, period))
+        .order_by('bucket_start')
+        .values('bucket_start', *ROLLUP_COUNTERS)
+    )
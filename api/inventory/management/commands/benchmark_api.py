@@ -0,0 +1,116 @@
+import contextlib
+import io
+import json
+import platform
+import sys
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import override_settings
+from django.utils import timezone
+
+from inventory.benchmark import SKIPPED_ROUTES, ApiBenchmark, compare
+from inventory.seed import InventorySeeder
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed a throwaway copy of the database and time every API route in backend/urls.py: '
+        'p50/p95/p99 latency, throughput, queries per request and peak memory per request. '
+        'Runs on whichever backend DATABASES points at, SQLite or Postgres. --json writes the '
+        'results for --compare to diff against in a later run.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--categories', type=int, default=50)
+        parser.add_argument('--users', type=int, default=50)
+        parser.add_argument('--items', type=int, default=10000)
+        parser.add_argument('--update-requests', type=int, default=20000)
+        parser.add_argument('--iterations', type=int, default=50, help='Timed requests per scenario.')
+        parser.add_argument('--warmup', type=int, default=3, help='Untimed requests per scenario first.')
+        parser.add_argument('--only', default='', help='Comma separated route names to run.')
+        parser.add_argument('--no-cache', action='store_true', help='Leave the response cache out, so every read hits the database.')
+        parser.add_argument('--label', default='', help='Stored with the JSON results, e.g. a release tag.')
+        parser.add_argument('--json', dest='json_path', help='Write the results to this file.')
+        parser.add_argument('--compare', dest='baseline_path', help='A previous --json file to compare against.')
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options['baseline_path']:
+            try:
+                with open(options['baseline_path']) as baseline_file:
+                    baseline = json.load(baseline_file)
+            except (OSError, ValueError) as error:
+                raise CommandError(f'Cannot read {options["baseline_path"]}: {error}')
+
+        benchmark = ApiBenchmark(
+            iterations=options['iterations'], warmup=options['warmup'],
+            only=[name for name in options['only'].split(',') if name],
+            log=self.stdout.write if options['verbosity'] > 1 else None,
+        )
+        missing = benchmark.coverage()
+        if missing:
+            self.stderr.write(self.style.WARNING(f"No benchmark scenario for: {', '.join(missing)}"))
+        for name, reason in SKIPPED_ROUTES.items():
+            self.stdout.write(f'Skipping {name}: {reason}')
+
+        caches = {}
+        if options['no_cache']:
+            caches = {'CACHES': {
+                'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+                'inventory': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'},
+            }}
+        seed_counts = {
+            'categories': options['categories'], 'users': options['users'],
+            'items': options['items'], 'requests': options['update_requests'],
+        }
+
+        # Work on the test database so the real one is never touched
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            InventorySeeder(**seed_counts).run()
+            vendor = connection.vendor
+            # Keeps print() calls in views out of the report; self.stdout still writes to the terminal
+            with override_settings(**caches), contextlib.redirect_stdout(io.StringIO()):
+                results = benchmark.run()
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        self.print_results(results, baseline)
+        if options['json_path']:
+            report = {
+                'label': options['label'],
+                'created_at': timezone.now().isoformat(),
+                'database': vendor,
+                'django': django.get_version(),
+                'python': platform.python_version(),
+                'platform': sys.platform,
+                'seed': seed_counts,
+                'iterations': options['iterations'],
+                'response_cache': not options['no_cache'],
+                'results': results,
+            }
+            with open(options['json_path'], 'w') as report_file:
+                json.dump(report, report_file, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Wrote {len(results)} results to {options['json_path']}."))
+
+    def print_results(self, results, baseline):
+        header = f"{'route':<32}{'method':<7}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'req/s':>9}{'queries':>9}{'peak KB':>10}{'errors':>8}"
+        if baseline:
+            header += f"{'p95 vs base':>13}{'queries vs base':>17}"
+        self.stdout.write(header)
+        pairs = compare(baseline, results) if baseline else [(result, None) for result in results]
+        for result, previous in pairs:
+            line = (
+                f"{result['route']:<32}{result['method']:<7}{result['p50_ms']:>9.2f}{result['p95_ms']:>9.2f}"
+                f"{result['p99_ms']:>9.2f}{result['throughput_rps']:>9.1f}{result['queries_per_request']:>9.1f}"
+                f"{result['peak_memory_kb']:>10.1f}{result['errors']:>8}"
+            )
+            if previous:
+                change = (result['p95_ms'] - previous['p95_ms']) / previous['p95_ms'] * 100 if previous['p95_ms'] else 0
+                line += f"{change:>+12.0f}%{result['queries_per_request'] - previous['queries_per_request']:>+17.1f}"
+            elif baseline:
+                line += f"{'new':>13}"
+            self.stdout.write(line)
@@ -0,0 +1,44 @@
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from inventory.forecast import HISTORY_DTYPE, ReorderForecaster
+
+
+class Command(BaseCommand):
+    help = (
+        'Time the reorder forecast without a database: generate approval history for synthetic '
+        'items, a stock count every few days with periodic restocks, and compute every item at once.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--items', type=int, default=100000)
+        parser.add_argument('--days', type=int, default=730)
+        parser.add_argument('--every', type=float, default=3, help='Mean days between approvals per item.')
+
+    def handle(self, *args, **options):
+        rng = np.random.default_rng(0)
+        items, days = options['items'], options['days']
+        per_item = max(int(days / options['every']), 2)
+
+        start = time.perf_counter()
+        history = np.empty(items * per_item, dtype=HISTORY_DTYPE)
+        history['item'] = np.repeat(np.arange(1, items + 1), per_item)
+        history['day'] = np.sort(rng.uniform(0, days, (items, per_item)), axis=1).ravel()
+        usage = rng.gamma(2.0, rng.uniform(0.5, 20, items)[:, None] / 2, (items, per_item))
+        stock = 1000 - np.cumsum(usage, axis=1)
+        # Restock back to the top whenever a count falls below a quarter
+        history['quantity'] = (np.mod(stock, 750) + 250).astype(np.int64).ravel()
+        # Arrive in database order, not sorted
+        history = history[rng.permutation(len(history))]
+        self.stdout.write(f'Generated {len(history):,} approvals for {items:,} items in {time.perf_counter() - start:.1f}s')
+
+        forecaster = ReorderForecaster()
+        timings = []
+        for _ in range(3):
+            start = time.perf_counter()
+            suggestions = forecaster.compute(history)
+            timings.append(time.perf_counter() - start)
+        self.stdout.write(f"{'items forecast':<18}{'best s':>10}{'worst s':>10}")
+        self.stdout.write(f"{len(suggestions['item']):<18,}{min(timings):>10.2f}{max(timings):>10.2f}")
@@ -0,0 +1,119 @@
+import random
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection, models
+from django.utils import timezone
+
+from inventory.models import Category, InventoryItem, InventoryUpdateRequest
+from inventory.seed import explicit_timestamps
+from user_authentication.models import User
+
+# Indexes added for the hot query shapes, dropped again for the "before" run
+HOT_PATH_INDEXES = [
+    (InventoryItem, 'inventory_item_low_stock_idx'),
+    (InventoryUpdateRequest, 'inventory_request_status_idx'),
+    (InventoryUpdateRequest, 'inventory_request_pending_idx'),
+]
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed a throwaway copy of the database and show EXPLAIN plans and timings '
+        'for the hot inventory queries with and without their indexes.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--items', type=int, default=50000)
+        parser.add_argument('--requests', type=int, default=100000)
+        parser.add_argument('--categories', type=int, default=500)
+        parser.add_argument('--repeat', type=int, default=5, help='Runs per query; the best run is reported.')
+
+    def handle(self, *args, **options):
+        # Work on the test database so the real one is never touched
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            self.seed(options['items'], options['requests'], options['categories'])
+            self.lookup_name = f"Category {options['categories'] // 2}"
+            after = self.measure(options['repeat'])
+            self.drop_indexes()
+            before = self.measure(options['repeat'])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        for label in after:
+            self.stdout.write(self.style.MIGRATE_HEADING(label))
+            for name, (plan, seconds) in [('before', before[label]), ('after', after[label])]:
+                self.stdout.write(f'  {name}: {seconds * 1000:.3f} ms')
+                for line in plan.splitlines():
+                    self.stdout.write(f'    {line}')
+
+    def queries(self):
+        return {
+            'Pending approval queue, oldest first': (
+                InventoryUpdateRequest.objects.filter(status='pending').order_by('created_at', 'id')[:50]
+            ),
+            'Update requests by status': (
+                InventoryUpdateRequest.objects.filter(status='rejected').order_by('created_at')[:50]
+            ),
+            'Category lookup by name': Category.objects.filter(name=self.lookup_name),
+            'Low-stock items, first page': InventoryItem.objects.low_stock().order_by('name', 'id')[:50],
+            'All low-stock item ids': InventoryItem.objects.low_stock().values('id'),
+        }
+
+    def measure(self, repeat):
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+        results = {}
+        for label, queryset in self.queries().items():
+            plan = queryset.explain()
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                list(queryset.all())
+                timings.append(time.perf_counter() - start)
+            results[label] = (plan, min(timings))
+        return results
+
+    def drop_indexes(self):
+        name_field = Category._meta.get_field('name')
+        _, path, args, kwargs = name_field.deconstruct()
+        kwargs['unique'] = False
+        plain_name_field = models.CharField(*args, **kwargs)
+        plain_name_field.set_attributes_from_name('name')
+        plain_name_field.model = Category
+
+        with connection.schema_editor() as editor:
+            for model, index_name in HOT_PATH_INDEXES:
+                index = next(index for index in model._meta.indexes if index.name == index_name)
+                editor.remove_index(model, index)
+            editor.alter_field(Category, name_field, plain_name_field)
+
+    def seed(self, item_count, request_count, category_count):
+        rng = random.Random(42)
+        user = User(email='benchmark@example.com', first_name='Bench', last_name='Mark')
+        user.set_unusable_password()
+        user.save()
+        categories = Category.objects.bulk_create([Category(name=f'Category {i}') for i in range(category_count)])
+        items = InventoryItem.objects.bulk_create([
+            InventoryItem(
+                name=f'Item {i}', quantity=rng.randrange(200), price='1.00',
+                category=categories[i % category_count], recommended_quantity=60, warning_quantity=20,
+            )
+            for i in range(item_count)
+        ], batch_size=5000)
+        now = timezone.now()
+        statuses = ['approved'] * 90 + ['rejected'] * 8 + ['pending'] * 2
+        # Spread over 30 days, so the created_at orderings have real work to do
+        with explicit_timestamps(InventoryUpdateRequest, 'created_at'):
+            InventoryUpdateRequest.objects.bulk_create([
+                InventoryUpdateRequest(
+                    item=items[rng.randrange(item_count)], requested_quantity=rng.randrange(100),
+                    submitted_by=user, status=rng.choice(statuses),
+                    created_at=now - timedelta(seconds=rng.randrange(30 * 86400)),
+                )
+                for _ in range(request_count)
+            ], batch_size=5000)
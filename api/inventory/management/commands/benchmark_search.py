@@ -0,0 +1,47 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+
+from inventory.search import TrigramIndex
+from inventory.seed import WORDS
+
+
+class Command(BaseCommand):
+    help = (
+        'Time the in-process trigram index used for name search without a database: build it '
+        'over synthetic item names, then run prefix, typo and multi-word queries against it.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--items', type=int, default=500000)
+        parser.add_argument('--queries', type=int, default=200)
+        parser.add_argument('--limit', type=int, default=10)
+
+    def handle(self, *args, **options):
+        rng = random.Random(0)
+        names = [
+            f"{' '.join(rng.sample(WORDS, rng.randint(2, 4)))} {rng.randint(1, 999)}".title()
+            for _ in range(options['items'])
+        ]
+        index = TrigramIndex()
+        start = time.perf_counter()
+        index.load(enumerate(names))
+        self.stdout.write(f"Built index over {len(names):,} names in {time.perf_counter() - start:.1f}s")
+
+        kinds = {
+            'prefix': lambda word: word[:max(3, len(word) - 2)],
+            'typo': lambda word: word[:2] + word[3] + word[2] + word[4:] if len(word) > 4 else word + 'e',
+            'two words': lambda word: f'{word} {rng.choice(WORDS)}',
+        }
+        self.stdout.write(f"{'query':<12}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}")
+        for kind, make in kinds.items():
+            timings = []
+            for _ in range(options['queries']):
+                query = make(rng.choice(WORDS))
+                start = time.perf_counter()
+                index.search(query, options['limit'])
+                timings.append((time.perf_counter() - start) * 1000)
+            p95 = statistics.quantiles(timings, n=20)[-1]
+            self.stdout.write(f'{kind:<12}{statistics.median(timings):>10.2f}{p95:>10.2f}{max(timings):>10.2f}')
@@ -0,0 +1,69 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from inventory.fast_serializers import (
+    InventoryItemValuesSerializer, CategoryValuesSerializer, InventoryUpdateRequestValuesSerializer
+)
+from inventory.models import Category, InventoryItem, InventoryUpdateRequest
+from inventory.serializers import InventoryItemSerializer, CategorySerializer, InventoryUpdateRequestSerializer
+from user_authentication.models import User
+
+
+class Command(BaseCommand):
+    help = 'Compare list serialization throughput of the ModelSerializer and .values() read paths.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10000, help='Rows to seed for each table.')
+        parser.add_argument('--repeat', type=int, default=3, help='Runs per path; the best run is reported.')
+
+    def handle(self, *args, **options):
+        rows, repeat = options['rows'], options['repeat']
+
+        # Seed inside a transaction that is always rolled back
+        with transaction.atomic():
+            self.seed(rows)
+            cases = [
+                ('items', InventoryItemSerializer, InventoryItem.objects.select_related('category'),
+                 InventoryItemValuesSerializer, InventoryItem.objects.all()),
+                ('categories', CategorySerializer, Category.objects.all(),
+                 CategoryValuesSerializer, Category.objects.all()),
+                ('requests', InventoryUpdateRequestSerializer,
+                 InventoryUpdateRequest.objects.select_related('submitted_by', 'approved_by'),
+                 InventoryUpdateRequestValuesSerializer, InventoryUpdateRequest.objects.all()),
+            ]
+            self.stdout.write(f"{'endpoint':<12}{'rows':>10}{'model rows/s':>16}{'values rows/s':>16}{'speedup':>10}")
+            for name, serializer_class, queryset, values_class, values_queryset in cases:
+                count = queryset.count()
+                model_time = self.best_of(repeat, lambda: serializer_class(queryset.all(), many=True).data)
+                values_time = self.best_of(repeat, lambda: values_class.serialize(values_class.get_values(values_queryset.all())))
+                self.stdout.write(
+                    f'{name:<12}{count:>10}{count / model_time:>16,.0f}{count / values_time:>16,.0f}'
+                    f'{model_time / values_time:>9.1f}x'
+                )
+            transaction.set_rollback(True)
+
+    def best_of(self, repeat, func):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - start)
+        return min(timings)
+
+    def seed(self, rows):
+        user = User(email='benchmark@example.com', first_name='Bench', last_name='Mark', role=User.MANAGER)
+        user.set_unusable_password()
+        user.save()
+        categories = Category.objects.bulk_create([Category(name=f'Benchmark {i}') for i in range(rows)])
+        items = InventoryItem.objects.bulk_create([
+            InventoryItem(name=f'Benchmark item {i}', quantity=i % 50, price='4.25',
+                          category=categories[i % 25], recommended_quantity=30, warning_quantity=10)
+            for i in range(rows)
+        ])
+        InventoryUpdateRequest.objects.bulk_create([
+            InventoryUpdateRequest(item=item, requested_quantity=5, submitted_by=user,
+                                   approved_by=user if i % 2 else None, status='approved' if i % 2 else 'pending')
+            for i, item in enumerate(items)
+        ])
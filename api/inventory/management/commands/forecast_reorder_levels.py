@@ -0,0 +1,51 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from inventory.forecast import ReorderForecaster, suggestion_rows
+
+
+class Command(BaseCommand):
+    help = (
+        'Suggest warning and recommended quantities for every item from its approved update '
+        'requests and write the ones that changed.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lead-time-days', type=float, default=7)
+        parser.add_argument('--review-days', type=float, default=14)
+        parser.add_argument('--service-level', type=float, default=0.95)
+        parser.add_argument('--min-intervals', type=int, default=3)
+        parser.add_argument('--dry-run', action='store_true', help='Print suggestions without writing them.')
+        parser.add_argument('--show', type=int, default=20, help='How many suggestions to print.')
+
+    def handle(self, *args, **options):
+        forecaster = ReorderForecaster(
+            lead_time_days=options['lead_time_days'],
+            review_days=options['review_days'],
+            service_level=options['service_level'],
+            min_intervals=options['min_intervals'],
+        )
+        start = time.perf_counter()
+        history = forecaster.load_history()
+        loaded = time.perf_counter()
+        suggestions = forecaster.compute(history)
+        computed = time.perf_counter()
+        updated = 0 if options['dry_run'] else forecaster.apply(suggestions)
+        written = time.perf_counter()
+
+        self.stdout.write(f"{'item':>10}{'rate/day':>12}{'std':>10}{'warning':>10}{'recommended':>14}")
+        for row in suggestion_rows(suggestions, options['show']):
+            self.stdout.write(
+                f"{row['item']:>10}{row['rate']:>12.3f}{row['std']:>10.3f}"
+                f"{row['warning_quantity']:>10}{row['recommended_quantity']:>14}"
+            )
+        self.stdout.write(
+            f'Loaded {len(history):,} approvals in {loaded - start:.2f}s, '
+            f"forecast {len(suggestions['item']):,} items in {computed - loaded:.2f}s, "
+            f'wrote {updated:,} in {written - computed:.2f}s.'
+        )
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING('Dry run: nothing was written.'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Updated reorder levels on {updated} items.'))
@@ -0,0 +1,46 @@
+import json
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from inventory.bulk_io import ImportFileError, ItemImporter, decode_lines, read_csv, read_ndjson
+
+READERS = {'csv': read_csv, 'ndjson': read_ndjson}
+
+
+class Command(BaseCommand):
+    help = 'Import inventory items from a CSV or NDJSON file, upserting rows that carry an id.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='File to import; use - for stdin.')
+        parser.add_argument('--format', choices=READERS, help='Defaults to the file extension, then csv.')
+        parser.add_argument('--chunk-size', type=int, default=5000)
+        parser.add_argument('--create-categories', action='store_true', help='Create categories that do not exist yet.')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = options['format'] or ('ndjson' if path.endswith(('.ndjson', '.jsonl')) else 'csv')
+        importer = ItemImporter(chunk_size=options['chunk_size'], create_categories=options['create_categories'])
+
+        # Read as bytes and decoded per line, as the upload endpoint does
+        try:
+            if path == '-':
+                result = importer.run(READERS[file_format](decode_lines(sys.stdin.buffer)))
+            else:
+                with open(path, 'rb') as lines:
+                    result = importer.run(READERS[file_format](decode_lines(lines)))
+        except ImportFileError as exc:
+            raise CommandError(
+                f"line {exc.line}: {exc} Created {importer.result['created']}, "
+                f"updated {importer.result['updated']} before it."
+            )
+        except UnicodeDecodeError as exc:
+            raise CommandError(f'The file is not valid UTF-8: {exc}')
+        except OSError as exc:
+            raise CommandError(exc)
+
+        for error in result['errors']:
+            self.stderr.write(f"line {error['line']}: {json.dumps(error['errors'])}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {result['created']}, updated {result['updated']}, skipped {result['failed']} invalid rows."
+        ))
@@ -0,0 +1,145 @@
+import asyncio
+import statistics
+import threading
+import time
+import types
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.backends.signals import connection_created
+from django.test import AsyncClient, Client, override_settings
+from django.urls import path
+
+from inventory.async_views import AsyncInventoryItemAPIView
+from inventory.models import Category, InventoryItem
+from inventory.views import InventoryItemAPIView
+
+ROUTE = 'items/'
+
+
+def urlconf(view):
+    module = types.ModuleType(f'loadtest_urls_{view.__name__}')
+    module.urlpatterns = [path(ROUTE, view.as_view())]
+    return module
+
+
+class Command(BaseCommand):
+    help = (
+        'Load test the item list on a throwaway database and compare how many concurrent '
+        'requests one worker serves: the sync view behind a WSGI thread pool versus the '
+        'async view on an ASGI event loop. Requests go through the full handler and '
+        'middleware stack in-process, so no server or network is involved.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--items', type=int, default=2000)
+        parser.add_argument('--requests', type=int, default=300, help='Requests per run.')
+        parser.add_argument('--concurrency', default='1,10,50', help='Comma separated concurrent client counts.')
+        parser.add_argument('--threads', type=int, default=4, help='Threads per WSGI worker, as with gunicorn --threads.')
+        parser.add_argument(
+            '--query-delay', type=float, default=0,
+            help='Milliseconds added to every query, standing in for the round trip to a remote database.',
+        )
+        parser.add_argument('--query', default='page_size=50', help='Query string for the item list.')
+
+    def handle(self, *args, **options):
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        delay = options['query_delay'] / 1000
+
+        def slow_query(execute, sql, params, many, context):
+            time.sleep(delay)
+            return execute(sql, params, many, context)
+
+        def add_delay(sender, connection, **kwargs):
+            connection.execute_wrappers.append(slow_query)
+
+        if delay:
+            connection_created.connect(add_delay)
+            connection.execute_wrappers.append(slow_query)
+        try:
+            self.seed(options['items'])
+            url = f"/{ROUTE}?{options['query']}"
+            levels = [int(level) for level in options['concurrency'].split(',')]
+            runs = [
+                (f"WSGI, sync view, {options['threads']} threads", lambda c: self.run_wsgi(url, c, options['threads'], options['requests'])),
+                ('ASGI, async view, 1 event loop', lambda c: self.run_asgi(AsyncInventoryItemAPIView, url, c, options['requests'])),
+                ('ASGI, sync view, 1 event loop', lambda c: self.run_asgi(InventoryItemAPIView, url, c, options['requests'])),
+            ]
+            # Leave the response cache out so every request does the database work
+            with override_settings(CACHES={
+                'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+                'inventory': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'},
+            }):
+                results = [(label, level, run(level)) for label, run in runs for level in levels]
+        finally:
+            if delay:
+                connection_created.disconnect(add_delay)
+                connection.execute_wrappers.remove(slow_query)
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        self.stdout.write(f"{'mode':<34} {'clients':>7} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8}")
+        for label, level, (throughput, latencies) in results:
+            p50, p95 = statistics.median(latencies), statistics.quantiles(latencies, n=20)[-1]
+            self.stdout.write(f'{label:<34} {level:>7} {throughput:>8.1f} {p50 * 1000:>8.1f} {p95 * 1000:>8.1f}')
+
+    def seed(self, item_count):
+        categories = Category.objects.bulk_create([Category(name=f'Category {i}') for i in range(20)])
+        InventoryItem.objects.bulk_create([
+            InventoryItem(
+                name=f'Item {i:06}', quantity=i % 40, price='9.99', category=categories[i % len(categories)],
+                recommended_quantity=20, warning_quantity=5,
+            )
+            for i in range(item_count)
+        ])
+
+    def run_wsgi(self, url, clients, threads, total):
+        # Clients beyond the worker's thread count queue for a free thread
+        slots = threading.Semaphore(threads)
+        latencies, lock = [], threading.Lock()
+        remaining = iter(range(total))
+
+        def client_loop():
+            client = Client()
+            while True:
+                with lock:
+                    if next(remaining, None) is None:
+                        return
+                start = time.perf_counter()
+                with slots:
+                    response = client.get(url)
+                elapsed = time.perf_counter() - start
+                assert response.status_code == 200, response.status_code
+                with lock:
+                    latencies.append(elapsed)
+
+        with override_settings(ROOT_URLCONF=urlconf(InventoryItemAPIView)):
+            Client().get(url)
+            started = time.perf_counter()
+            workers = [threading.Thread(target=client_loop) for _ in range(clients)]
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+            return total / (time.perf_counter() - started), latencies
+
+    def run_asgi(self, view, url, clients, total):
+        async def run():
+            latencies = []
+            remaining = iter(range(total))
+
+            async def client_loop():
+                client = AsyncClient()
+                while next(remaining, None) is not None:
+                    start = time.perf_counter()
+                    response = await client.get(url)
+                    assert response.status_code == 200, response.status_code
+                    latencies.append(time.perf_counter() - start)
+
+            await AsyncClient().get(url)
+            started = time.perf_counter()
+            await asyncio.gather(*[client_loop() for _ in range(clients)])
+            return total / (time.perf_counter() - started), latencies
+
+        with override_settings(ROOT_URLCONF=urlconf(view)):
+            return asyncio.run(run())
@@ -0,0 +1,20 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from inventory.models import RequestProfile, SlowQuery
+
+
+class Command(BaseCommand):
+    help = (
+        'Delete slow queries and request profiles older than PROFILING_RETENTION_DAYS. '
+        'Both are written on every slow or profiled request, so run it on a schedule.'
+    )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=settings.PROFILING_RETENTION_DAYS)
+        slow_queries, _ = SlowQuery.objects.filter(created_at__lt=cutoff).delete()
+        profiles, _ = RequestProfile.objects.filter(created_at__lt=cutoff).delete()
+        self.stdout.write(self.style.SUCCESS(f'Purged {slow_queries} slow queries and {profiles} request profiles.'))
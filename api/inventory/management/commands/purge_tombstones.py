@@ -0,0 +1,19 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from inventory.models import InventoryItemTombstone
+
+
+class Command(BaseCommand):
+    help = (
+        'Delete item tombstones older than INVENTORY_TOMBSTONE_DAYS. Delta sync '
+        'cursors from before then are refused, so nothing still needs them.'
+    )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=settings.INVENTORY_TOMBSTONE_DAYS)
+        deleted, _ = InventoryItemTombstone.objects.filter(deleted_at__lt=cutoff).delete()
+        self.stdout.write(self.style.SUCCESS(f'Purged {deleted} item tombstones.'))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from inventory.ledger import rebuild
+
+
+class Command(BaseCommand):
+    help = 'Recompute the hourly and daily stock rollups from the movement ledger.'
+
+    def handle(self, *args, **options):
+        count = rebuild()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {count} stock rollup rows.'))
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from inventory.models import Category
+from inventory.summary import find_drift, rebuild
+
+
+class Command(BaseCommand):
+    help = (
+        'Recompute the per-category stock summary from the items table. '
+        'With --check, only report categories whose stored counters have drifted.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true', help='Report drift and exit non-zero instead of rebuilding.')
+
+    def handle(self, *args, **options):
+        drift = find_drift()
+        if drift:
+            names = dict(Category.objects.filter(id__in=drift).values_list('id', 'name'))
+            for category_id, counters in sorted(drift.items()):
+                details = ', '.join(f'{name} expected {expected} stored {stored}' for name, (expected, stored) in counters.items())
+                self.stderr.write(f'{names.get(category_id, category_id)}: {details}')
+
+        if options['check']:
+            if drift:
+                raise CommandError(f'{len(drift)} categories have drifted; run rebuild_stock_summary to repair them.')
+            self.stdout.write(self.style.SUCCESS('Stock summary is up to date.'))
+            return
+
+        count = rebuild()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt the stock summary for {count} categories ({len(drift)} had drifted).'))
@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from inventory.seed import InventorySeeder
+
+
+class Command(BaseCommand):
+    help = (
+        'Fill the database with synthetic categories, users, items and update requests for '
+        'benchmarks and local testing. Seeded users log in with the password "password123".'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--categories', type=int, default=50)
+        parser.add_argument('--users', type=int, default=50)
+        parser.add_argument('--items', type=int, default=10000)
+        parser.add_argument('--requests', type=int, default=50000)
+        parser.add_argument('--days', type=int, default=730, help='How far back request timestamps go.')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=0, help='Random seed, for repeatable data.')
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        seeder = InventorySeeder(
+            categories=options['categories'], users=options['users'], items=options['items'],
+            requests=options['requests'], days=options['days'], batch_size=options['batch_size'],
+            seed=options['seed'], log=self.stdout.write if options['verbosity'] > 1 else None,
+        )
+        counts = seeder.run()
+        summary = ', '.join(f'{count:,} {name}' for name, count in counts.items())
+        self.stdout.write(self.style.SUCCESS(f'Seeded {summary} in {time.perf_counter() - start:.1f}s.'))
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:18
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def rename_duplicate_categories(apps, schema_editor):
+    # Category.name becomes unique; keep the oldest row's name and tag the rest
+    Category = apps.get_model('inventory', 'Category')
+    seen = set()
+    for category in Category.objects.order_by('id'):
+        if category.name in seen:
+            category.name = f'{category.name[:180]} ({category.id})'
+            category.save(update_fields=['name'])
+        seen.add(category.name)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0007_tableversion'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(rename_duplicate_categories, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='category',
+            name='name',
+            field=models.CharField(max_length=200, unique=True),
+        ),
+        migrations.AddIndex(
+            model_name='inventoryitem',
+            index=models.Index(condition=models.Q(models.Q(('quantity__lte', models.F('warning_quantity')), ('warning_quantity__gt', 0)), models.Q(('quantity__lte', models.F('recommended_quantity')), ('recommended_quantity__gt', 0)), _connector='OR'), fields=['name', 'id'], name='inventory_item_low_stock_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='inventoryupdaterequest',
+            index=models.Index(fields=['status', 'created_at'], name='inventory_request_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='inventoryupdaterequest',
+            index=models.Index(condition=models.Q(('status', 'pending')), fields=['created_at', 'id'], name='inventory_request_pending_idx'),
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:22
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import Count, F, Q, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+# The stock rules as of this migration, spelled out rather than imported
+# from inventory.models, which may change after it
+CRITICAL = Q(inventoryitem__warning_quantity__gt=0, inventoryitem__quantity__lte=F('inventoryitem__warning_quantity'))
+LOW = CRITICAL | Q(inventoryitem__recommended_quantity__gt=0, inventoryitem__quantity__lte=F('inventoryitem__recommended_quantity'))
+OUT_OF_STOCK = Q(inventoryitem__quantity__lte=0)
+
+
+def build_summaries(apps, schema_editor):
+    Category = apps.get_model('inventory', 'Category')
+    CategoryStockSummary = apps.get_model('inventory', 'CategoryStockSummary')
+    value_field = models.DecimalField(max_digits=20, decimal_places=2)
+    rows = Category.objects.annotate(
+        item_count=Count('inventoryitem'),
+        total_quantity=Coalesce(Sum('inventoryitem__quantity'), 0),
+        stock_value=Coalesce(
+            Sum(F('inventoryitem__quantity') * F('inventoryitem__price'), output_field=value_field),
+            Value(0), output_field=value_field,
+        ),
+        low_stock_count=Count('inventoryitem', filter=LOW),
+        critical_count=Count('inventoryitem', filter=CRITICAL),
+        out_of_stock_count=Count('inventoryitem', filter=OUT_OF_STOCK),
+    ).values('id', 'item_count', 'total_quantity', 'stock_value', 'low_stock_count', 'critical_count', 'out_of_stock_count')
+    CategoryStockSummary.objects.bulk_create([
+        CategoryStockSummary(category_id=row.pop('id'), **row) for row in rows
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0008_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CategoryStockSummary',
+            fields=[
+                ('category', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stock_summary', serialize=False, to='inventory.category')),
+                ('item_count', models.IntegerField(default=0)),
+                ('total_quantity', models.BigIntegerField(default=0)),
+                ('stock_value', models.DecimalField(decimal_places=2, default=0, max_digits=20)),
+                ('low_stock_count', models.IntegerField(default=0)),
+                ('critical_count', models.IntegerField(default=0)),
+                ('out_of_stock_count', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.RunPython(build_summaries, migrations.RunPython.noop),
+    ]
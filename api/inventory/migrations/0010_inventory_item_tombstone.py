@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:38
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0009_category_stock_summary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InventoryItemTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('item_id', models.BigIntegerField()),
+                ('deleted_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['deleted_at', 'id'], name='inventory_tombstone_idx')],
+            },
+        ),
+    ]
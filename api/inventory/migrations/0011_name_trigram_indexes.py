@@ -0,0 +1,38 @@
+from django.db import migrations, transaction
+
+INDEXES = [
+    ('inventory_item_name_trgm_idx', 'inventory_inventoryitem'),
+    ('inventory_category_name_trgm_idx', 'inventory_category'),
+]
+
+
+def create_trigram_indexes(apps, schema_editor):
+    # Postgres only; other databases use the in-process index in search.py
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    try:
+        with transaction.atomic():
+            schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    except Exception:
+        # Without the privilege to add extensions, search falls back to the in-process index
+        return
+    for name, table in INDEXES:
+        schema_editor.execute(f'CREATE INDEX IF NOT EXISTS {name} ON {table} USING gin (name gin_trgm_ops)')
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, _ in INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0010_inventory_item_tombstone'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
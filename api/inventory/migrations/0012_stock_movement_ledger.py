@@ -0,0 +1,50 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:45
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0011_name_trigram_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockMovement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity_before', models.IntegerField()),
+                ('quantity_after', models.IntegerField()),
+                ('delta', models.IntegerField()),
+                ('source', models.CharField(choices=[('manager_edit', 'Manager edit'), ('admin_edit', 'Admin edit'), ('approved_request', 'Approved request'), ('import', 'Import'), ('other', 'Other')], max_length=20)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('actor', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='stock_movements', to=settings.AUTH_USER_MODEL)),
+                ('item', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='movements', to='inventory.inventoryitem')),
+                ('update_request', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='movements', to='inventory.inventoryupdaterequest')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['item', 'created_at'], name='inventory_movement_item_idx'), models.Index(fields=['created_at'], name='inventory_movement_created_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='StockRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.CharField(choices=[('hour', 'Hour'), ('day', 'Day')], max_length=4)),
+                ('bucket_start', models.DateTimeField()),
+                ('quantity_in', models.BigIntegerField(default=0)),
+                ('quantity_out', models.BigIntegerField(default=0)),
+                ('net_change', models.BigIntegerField(default=0)),
+                ('movement_count', models.IntegerField(default=0)),
+                ('item', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='stock_rollups', to='inventory.inventoryitem')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('period', 'item', 'bucket_start'), name='inventory_rollup_bucket_uniq')],
+            },
+        ),
+    ]
@@ -1,13 +1,42 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F, Q
 from django.conf import settings
+from django.utils import timezone
 
 class Category(models.Model):
-    name = models.CharField(max_length=200)
+    name = models.CharField(max_length=200, unique=True)
     description = models.TextField(blank=True)
 
     def __str__(self):
         return self.name
 
+# Stock status rules, kept in line with getItemStatus() in Dashboard.jsx.
+# The prefix lets the same rules filter across a relation, e.g. 'inventoryitem__'.
+def critical_stock(prefix=''):
+    return Q(**{f'{prefix}warning_quantity__gt': 0, f'{prefix}quantity__lte': F(f'{prefix}warning_quantity')})
+
+def warning_stock(prefix=''):
+    return Q(**{f'{prefix}recommended_quantity__gt': 0, f'{prefix}quantity__lte': F(f'{prefix}recommended_quantity')}) & ~critical_stock(prefix)
+
+def low_stock(prefix=''):
+    return critical_stock(prefix) | Q(**{f'{prefix}recommended_quantity__gt': 0, f'{prefix}quantity__lte': F(f'{prefix}recommended_quantity')})
+
+def out_of_stock(prefix=''):
+    return Q(**{f'{prefix}quantity__lte': 0})
+
+class InventoryItemQuerySet(models.QuerySet):
+    def critical(self):
+        return self.filter(critical_stock())
+
+    def warning(self):
+        return self.filter(warning_stock())
+
+    def low_stock(self):
+        return self.filter(low_stock())
+
+    def out_of_stock(self):
+        return self.filter(out_of_stock())
+
 class InventoryItem(models.Model):
     name = models.CharField(max_length=200)
     quantity = models.IntegerField()
@@ -17,7 +46,25 @@ class InventoryItem(models.Model):
 
     recommended_quantity = models.PositiveIntegerField(default=0)
     warning_quantity = models.PositiveIntegerField(default=0)
+
+    objects = InventoryItemQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Keyset pagination orderings, see pagination.KeysetPagination
+            models.Index(fields=['name', 'id'], name='inventory_item_name_id_idx'),
+            models.Index(fields=['last_updated', 'id'], name='inventory_item_updated_id_idx'),
+            models.Index(fields=['category', 'name', 'id'], name='inventory_item_cat_name_idx'),
+            # Low-stock lists and counts only ever touch this small slice of the table
+            models.Index(fields=['name', 'id'], condition=low_stock(), name='inventory_item_low_stock_idx'),
+        ]
     
+    def save(self, *args, **kwargs):
+        # signals.remember_previous_item locks the stored row, and the lock has
+        # to last until post_save has applied the stock summary deltas
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
     def update_quantity(self, new_quantity, approved_by=None):
         if approved_by:
             self.quantity = new_quantity
@@ -35,5 +82,184 @@ class InventoryUpdateRequest(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     approved_at = models.DateTimeField(null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='inventory_request_status_idx'),
+            # The approval queue: pending requests, oldest first
+            models.Index(fields=['created_at', 'id'], condition=Q(status='pending'), name='inventory_request_pending_idx'),
+        ]
+
     def __str__(self):
         return f"Update Request for {self.item.name}"
+
+class InventoryItemTombstone(models.Model):
+    """
+    Ids of deleted items, so delta sync clients (see changes.py) can drop
+    them. manage.py purge_tombstones removes rows older than
+    INVENTORY_TOMBSTONE_DAYS.
+    """
+    item_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['deleted_at', 'id'], name='inventory_tombstone_idx'),
+        ]
+
+    def __str__(self):
+        return f"Tombstone for item {self.item_id}"
+
+class StockMovement(models.Model):
+    """
+    Append-only ledger of item quantity changes, written by ledger.py. Rows
+    outlive their item, so the references carry no database constraint.
+    """
+    MANAGER_EDIT = 'manager_edit'
+    ADMIN_EDIT = 'admin_edit'
+    APPROVED_REQUEST = 'approved_request'
+    IMPORT = 'import'
+    OTHER = 'other'
+    SOURCES = [
+        (MANAGER_EDIT, 'Manager edit'),
+        (ADMIN_EDIT, 'Admin edit'),
+        (APPROVED_REQUEST, 'Approved request'),
+        (IMPORT, 'Import'),
+        (OTHER, 'Other'),
+    ]
+
+    item = models.ForeignKey(InventoryItem, on_delete=models.DO_NOTHING, db_constraint=False, related_name='movements')
+    quantity_before = models.IntegerField()
+    quantity_after = models.IntegerField()
+    delta = models.IntegerField()
+    source = models.CharField(max_length=20, choices=SOURCES)
+    actor = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='stock_movements')
+    update_request = models.ForeignKey(
+        InventoryUpdateRequest, on_delete=models.DO_NOTHING, db_constraint=False, null=True, blank=True, related_name='movements',
+    )
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['item', 'created_at'], name='inventory_movement_item_idx'),
+            models.Index(fields=['created_at'], name='inventory_movement_created_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError('Stock movements are append-only')
+        super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        raise ValueError('Stock movements are append-only')
+
+    def __str__(self):
+        return f"{self.item_id}: {self.quantity_before} -> {self.quantity_after} ({self.source})"
+
+class StockRollup(models.Model):
+    """
+    Movement totals per item and hour or day, kept current by ledger.py with
+    additive upserts so long-range usage reads one row per bucket.
+    manage.py rebuild_stock_rollups recomputes them from the ledger.
+    """
+    HOUR = 'hour'
+    DAY = 'day'
+    PERIODS = [(HOUR, 'Hour'), (DAY, 'Day')]
+
+    period = models.CharField(max_length=4, choices=PERIODS)
+    item = models.ForeignKey(InventoryItem, on_delete=models.DO_NOTHING, db_constraint=False, related_name='stock_rollups')
+    bucket_start = models.DateTimeField()
+    quantity_in = models.BigIntegerField(default=0)
+    quantity_out = models.BigIntegerField(default=0)
+    net_change = models.BigIntegerField(default=0)
+    movement_count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['period', 'item', 'bucket_start'], name='inventory_rollup_bucket_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.item_id} {self.period} {self.bucket_start:%Y-%m-%d %H:%M}"
+
+class CategoryStockSummary(models.Model):
+    """
+    Per-category stock counters, kept current with F() deltas by summary.py
+    so the dashboard reads one row per category instead of scanning items.
+    manage.py rebuild_stock_summary recomputes them and reports drift.
+    """
+    category = models.OneToOneField(Category, on_delete=models.CASCADE, primary_key=True, related_name='stock_summary')
+    item_count = models.IntegerField(default=0)
+    total_quantity = models.BigIntegerField(default=0)
+    stock_value = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+    low_stock_count = models.IntegerField(default=0)
+    critical_count = models.IntegerField(default=0)
+    out_of_stock_count = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"Stock summary for category {self.category_id}"
+
+class TableVersion(models.Model):
+    """
+    Change counter per inventory table, bumped by the signals in signals.py.
+    Read endpoints derive their ETag validators from it.
+    """
+    name = models.CharField(max_length=100, unique=True)
+    version = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    @classmethod
+    def bump(cls, model):
+        name = model._meta.label_lower
+        updated = cls.objects.filter(name=name).update(version=F('version') + 1, updated_at=timezone.now())
+        if not updated:
+            cls.objects.get_or_create(name=name, defaults={'version': 1})
+
+    @classmethod
+    def bump_on_commit(cls, model):
+        """
+        bump() once the current transaction commits, so concurrent writers
+        do not queue on the version row for the rest of their transactions.
+        The write has committed by then, so a failed bump is logged rather
+        than raised to a caller that would take the write as failed.
+        """
+        transaction.on_commit(lambda: cls.bump(model), robust=True)
+
+    def __str__(self):
+        return f"{self.name} v{self.version}"
+
+class RequestProfile(models.Model):
+    """A cProfile run of one request, asked for by an admin; see profiling.py."""
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='request_profiles')
+    method = models.CharField(max_length=10)
+    path = models.CharField(max_length=2048)
+    view_name = models.CharField(max_length=200, blank=True)
+    status_code = models.PositiveSmallIntegerField()
+    duration = models.FloatField(help_text='Seconds, with the profiler running')
+    stats = models.TextField(help_text='Functions by cumulative time')
+    # pstats.Stats.dump_stats() format, for snakeviz and other viewers
+    data = models.BinaryField()
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [models.Index(fields=['created_at'], name='inventory_profile_created_idx')]
+
+    def __str__(self):
+        return f"{self.method} {self.path} ({self.duration * 1000:.0f} ms)"
+
+class SlowQuery(models.Model):
+    """A statement that ran longer than SLOW_QUERY_THRESHOLD_MS during a request."""
+    view_name = models.CharField(max_length=200, blank=True)
+    method = models.CharField(max_length=10)
+    path = models.CharField(max_length=2048)
+    sql = models.TextField()
+    duration = models.FloatField(help_text='Seconds')
+    stack = models.TextField(help_text='Project frames that led to the query, innermost last')
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        verbose_name_plural = 'slow queries'
+        indexes = [models.Index(fields=['created_at'], name='inventory_slowsql_created_idx')]
+
+    def __str__(self):
+        return f"{self.view_name or self.path}: {self.duration * 1000:.0f} ms"
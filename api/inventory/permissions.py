@@ -11,3 +11,6 @@ class IsManagerOrAdmin(BaseRolePermission):
 
 class IsEmployee(BaseRolePermission):
     allowed_roles = ['employee']
+
+class IsAdmin(BaseRolePermission):
+    allowed_roles = ['admin']
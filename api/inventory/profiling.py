@@ -0,0 +1,148 @@
+import cProfile
+import io
+import logging
+import marshal
+import pstats
+import sys
+import time
+import traceback
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import DatabaseError
+from django.urls import reverse
+from rest_framework.exceptions import AuthenticationFailed
+from user_authentication.authentication import ClaimsJWTAuthentication
+from user_authentication.models import User
+
+from .models import RequestProfile, SlowQuery
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = 'HTTP_X_PROFILE'
+PROFILE_PARAM = 'profile'
+STATS_LINES = 80
+PROJECT_DIR = str(settings.BASE_DIR)
+
+
+def query_stack():
+    """The project's own frames leading to the current query, innermost last."""
+    # Start above this function and the execute wrapper that called it
+    frames = [
+        frame for frame in traceback.extract_stack(sys._getframe(2))
+        if frame.filename.startswith(PROJECT_DIR) and 'site-packages' not in frame.filename
+    ]
+    return ''.join(traceback.format_list(frames))
+
+
+def save_slow_queries(request, route, slow_queries):
+    """Log and store the statements RequestMetricsMiddleware found over SLOW_QUERY_THRESHOLD_MS."""
+    path = request.get_full_path()[:2048]
+    for sql, duration, stack in slow_queries:
+        logger.warning('Slow query in %s %s (%.0f ms): %s', route, request.method, duration * 1000, sql)
+    try:
+        SlowQuery.objects.bulk_create([
+            SlowQuery(view_name=route, method=request.method, path=path, sql=sql, duration=duration, stack=stack)
+            for sql, duration, stack in slow_queries
+        ])
+    except DatabaseError:
+        # The response is already built; losing the record must not fail it
+        logger.exception('Could not store slow queries for %s', path)
+
+
+def profiling_requested(request):
+    return PROFILE_HEADER in request.META or PROFILE_PARAM in request.GET
+
+
+def profiling_user(authenticated):
+    if authenticated is None:
+        return None
+    user = authenticated[0]
+    return user if user.role == User.ADMIN else None
+
+
+def save_profile(request, response, user, profiler, duration):
+    stream = io.StringIO()
+    stats = pstats.Stats(profiler, stream=stream)
+    stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(STATS_LINES)
+    match = request.resolver_match
+    path = request.get_full_path()[:2048]
+    try:
+        profile = RequestProfile.objects.create(
+            user_id=user.pk, method=request.method, path=path,
+            view_name=(match.view_name if match else None) or '', status_code=response.status_code,
+            duration=duration, stats=stream.getvalue(), data=marshal.dumps(stats.stats),
+        )
+    except DatabaseError:
+        # As with slow queries, a lost profile must not fail the response
+        logger.exception('Could not store the profile of %s', path)
+        return None
+    response['X-Profile-Id'] = str(profile.pk)
+    response['X-Profile-Url'] = reverse('admin:inventory_requestprofile_change', args=[profile.pk])
+    return profile
+
+
+class RequestProfilingMiddleware:
+    """
+    Runs a request under cProfile when an admin (User.role) asks for it
+    with an X-Profile header or a ?profile query flag, and stores the result
+    as a RequestProfile, browsable and downloadable in the Django admin. The
+    response carries X-Profile-Id and X-Profile-Url. Anyone else's flag is
+    ignored and their request runs as usual.
+
+    The caller is read from the JWT here, ahead of the views, with the same
+    authentication class. cProfile follows the current thread only: under
+    ASGI a sync view runs in a worker thread and shows up as one
+    sync_to_async call, while async views are profiled in full, along
+    with whatever else the event loop runs while they wait.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        if not profiling_requested(request):
+            return self.get_response(request)
+        try:
+            user = profiling_user(ClaimsJWTAuthentication().authenticate(request))
+        except AuthenticationFailed:
+            user = None
+        if user is None:
+            return self.get_response(request)
+
+        profiler = cProfile.Profile()
+        start = time.perf_counter()
+        profiler.enable()
+        try:
+            response = self.get_response(request)
+        finally:
+            profiler.disable()
+        save_profile(request, response, user, profiler, time.perf_counter() - start)
+        return response
+
+    async def __acall__(self, request):
+        if not profiling_requested(request):
+            return await self.get_response(request)
+        try:
+            user = profiling_user(await ClaimsJWTAuthentication().aauthenticate(request))
+        except AuthenticationFailed:
+            user = None
+        if user is None:
+            return await self.get_response(request)
+
+        profiler = cProfile.Profile()
+        start = time.perf_counter()
+        profiler.enable()
+        try:
+            response = await self.get_response(request)
+        finally:
+            profiler.disable()
+        await sync_to_async(save_profile)(request, response, user, profiler, time.perf_counter() - start)
+        return response
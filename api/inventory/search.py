@@ -0,0 +1,276 @@
+import math
+import re
+import threading
+import time
+from array import array
+
+import numpy as np
+from django.db import connection, transaction
+from django.db.models import BooleanField, F, FloatField, Func, Value
+
+from .changes import ChangeFeed, CursorExpired
+from .fast_serializers import InventoryItemValuesSerializer
+from .models import Category, InventoryItem, TableVersion
+
+WORD = re.compile(r'[^\W_]+')
+# Least share of the query's trigrams a name must contain, as pg_trgm's
+# word_similarity; 0.3 lets one typo through in a five letter word
+MIN_SCORE = 0.3
+
+
+def trigrams(text):
+    """pg_trgm's trigrams: every lowercased word padded with two spaces in front and one behind."""
+    grams = set()
+    for word in WORD.findall(text.lower()):
+        padded = f'  {word} '
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class TrigramIndex:
+    """
+    In-process inverted index from trigram to the slots of the names that
+    hold it, for databases without pg_trgm. Postings are int32 arrays, so
+    a query counts the trigrams each name shares with it with one numpy
+    operation per query trigram. A changed or removed name leaves a dead
+    slot behind; the index is rebuilt once half its slots are dead.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.load([])
+
+    def load(self, pairs):
+        """Replace the contents with (key, name) pairs."""
+        postings, slots, keys, names, sizes, alive = {}, {}, [], [], array('i'), bytearray()
+        for key, name in pairs:
+            self.insert(key, name, postings, slots, keys, names, sizes, alive)
+        with self.lock:
+            self.postings, self.slots, self.keys, self.names, self.sizes, self.alive = (
+                postings, slots, keys, names, sizes, alive
+            )
+            self.dead = 0
+
+    def insert(self, key, name, postings, slots, keys, names, sizes, alive):
+        grams = trigrams(name)
+        slot = len(keys)
+        slots[key] = slot
+        keys.append(key)
+        names.append(name)
+        sizes.append(len(grams))
+        alive.append(1)
+        for gram in grams:
+            posting = postings.get(gram)
+            if posting is None:
+                posting = postings[gram] = array('i')
+            posting.append(slot)
+
+    def add(self, key, name):
+        with self.lock:
+            slot = self.slots.get(key)
+            if slot is not None:
+                if self.names[slot] == name:
+                    return
+                self.kill(slot)
+            self.insert(key, name, self.postings, self.slots, self.keys, self.names, self.sizes, self.alive)
+        self.compact_if_needed()
+
+    def remove(self, key):
+        with self.lock:
+            slot = self.slots.pop(key, None)
+            if slot is not None:
+                self.kill(slot)
+        self.compact_if_needed()
+
+    def kill(self, slot):
+        self.alive[slot] = 0
+        self.names[slot] = None
+        self.dead += 1
+
+    def compact_if_needed(self):
+        if self.dead > 1000 and self.dead * 2 > len(self.keys):
+            with self.lock:
+                pairs = [(key, self.names[slot]) for key, slot in self.slots.items()]
+            self.load(pairs)
+
+    def search(self, query, limit):
+        """[(key, score, similarity)] for the best limit names, best first."""
+        grams = trigrams(query)
+        if not grams:
+            return []
+        # A name needs this many of the query's trigrams to reach MIN_SCORE
+        needed = math.ceil(MIN_SCORE * len(grams) - 1e-9)
+        with self.lock:
+            counts = np.zeros(len(self.keys), dtype=np.uint16)
+            for gram in grams:
+                posting = self.postings.get(gram)
+                if posting:
+                    # A posting holds each slot once, so this counts exactly
+                    counts[np.frombuffer(posting, dtype=np.int32)] += 1
+            slots = np.flatnonzero(counts >= needed)
+            slots = slots[np.frombuffer(self.alive, dtype=np.bool_)[slots]]
+            sizes = np.frombuffer(self.sizes, dtype=np.int32)[slots]
+            keys = self.keys
+
+        common = counts[slots]
+        score = common / len(grams)
+        similarity = common / (len(grams) + sizes - common)
+        # Scores are multiples of 1 / len(grams), so similarity only breaks ties
+        rank = score + similarity / 1000
+        if len(rank) > limit:
+            top = np.argpartition(-rank, limit - 1)[:limit]
+        else:
+            top = np.arange(len(rank))
+        top = top[np.argsort(-rank[top], kind='stable')]
+        return [(keys[slots[i]], float(score[i]), float(similarity[i])) for i in top]
+
+
+class WordSimilar(Func):
+    # query <% name, the pg_trgm operator a gin_trgm_ops index can serve
+    arg_joiner = ' <%% '
+    template = '%(expressions)s'
+    output_field = BooleanField()
+
+
+def pg_scores(query):
+    return {
+        'score': Func(Value(query), F('name'), function='WORD_SIMILARITY', output_field=FloatField()),
+        'similarity': Func(Value(query), F('name'), function='SIMILARITY', output_field=FloatField()),
+    }
+
+
+class NameSearch:
+    """
+    Ranked fuzzy search over item and category names. On Postgres with
+    pg_trgm it queries the GIN trigram indexes from migration 0011.
+    Elsewhere it keeps a TrigramIndex per table in this process: writes made
+    here are applied by the signals in signals.py, and writes made by other
+    processes or in bulk are caught up through the item change feed (see
+    changes.py) at most every sync_interval seconds. Categories are few, so
+    they are simply reloaded when their TableVersion moves.
+    """
+    sync_interval = 1
+
+    def __init__(self):
+        self.items = TrigramIndex()
+        self.categories = TrigramIndex()
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.items.load([])
+            self.categories.load([])
+            self.cursor = None
+            self.category_version = None
+            self.next_sync = 0
+            self.pg_trgm = None
+
+    @property
+    def loaded(self):
+        return self.cursor is not None
+
+    def uses_pg_trgm(self):
+        if self.pg_trgm is None:
+            self.pg_trgm = False
+            if connection.vendor == 'postgresql':
+                with connection.cursor() as cursor:
+                    cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+                    self.pg_trgm = cursor.fetchone() is not None
+        return self.pg_trgm
+
+    def search(self, query, limit=10):
+        if self.uses_pg_trgm():
+            return self.search_postgres(query, limit)
+        self.sync()
+        item_hits = self.items.search(query, limit)
+        category_hits = self.categories.search(query, limit)
+
+        rows = InventoryItemValuesSerializer.get_values(InventoryItem.objects.filter(id__in=[key for key, _, _ in item_hits]))
+        rows = dict((row['id'], row) for row in InventoryItemValuesSerializer.serialize(rows))
+        names = dict(Category.objects.filter(id__in=[key for key, _, _ in category_hits]).values_list('id', 'name'))
+        return {
+            # A hit deleted since the last sync has no row; leave it out
+            'items': [dict(rows[key], score=round(score, 3)) for key, score, _ in item_hits if key in rows],
+            'categories': [
+                {'id': key, 'name': names[key], 'score': round(score, 3)} for key, score, _ in category_hits if key in names
+            ],
+        }
+
+    def search_postgres(self, query, limit):
+        scores = pg_scores(query)
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute("SELECT set_config('pg_trgm.word_similarity_threshold', %s, true)", [str(MIN_SCORE)])
+            items = (
+                InventoryItemValuesSerializer.get_values(InventoryItem.objects.filter(WordSimilar(Value(query), F('name'))))
+                .annotate(**scores)
+                .order_by('-score', '-similarity', 'id')[:limit]
+            )
+            items = [
+                dict(InventoryItemValuesSerializer.to_representation(row), score=round(row['score'], 3)) for row in items
+            ]
+            categories = list(
+                Category.objects.filter(WordSimilar(Value(query), F('name')))
+                .annotate(**scores)
+                .order_by('-score', '-similarity', 'id')
+                .values('id', 'name', 'score')[:limit]
+            )
+        for category in categories:
+            category['score'] = round(category['score'], 3)
+        return {'items': items, 'categories': categories}
+
+    def sync(self):
+        if time.monotonic() < self.next_sync:
+            return
+        with self.lock:
+            if time.monotonic() < self.next_sync:
+                return
+            if self.cursor is None:
+                self.load_items()
+            else:
+                self.catch_up()
+            version = TableVersion.objects.filter(name=Category._meta.label_lower).values_list('version', flat=True).first()
+            if version != self.category_version or not self.categories.keys:
+                self.categories.load(Category.objects.values_list('id', 'name'))
+                self.category_version = version
+            self.next_sync = time.monotonic() + self.sync_interval
+
+    def load_items(self):
+        # Taken first, so writes made during the load are caught up later
+        cursor = ChangeFeed().start_cursor()
+        self.items.load(InventoryItem.objects.values_list('id', 'name').iterator(chunk_size=10000))
+        self.cursor = cursor
+
+    def catch_up(self):
+        feed = ChangeFeed()
+        try:
+            while True:
+                page = feed.read(self.cursor)
+                for row in page['changed']:
+                    self.items.add(row['id'], row['name'])
+                for item_id in page['deleted']:
+                    self.items.remove(item_id)
+                self.cursor = page['next']
+                if not page['has_more']:
+                    return
+        except CursorExpired:
+            self.load_items()
+
+    def item_saved(self, item_id, name):
+        if self.loaded:
+            self.items.add(item_id, name)
+
+    def item_deleted(self, item_id):
+        if self.loaded:
+            self.items.remove(item_id)
+
+    def category_saved(self, category_id, name):
+        if self.loaded:
+            self.categories.add(category_id, name)
+
+    def category_deleted(self, category_id):
+        if self.loaded:
+            self.categories.remove(category_id)
+
+
+name_search = NameSearch()
@@ -0,0 +1,148 @@
+import random
+from array import array
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+
+from .cache import response_cache, ITEMS, CATEGORIES, CATEGORY_NAMES
+from .models import Category, InventoryItem, InventoryUpdateRequest, TableVersion
+from .summary import rebuild as rebuild_summaries
+from user_authentication.models import User
+
+WORDS = [
+    'bath', 'towel', 'hand', 'pillow', 'case', 'sheet', 'queen', 'king', 'twin', 'duvet', 'cover', 'soap', 'shampoo',
+    'conditioner', 'lotion', 'coffee', 'decaf', 'tea', 'sugar', 'creamer', 'cup', 'lid', 'napkin', 'plate', 'fork',
+    'spoon', 'knife', 'bleach', 'detergent', 'sponge', 'glove', 'filter', 'bulb', 'battery', 'remote', 'hanger',
+    'white', 'blue', 'large', 'small', 'premium', 'travel', 'guest', 'lobby', 'kitchen', 'laundry',
+]
+# Out of 100 requests, like a hotel's approval queue: most go through
+STATUSES = ['approved'] * 85 + ['rejected'] * 10 + ['pending'] * 5
+ROLES = [User.MANAGER] + [User.EMPLOYEE] * 5 + [User.HOUSEKEEPING] * 3 + [User.FRONTDESK]
+
+
+@contextmanager
+def explicit_timestamps(model, field_name):
+    """Let bulk_create keep the given value of an auto_now_add field instead of stamping the current time."""
+    field = model._meta.get_field(field_name)
+    field.auto_now_add = False
+    try:
+        yield
+    finally:
+        field.auto_now_add = True
+
+
+class InventorySeeder:
+    """
+    Fills the database with synthetic categories, users, items and update
+    requests for benchmarks and local testing. Rows are built and inserted
+    one batch at a time with bulk_create, so a million items never sit in
+    memory as objects. Running it again adds more items and requests;
+    categories and users are matched by name and email and only created
+    once. All seeded users share one password so they can log in.
+
+    bulk_create sends no model signals: the stock summary is rebuilt and
+    cached reads dropped at the end, and the movement ledger is left empty.
+    """
+    password = 'password123'
+    email_domain = 'seed.example.com'
+
+    def __init__(self, categories=50, users=50, items=10000, requests=50000, days=730, batch_size=5000, seed=0, log=None):
+        self.category_count = categories
+        self.user_count = users
+        self.item_count = items
+        self.request_count = requests
+        self.days = days
+        self.batch_size = batch_size
+        self.rng = random.Random(seed)
+        self.log = log or (lambda message: None)
+
+    def run(self):
+        category_ids = self.create_categories()
+        user_ids, manager_ids = self.create_users()
+        item_ids = self.create_items(category_ids)
+        self.create_requests(item_ids, user_ids, manager_ids)
+        self.finish()
+        return {'categories': len(category_ids), 'users': len(user_ids), 'items': len(item_ids), 'requests': self.request_count}
+
+    def batches(self, total):
+        for start in range(0, total, self.batch_size):
+            yield range(start, min(start + self.batch_size, total))
+
+    def create_categories(self):
+        names = [f'Seed category {i:04}' for i in range(self.category_count)]
+        existing = set(Category.objects.filter(name__in=names).values_list('name', flat=True))
+        Category.objects.bulk_create(
+            [Category(name=name, description=f'{name.lower()} supplies') for name in names if name not in existing],
+            batch_size=self.batch_size,
+        )
+        self.log(f'{len(names) - len(existing)} categories created')
+        return list(Category.objects.filter(name__in=names).values_list('id', flat=True))
+
+    def create_users(self):
+        emails = [f'seed-{i:05}@{self.email_domain}' for i in range(self.user_count)]
+        existing = set(User.objects.filter(email__in=emails).values_list('email', flat=True))
+        # Hashing is deliberately slow, so every seeded user shares one hash
+        password = make_password(self.password)
+        User.objects.bulk_create([
+            User(
+                email=email, first_name='Seed', last_name=f'User {i}', password=password,
+                role=ROLES[i % len(ROLES)], is_verified=True,
+            )
+            for i, email in enumerate(emails) if email not in existing
+        ], batch_size=self.batch_size)
+        self.log(f'{len(emails) - len(existing)} users created')
+        users = list(User.objects.filter(email__in=emails).values_list('id', 'role'))
+        managers = [user_id for user_id, role in users if role == User.MANAGER]
+        return [user_id for user_id, _ in users], managers or [user_id for user_id, _ in users]
+
+    def item_name(self):
+        return f"{' '.join(self.rng.sample(WORDS, self.rng.randint(2, 4)))} {self.rng.randint(1, 999)}".title()
+
+    def create_items(self, category_ids):
+        item_ids = array('q')
+        for batch in self.batches(self.item_count):
+            items = []
+            for _ in batch:
+                recommended = self.rng.choice([0, 10, 20, 50, 100])
+                items.append(InventoryItem(
+                    name=self.item_name(), quantity=self.rng.randrange(0, 200),
+                    price=f'{self.rng.randrange(50, 20000) / 100:.2f}', category_id=self.rng.choice(category_ids),
+                    recommended_quantity=recommended, warning_quantity=recommended // 4,
+                ))
+            with transaction.atomic():
+                InventoryItem.objects.bulk_create(items)
+            item_ids.extend(item.pk for item in items)
+            self.log(f'{len(item_ids):,} / {self.item_count:,} items')
+        return item_ids
+
+    def create_requests(self, item_ids, user_ids, manager_ids):
+        if not item_ids:
+            return
+        now = timezone.now()
+        span = self.days * 86400
+        with explicit_timestamps(InventoryUpdateRequest, 'created_at'):
+            for done, batch in enumerate(self.batches(self.request_count), 1):
+                requests = []
+                for _ in batch:
+                    request_status = self.rng.choice(STATUSES)
+                    created_at = now - timedelta(seconds=self.rng.randrange(span))
+                    decided = request_status != 'pending'
+                    requests.append(InventoryUpdateRequest(
+                        item_id=self.rng.choice(item_ids), requested_quantity=self.rng.randrange(0, 200),
+                        submitted_by_id=self.rng.choice(user_ids), status=request_status, created_at=created_at,
+                        approved_by_id=self.rng.choice(manager_ids) if decided else None,
+                        approved_at=min(created_at + timedelta(minutes=self.rng.randrange(5, 2880)), now) if decided else None,
+                    ))
+                with transaction.atomic():
+                    InventoryUpdateRequest.objects.bulk_create(requests)
+                self.log(f'{min(done * self.batch_size, self.request_count):,} / {self.request_count:,} requests')
+
+    def finish(self):
+        rebuild_summaries()
+        TableVersion.bump(InventoryItem)
+        TableVersion.bump(Category)
+        TableVersion.bump(InventoryUpdateRequest)
+        response_cache.bump(ITEMS, CATEGORIES, CATEGORY_NAMES)
@@ -1,12 +1,13 @@
 from rest_framework import serializers
+from backend.timing import TimedSerializerMixin
 from .models import InventoryItem, Category, InventoryUpdateRequest
 
-class CategorySerializer(serializers.ModelSerializer):
+class CategorySerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Category
         fields = ['id', 'name', 'description']
 
-class InventoryItemSerializer(serializers.ModelSerializer):
+class InventoryItemSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     category = serializers.SlugRelatedField(
             queryset=Category.objects.all(),
             slug_field='name',
@@ -39,34 +40,37 @@ class InventoryItemSerializer(serializers.ModelSerializer):
         recommended = data.get('recommended_quantity', getattr(self.instance, 'recommended_quantity', 0))
         warning = data.get('warning_quantity', getattr(self.instance, 'warning_quantity', 0))
 
-        if quantity < 0:
-            raise serializers.ValidationError(
-                {"quantity": "Quantity cannot be negative."}
-            )
+        validate_item_quantities(quantity, recommended, warning)
+        return data
 
-        if recommended < 0:
-            raise serializers.ValidationError(
-                {"recommended_quantity": "Recommended quantity cannot be negative."}
-            )
+def validate_item_quantities(quantity, recommended, warning):
+    # Shared with the bulk importers, which validate rows without a serializer instance
+    if quantity < 0:
+        raise serializers.ValidationError(
+            {"quantity": "Quantity cannot be negative."}
+        )
 
-        if warning < 0:
-            raise serializers.ValidationError(
-                {"warning_quantity": "Warning quantity cannot be negative."}
-            )
+    if recommended < 0:
+        raise serializers.ValidationError(
+            {"recommended_quantity": "Recommended quantity cannot be negative."}
+        )
 
-        if warning > recommended:
-            raise serializers.ValidationError(
-                {"warning_quantity": "Warning quantity cannot exceed the recommended quantity."}
-            )
+    if warning < 0:
+        raise serializers.ValidationError(
+            {"warning_quantity": "Warning quantity cannot be negative."}
+        )
 
-        return data
+    if warning > recommended:
+        raise serializers.ValidationError(
+            {"warning_quantity": "Warning quantity cannot exceed the recommended quantity."}
+        )
 
-class InventoryUpdateRequestSerializer(serializers.ModelSerializer):
+class InventoryUpdateRequestSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     item = serializers.PrimaryKeyRelatedField(queryset=InventoryItem.objects.all())
     submitted_by_username = serializers.ReadOnlyField(source='submitted_by.email')
     submitted_by_first_name = serializers.ReadOnlyField(source='submitted_by.first_name')
     submitted_by_last_name = serializers.ReadOnlyField(source='submitted_by.last_name')
-    approved_by = serializers.ReadOnlyField(source='approved_by.username')
+    approved_by = serializers.ReadOnlyField(source='approved_by.email', default=None)
 
     class Meta:
         model = InventoryUpdateRequest
@@ -76,3 +80,18 @@ class InventoryUpdateRequestSerializer(serializers.ModelSerializer):
             'approved_by', 'status', 'created_at', 'approved_at'
         ]
 
+class InventoryRequestBulkActionSerializer(TimedSerializerMixin, serializers.Serializer):
+    action = serializers.ChoiceField(choices=['approve', 'reject'])
+    request_ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=1000,
+    )
+
+class ReorderForecastSerializer(TimedSerializerMixin, serializers.Serializer):
+    lead_time_days = serializers.FloatField(min_value=0, max_value=365, default=7)
+    review_days = serializers.FloatField(min_value=0, max_value=365, default=14)
+    service_level = serializers.FloatField(min_value=0.5, max_value=0.999, default=0.95)
+    min_intervals = serializers.IntegerField(min_value=1, default=3)
+    dry_run = serializers.BooleanField(default=False)
+    limit = serializers.IntegerField(min_value=0, max_value=1000, default=100)
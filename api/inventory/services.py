@@ -0,0 +1,199 @@
+from django.db import DatabaseError, connection, transaction
+from django.db.models import Case, IntegerField, Value, When
+from django.utils import timezone
+
+from . import events, ledger
+from .bulk_io import ItemRowValidator, UPSERT_FIELDS, VALUE_FIELDS
+from .cache import response_cache, ITEMS, item_generation, category_generation
+from .models import InventoryItem, InventoryUpdateRequest, StockMovement, TableVersion
+from .summary import STOCK_FIELDS, apply_item_changes, current_stock_rows, stock_row
+
+APPROVE = 'approve'
+REJECT = 'reject'
+ACTION_STATUSES = {APPROVE: 'approved', REJECT: 'rejected'}
+NOT_PENDING_ERROR = 'Update request not found or not in pending status'
+ITEM_NOT_FOUND_ERROR = 'Item not found'
+
+
+def items_changed(item_ids, category_names):
+    """
+    Bulk writes send no model signals, so do what signals.py would have done.
+    Call inside the writing transaction; cached reads are dropped once it commits.
+    """
+    TableVersion.bump_on_commit(InventoryItem)
+    names = [ITEMS]
+    names.extend(item_generation(item_id) for item_id in item_ids)
+    names.extend(category_generation(name) for name in category_names if name)
+    response_cache.bump_on_commit(*names)
+
+
+def apply_request_action(request_ids, action, user):
+    """
+    Approve or reject a batch of pending update requests in one transaction.
+
+    Pending requests are locked with SKIP LOCKED where the database supports
+    it, so managers working the same queue pass over each other's rows
+    instead of waiting on them, and exactly the locked ids are claimed with
+    an UPDATE ... WHERE status='pending'. Table versions are bumped after
+    commit, so approvers do not queue on those rows either. Item quantities
+    are then written with a single CASE update that touches no other column.
+
+    Runs the same handful of queries whatever the batch size and returns an
+    outcome per requested id, in input order.
+    """
+    request_ids = list(dict.fromkeys(request_ids))
+    new_status = ACTION_STATUSES[action]
+    now = timezone.now()
+
+    with transaction.atomic():
+        candidates = InventoryUpdateRequest.objects.filter(id__in=request_ids, status='pending')
+        if connection.features.has_select_for_update_skip_locked:
+            candidates = candidates.select_for_update(skip_locked=True)
+        elif connection.features.has_select_for_update:
+            candidates = candidates.select_for_update()
+        # Locked rows stay pending until this transaction ends. SQLite locks
+        # nothing, but lets one writer through at a time and fails the other
+        # transaction rather than let it update rows it read before they changed.
+        claimed_ids = list(candidates.values_list('id', flat=True))
+        claimed_count = InventoryUpdateRequest.objects.filter(id__in=claimed_ids, status='pending').update(
+            status=new_status, approved_by=user, approved_at=now,
+        )
+        if claimed_count != len(claimed_ids):
+            raise DatabaseError('Update requests changed while being claimed')
+
+        claimed = []
+        if claimed_ids:
+            claimed = list(
+                InventoryUpdateRequest.objects
+                .filter(id__in=claimed_ids)
+                .order_by('created_at', 'id')
+                .values('id', 'item_id', 'requested_quantity', 'item__category__name')
+            )
+            TableVersion.bump_on_commit(InventoryUpdateRequest)
+            for row in claimed:
+                events.request_changed(row['id'], row['item_id'], events.UPDATED, new_status)
+
+        if claimed and action == APPROVE:
+            # Several requests for one item resolve as if applied oldest first
+            quantities = {row['item_id']: row['requested_quantity'] for row in claimed}
+            previous = current_stock_rows(quantities)
+            InventoryItem.objects.filter(pk__in=quantities).update(
+                quantity=Case(
+                    *[When(pk=item_id, then=Value(quantity)) for item_id, quantity in quantities.items()],
+                    output_field=IntegerField(),
+                ),
+                last_updated=now,
+            )
+            apply_item_changes(
+                (row, dict(row, quantity=quantities[item_id])) for item_id, row in previous.items()
+            )
+            # One ledger entry per request, chained oldest first
+            current = dict((item_id, row['quantity']) for item_id, row in previous.items())
+            movements = []
+            for row in claimed:
+                item_id = row['item_id']
+                movements.append(ledger.movement(
+                    item_id, current.get(item_id), row['requested_quantity'], StockMovement.APPROVED_REQUEST, user, row['id'], now,
+                ))
+                current[item_id] = row['requested_quantity']
+            ledger.record_movements(movements)
+            items_changed([row['item_id'] for row in claimed], [row['item__category__name'] for row in claimed])
+            for item_id, quantity in quantities.items():
+                events.item_changed(item_id, events.UPDATED, ['quantity'], quantity)
+
+    applied = set(row['id'] for row in claimed)
+    return [
+        {'id': request_id, 'status': new_status} if request_id in applied
+        else {'id': request_id, 'error': NOT_PENDING_ERROR}
+        for request_id in request_ids
+    ]
+
+
+def row_id(row):
+    try:
+        return int(row['id'])
+    except (TypeError, KeyError, ValueError):
+        return None
+
+
+def stored_items(item_ids):
+    """
+    {id: row} of the stored values of items a bulk save updates, with the
+    category by name as clients send it. Call inside the writing
+    transaction; rows are locked where the database supports it, like
+    summary.current_stock_rows.
+    """
+    queryset = InventoryItem.objects.filter(id__in=item_ids)
+    if connection.features.has_select_for_update_of:
+        queryset = queryset.select_for_update(of=('self',))
+    elif connection.features.has_select_for_update:
+        queryset = queryset.select_for_update()
+    return {row['id']: row for row in queryset.order_by('id').values('id', 'name', 'category__name', *STOCK_FIELDS)}
+
+
+def bulk_upsert_items(rows, actor=None):
+    """
+    Validate a list of item dicts in one pass and write them in a single
+    transaction: rows with an id are updated with bulk_update, the rest are
+    created with bulk_create. An update row only needs the fields it
+    changes; the others keep their stored values. Nothing is written unless
+    every row is valid.
+
+    Returns (item_ids, errors) where errors lists {'index', 'errors'} for
+    each invalid row, and item_ids follows the input order.
+    """
+    with transaction.atomic():
+        stored = stored_items(set(filter(None, map(row_id, rows))))
+        validator = ItemRowValidator()
+        validated, errors = [], []
+        for index, row in enumerate(rows):
+            item = stored.get(row_id(row))
+            if item is not None:
+                row = {**{field: item[field] for field in VALUE_FIELDS}, 'category': item['category__name'], **row}
+            data, row_errors = validator.validate(row)
+            if row_errors:
+                errors.append({'index': index, 'errors': row_errors})
+            validated.append(data)
+
+        seen = set()
+        for index, data in enumerate(validated):
+            item_id = data.get('id') if data else None
+            if not item_id:
+                continue
+            if item_id not in stored:
+                errors.append({'index': index, 'errors': {'id': [ITEM_NOT_FOUND_ERROR]}})
+            elif item_id in seen:
+                errors.append({'index': index, 'errors': {'id': ['Item appears more than once.']}})
+            seen.add(item_id)
+        if errors:
+            return None, sorted(errors, key=lambda error: error['index'])
+
+        now = timezone.now()
+        objects = [InventoryItem(last_updated=now, **data) for data in validated]
+        updates = [obj for obj in objects if obj.id]
+        creates = [obj for obj in objects if not obj.id]
+        previous = {obj.id: {field: stored[obj.id][field] for field in STOCK_FIELDS} for obj in updates}
+        if updates:
+            InventoryItem.objects.bulk_update(updates, UPSERT_FIELDS)
+        if creates:
+            InventoryItem.objects.bulk_create(creates)
+        apply_item_changes((previous.get(obj.id), stock_row(obj)) for obj in objects)
+        ledger.record_movements(
+            ledger.movement(obj.id, previous.get(obj.id, {}).get('quantity'), obj.quantity, StockMovement.MANAGER_EDIT, actor, created_at=now)
+            for obj in objects
+        )
+        if creates:
+            # New rows have to be fetched whole, so one reload beats a GET per row in every client
+            events.items_reloaded()
+        else:
+            for obj in updates:
+                fields = events.changed_fields(dict(previous[obj.id], name=stored[obj.id]['name']), obj)
+                if fields:
+                    events.item_changed(obj.id, events.UPDATED, fields, obj.quantity)
+
+        category_names = dict((pk, name) for name, pk in validator.categories.items())
+        items_changed(
+            [obj.id for obj in updates],
+            set(stored[obj.id]['category__name'] for obj in updates) | set(category_names.get(obj.category_id) for obj in objects),
+        )
+    return [obj.id for obj in objects], []
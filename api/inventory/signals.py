@@ -0,0 +1,172 @@
+from django.db import connection, transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import events, ledger
+from .cache import response_cache, ITEMS, CATEGORIES, CATEGORY_NAMES, item_generation, category_generation
+from .models import (
+    Category, CategoryStockSummary, InventoryItem, InventoryItemTombstone, InventoryUpdateRequest, TableVersion,
+)
+from .search import name_search
+from .summary import STOCK_FIELDS, apply_item_changes, stock_row
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=InventoryItem)
+@receiver(post_delete, sender=InventoryItem)
+@receiver(post_save, sender=InventoryUpdateRequest)
+@receiver(post_delete, sender=InventoryUpdateRequest)
+def bump_table_version(sender, **kwargs):
+    TableVersion.bump_on_commit(sender)
+
+
+@receiver(pre_save, sender=InventoryItem)
+def remember_previous_item(sender, instance, **kwargs):
+    # A moved item must also drop out of its previous category's cached list,
+    # the stock summary needs the old values to compute its deltas, and
+    # change events report which fields changed
+    instance._previous_category_name = None
+    instance._previous_name = None
+    instance._previous_stock = None
+    if instance.pk:
+        # Locked, like summary.current_stock_rows, so concurrent saves of the
+        # same item apply their deltas one after another; InventoryItem.save
+        # holds the lock in a transaction until post_save
+        queryset = InventoryItem.objects.filter(pk=instance.pk)
+        if connection.features.has_select_for_update_of:
+            queryset = queryset.select_for_update(of=('self',))
+        elif connection.features.has_select_for_update:
+            queryset = queryset.select_for_update()
+        previous = queryset.values('category__name', 'name', *STOCK_FIELDS).first()
+        if previous:
+            instance._previous_category_name = previous.pop('category__name')
+            instance._previous_name = previous.pop('name')
+            instance._previous_stock = previous
+
+
+@receiver(post_save, sender=InventoryItem)
+def update_summary_on_save(sender, instance, **kwargs):
+    apply_item_changes([(getattr(instance, '_previous_stock', None), stock_row(instance))])
+
+
+@receiver(post_save, sender=InventoryItem)
+def record_quantity_change(sender, instance, **kwargs):
+    previous = getattr(instance, '_previous_stock', None)
+    ledger.record_change(instance.pk, previous['quantity'] if previous else 0, instance.quantity)
+
+
+@receiver(post_delete, sender=InventoryItem)
+def update_summary_on_delete(sender, instance, **kwargs):
+    apply_item_changes([(stock_row(instance), None)])
+
+
+@receiver(post_save, sender=InventoryItem)
+def publish_item_saved(sender, instance, **kwargs):
+    previous = getattr(instance, '_previous_stock', None)
+    if previous is None:
+        events.item_changed(instance.pk, events.CREATED, list(events.EVENT_FIELDS.values()), instance.quantity)
+    else:
+        previous = dict(previous, name=instance._previous_name)
+        events.item_changed(instance.pk, events.UPDATED, events.changed_fields(previous, instance), instance.quantity)
+
+
+@receiver(post_delete, sender=InventoryItem)
+def publish_item_deleted(sender, instance, **kwargs):
+    events.item_changed(instance.pk, events.DELETED)
+
+
+@receiver(post_save, sender=InventoryUpdateRequest)
+def publish_request_saved(sender, instance, created, **kwargs):
+    action = events.CREATED if created else events.UPDATED
+    events.request_changed(instance.pk, instance.item_id, action, instance.status)
+
+
+@receiver(post_delete, sender=InventoryUpdateRequest)
+def publish_request_deleted(sender, instance, **kwargs):
+    events.request_changed(instance.pk, instance.item_id, events.DELETED, instance.status)
+
+
+@receiver(post_delete, sender=InventoryItem)
+def record_tombstone(sender, instance, **kwargs):
+    # Also runs for items removed by a category delete's cascade
+    InventoryItemTombstone.objects.create(item_id=instance.pk)
+
+
+@receiver(post_save, sender=InventoryItem)
+def index_item_name(sender, instance, **kwargs):
+    item_id, name = instance.pk, instance.name
+    transaction.on_commit(lambda: name_search.item_saved(item_id, name))
+
+
+@receiver(post_delete, sender=InventoryItem)
+def unindex_item_name(sender, instance, **kwargs):
+    item_id = instance.pk
+    transaction.on_commit(lambda: name_search.item_deleted(item_id))
+
+
+@receiver(post_save, sender=Category)
+def index_category_name(sender, instance, **kwargs):
+    category_id, name = instance.pk, instance.name
+    transaction.on_commit(lambda: name_search.category_saved(category_id, name))
+
+
+@receiver(post_delete, sender=Category)
+def unindex_category_name(sender, instance, **kwargs):
+    category_id = instance.pk
+    transaction.on_commit(lambda: name_search.category_deleted(category_id))
+
+
+@receiver(post_save, sender=Category)
+def touch_renamed_category_items(sender, instance, created, **kwargs):
+    # Items render their category by name, so delta sync must resend them
+    previous = getattr(instance, '_previous_name', None)
+    if not created and previous and previous != instance.name:
+        InventoryItem.objects.filter(category=instance).update(last_updated=timezone.now())
+
+
+@receiver(post_save, sender=Category)
+def create_category_summary(sender, instance, created, **kwargs):
+    if created:
+        CategoryStockSummary.objects.get_or_create(category=instance)
+
+
+@receiver(post_save, sender=InventoryItem)
+@receiver(post_delete, sender=InventoryItem)
+def invalidate_item(sender, instance, **kwargs):
+    names = [ITEMS, item_generation(instance.pk), category_generation(instance.category.name)]
+    previous = getattr(instance, '_previous_category_name', None)
+    if previous:
+        names.append(category_generation(previous))
+    response_cache.bump_on_commit(*names)
+
+
+@receiver(pre_save, sender=Category)
+def remember_category_name(sender, instance, **kwargs):
+    instance._previous_name = None
+    if instance.pk:
+        instance._previous_name = Category.objects.filter(pk=instance.pk).values_list('name', flat=True).first()
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_category(sender, instance, **kwargs):
+    # Items render their category by name, so item lists and details follow
+    names = [CATEGORIES, CATEGORY_NAMES, ITEMS, category_generation(instance.name)]
+    previous = getattr(instance, '_previous_name', None)
+    if previous:
+        names.append(category_generation(previous))
+    response_cache.bump_on_commit(*names)
+
+
+@receiver(post_save, sender=InventoryUpdateRequest)
+def invalidate_approved_item(sender, instance, **kwargs):
+    # Approvals may write the quantity with update(), which sends no item signal
+    if instance.status != 'approved':
+        return
+    category_name = InventoryItem.objects.filter(pk=instance.item_id).values_list('category__name', flat=True).first()
+    names = [ITEMS, item_generation(instance.item_id)]
+    if category_name:
+        names.append(category_generation(category_name))
+    response_cache.bump_on_commit(*names)
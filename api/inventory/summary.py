@@ -0,0 +1,144 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import connection, transaction
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Category, CategoryStockSummary, InventoryItem, critical_stock, low_stock, out_of_stock
+
+STOCK_FIELDS = ['category_id', 'quantity', 'price', 'recommended_quantity', 'warning_quantity']
+COUNTERS = ['item_count', 'total_quantity', 'stock_value', 'low_stock_count', 'critical_count', 'out_of_stock_count']
+VALUE_FIELD = DecimalField(max_digits=20, decimal_places=2)
+
+
+def stock_row(item):
+    return {field: getattr(item, field) for field in STOCK_FIELDS}
+
+
+def current_stock_rows(item_ids):
+    """
+    {id: stock row} for items about to be rewritten in bulk. Call inside the
+    writing transaction; rows are locked where the database supports it so
+    the old values the deltas are based on cannot change underneath.
+    """
+    queryset = InventoryItem.objects.filter(pk__in=item_ids)
+    if connection.features.has_select_for_update:
+        queryset = queryset.select_for_update()
+    return {row.pop('id'): row for row in queryset.order_by('id').values('id', *STOCK_FIELDS)}
+
+
+def item_counters(row):
+    """One item's share of its category's counters; mirrors the Q rules in models.py."""
+    quantity = int(row['quantity'])
+    recommended = row['recommended_quantity'] or 0
+    warning = row['warning_quantity'] or 0
+    critical = warning > 0 and quantity <= warning
+    return {
+        'item_count': 1,
+        'total_quantity': quantity,
+        'stock_value': quantity * Decimal(str(row['price'])),
+        'low_stock_count': int(critical or (recommended > 0 and quantity <= recommended)),
+        'critical_count': int(critical),
+        'out_of_stock_count': int(quantity <= 0),
+    }
+
+
+class SummaryDelta:
+    """
+    Collects counter changes per category and writes them as
+    UPDATE ... SET counter = counter + delta, so concurrent writers never
+    overwrite each other's totals. Call apply() inside the transaction that
+    changed the items.
+    """
+
+    def __init__(self):
+        self.deltas = defaultdict(lambda: dict.fromkeys(COUNTERS, 0))
+
+    def add(self, row, sign=1):
+        counters = self.deltas[row['category_id']]
+        for name, value in item_counters(row).items():
+            counters[name] += sign * value
+
+    def remove(self, row):
+        self.add(row, sign=-1)
+
+    def change(self, old_row, new_row):
+        if old_row is not None:
+            self.remove(old_row)
+        if new_row is not None:
+            self.add(new_row)
+
+    def apply(self):
+        now = timezone.now()
+        # A fixed order keeps concurrent transactions from deadlocking on rows
+        for category_id in sorted(self.deltas):
+            changes = {name: F(name) + delta for name, delta in self.deltas[category_id].items() if delta}
+            if changes:
+                # Categories without a summary row are left for rebuild_stock_summary
+                CategoryStockSummary.objects.filter(category_id=category_id).update(updated_at=now, **changes)
+        self.deltas.clear()
+
+
+def apply_item_changes(changes):
+    """Apply (old_row, new_row) pairs; either side may be None for a create or delete."""
+    delta = SummaryDelta()
+    for old_row, new_row in changes:
+        delta.change(old_row, new_row)
+    delta.apply()
+
+
+def compute_summaries():
+    """Recompute every category's counters from the items table in one grouped query."""
+    rows = Category.objects.annotate(
+        item_count=Count('inventoryitem'),
+        total_quantity=Coalesce(Sum('inventoryitem__quantity'), 0),
+        stock_value=Coalesce(
+            Sum(ExpressionWrapper(F('inventoryitem__quantity') * F('inventoryitem__price'), output_field=VALUE_FIELD)),
+            Value(0), output_field=VALUE_FIELD,
+        ),
+        low_stock_count=Count('inventoryitem', filter=low_stock('inventoryitem__')),
+        critical_count=Count('inventoryitem', filter=critical_stock('inventoryitem__')),
+        out_of_stock_count=Count('inventoryitem', filter=out_of_stock('inventoryitem__')),
+    ).values('id', *COUNTERS)
+    return {row.pop('id'): _normalize(row) for row in rows}
+
+
+def _normalize(counters):
+    counters['stock_value'] = Decimal(counters['stock_value']).quantize(Decimal('0.01'))
+    return counters
+
+
+def find_drift():
+    """Return {category_id: {counter: (expected, stored)}} for every mismatch; missing rows store None."""
+    expected = compute_summaries()
+    stored = {row.pop('category_id'): _normalize(row) for row in CategoryStockSummary.objects.values('category_id', *COUNTERS)}
+    drift = {}
+    for category_id, counters in expected.items():
+        actual = stored.get(category_id)
+        mismatched = {
+            name: (value, actual[name] if actual else None)
+            for name, value in counters.items()
+            if actual is None or actual[name] != value
+        }
+        if mismatched:
+            drift[category_id] = mismatched
+    return drift
+
+
+def rebuild():
+    """Overwrite every summary row with freshly computed counters; returns the row count."""
+    now = timezone.now()
+    with transaction.atomic():
+        summaries = [
+            CategoryStockSummary(category_id=category_id, updated_at=now, **counters)
+            for category_id, counters in compute_summaries().items()
+        ]
+        CategoryStockSummary.objects.bulk_create(
+            summaries,
+            update_conflicts=True,
+            unique_fields=['category'],
+            update_fields=COUNTERS + ['updated_at'],
+        )
+    return len(summaries)
@@ -1,3 +1,1382 @@
-from django.test import TestCase
+import base64
+import contextlib
+import csv
+import io
+import json
+import random
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from decimal import Decimal
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.core.cache import caches
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import DatabaseError, OperationalError, close_old_connections, connection, connections
+from django.test.utils import CaptureQueriesContext
+from django.test import AsyncRequestFactory, RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from backend.metrics import registry as metrics_registry
+from backend.timing import RequestMetrics, active_metrics
+from backend.routers import PIN_HEADER, ReplicaRouter
+from user_authentication.models import User
+from .async_views import AsyncInventoryItemAPIView, AsyncCategoryAPIView, AsyncInventoryUpdateRequestAPIView
+from .cache import response_cache
+from .benchmark import ApiBenchmark, scenarios
+from .changes import ChangeFeed
+from .events import EventHub, event_hub
+from .forecast import ReorderForecaster, suggestion_rows
+from .ledger import compute_rollups, rebuild as rebuild_rollups
+from .search import TrigramIndex, name_search
+from .seed import InventorySeeder
+from .fast_serializers import InventoryItemValuesSerializer, CategoryValuesSerializer, InventoryUpdateRequestValuesSerializer
+from .bulk_io import ItemImporter
+from .models import (
+    Category, CategoryStockSummary, InventoryItem, InventoryItemTombstone, InventoryUpdateRequest, RequestProfile, SlowQuery,
+    StockMovement, StockRollup, TableVersion,
+)
+from .permissions import IsManagerOrAdmin
+from .services import apply_request_action, bulk_upsert_items, APPROVE
+from .summary import find_drift
+from .serializers import InventoryItemSerializer, CategorySerializer, InventoryUpdateRequestSerializer
+from .views import InventoryItemAPIView, CategoryAPIView, InventoryUpdateRequestAPIView
+
+ROW_COUNTS = [10, 1000, 10000]
+
+# The query budgets below are for the uncached path
+WITHOUT_RESPONSE_CACHE = override_settings(CACHES={
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    'inventory': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'},
+})
+
+
+@WITHOUT_RESPONSE_CACHE
+class QueryCountTests(TestCase):
+    """
+    Every read endpoint must run a fixed number of queries however many
+    rows it returns. Each test grows the table through ROW_COUNTS and
+    checks the same budget at every size.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.objects.create(name='Linen')
+        cls.submitter = User.objects.create_user('staff@example.com', 'Sam', 'Staff', 'password123')
+        cls.manager = User.objects.create_user('boss@example.com', 'Max', 'Boss', 'password123', role=User.MANAGER)
+
+    def grow_items(self, count):
+        existing = InventoryItem.objects.count()
+        InventoryItem.objects.bulk_create([
+            InventoryItem(
+                name=f'Item {i}', quantity=i % 20, price='1.50', category=self.category,
+                recommended_quantity=10, warning_quantity=5,
+            )
+            for i in range(existing, count)
+        ])
+
+    def grow_requests(self, count):
+        self.grow_items(count)
+        existing = InventoryUpdateRequest.objects.count()
+        item_ids = list(InventoryItem.objects.order_by('id').values_list('id', flat=True)[existing:count])
+        InventoryUpdateRequest.objects.bulk_create([
+            InventoryUpdateRequest(
+                item_id=item_id, requested_quantity=3, submitted_by=self.submitter,
+                approved_by=self.manager if i % 2 else None,
+                status='approved' if i % 2 else 'pending',
+            )
+            for i, item_id in enumerate(item_ids, start=existing)
+        ])
+
+    def assertGetQueries(self, url, num):
+        # Every read also looks up the table versions for its ETag
+        with self.assertNumQueries(num + 1):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_item_endpoints(self):
+        for count in ROW_COUNTS:
+            with self.subTest(rows=count):
+                self.grow_items(count)
+                item = InventoryItem.objects.first()
+
+                response = self.assertGetQueries(reverse('inventory_items'), 1)
+                self.assertEqual(len(response.json()), count)
+                self.assertGetQueries(reverse('inventory_items') + '?category=Linen&low_stock=1&ordering=-name', 1)
+                self.assertGetQueries(reverse('inventory_items') + '?page_size=500', 1)
+                self.assertGetQueries(reverse('inventory_item_detail', args=[item.id]), 1)
+                # Category lookup plus the item list
+                self.assertGetQueries(reverse('inventory_items_by_category', args=['Linen']), 2)
+                # Per-category summary rows and two preview lists
+                self.assertGetQueries(reverse('inventory_dashboard'), 3)
+
+    def test_category_endpoints(self):
+        for count in ROW_COUNTS:
+            with self.subTest(rows=count):
+                existing = Category.objects.count()
+                Category.objects.bulk_create([Category(name=f'Category {i}') for i in range(existing, count)])
+
+                response = self.assertGetQueries(reverse('categories'), 1)
+                self.assertEqual(len(response.json()), count)
+                self.assertGetQueries(reverse('category_detail', args=[self.category.id]), 1)
+
+    def test_update_request_endpoints(self):
+        for count in ROW_COUNTS:
+            with self.subTest(rows=count):
+                self.grow_requests(count)
+                update_request = InventoryUpdateRequest.objects.filter(status='approved').first()
+
+                response = self.assertGetQueries(reverse('inventory_requests'), 1)
+                self.assertEqual(len(response.json()), count)
+                self.assertGetQueries(reverse('inventory_request_detail', args=[update_request.id]), 1)
+
+
+class ValuesSerializerTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        linen = Category.objects.create(name='Linen', description='Towels & sheets')
+        food = Category.objects.create(name='Food')
+        user = User.objects.create_user('staff@example.com', 'Sam', 'Staff', 'password123')
+        for i, price in enumerate(['0.10', '12.5', '99999999.99', Decimal('3')]):
+            item = InventoryItem.objects.create(
+                name=f'Item "{i}"', quantity=-i, price=price, category=linen if i % 2 else food,
+                recommended_quantity=i, warning_quantity=0,
+            )
+            InventoryUpdateRequest.objects.create(
+                item=item, requested_quantity=i, submitted_by=user,
+                approved_by=user if i % 2 else None, approved_at=timezone.now() if i % 2 else None,
+                status='approved' if i % 2 else 'pending',
+            )
+
+    def assertSameJSON(self, values_class, serializer_class, queryset):
+        expected = JSONRenderer().render(serializer_class(queryset.order_by('id'), many=True).data)
+        actual = JSONRenderer().render(values_class.serialize(values_class.get_values(queryset.order_by('id'))))
+        self.assertEqual(actual, expected)
+
+    def test_items_match_model_serializer(self):
+        self.assertSameJSON(InventoryItemValuesSerializer, InventoryItemSerializer, InventoryItem.objects.all())
+
+    def test_categories_match_model_serializer(self):
+        self.assertSameJSON(CategoryValuesSerializer, CategorySerializer, Category.objects.all())
+
+    def test_update_requests_match_model_serializer(self):
+        self.assertSameJSON(InventoryUpdateRequestValuesSerializer, InventoryUpdateRequestSerializer, InventoryUpdateRequest.objects.all())
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.objects.create(name='Linen')
+        InventoryItem.objects.create(name='Towel', quantity=4, price='2.00', category=cls.category)
+
+    def test_unchanged_list_returns_not_modified(self):
+        response = self.client.get(reverse('inventory_items'))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('must-revalidate', response['Cache-Control'])
+        # Authenticated responses must not be handed to someone else by a shared cache
+        self.assertIn('private', response['Cache-Control'])
+        self.assertFalse(response.has_header('Last-Modified'))
+
+        with self.assertNumQueries(1):
+            cached = self.client.get(reverse('inventory_items'), HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(cached.status_code, 304)
+        self.assertEqual(cached.content, b'')
+
+    def test_writes_change_the_etag(self):
+        items_etag = self.client.get(reverse('inventory_items'))['ETag']
+        categories_etag = self.client.get(reverse('categories'))['ETag']
+
+        # Renaming a category changes how items render, so both lists move on
+        with self.captureOnCommitCallbacks(execute=True):
+            self.category.name = 'Bath'
+            self.category.save()
+        response = self.client.get(reverse('inventory_items'), HTTP_IF_NONE_MATCH=items_etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], items_etag)
+        response = self.client.get(reverse('categories'), HTTP_IF_NONE_MATCH=categories_etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_error_responses_carry_no_validators(self):
+        response = self.client.get(reverse('inventory_item_detail', args=[999]))
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(response.has_header('ETag'))
+
+
+class ResponseCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.linen = Category.objects.create(name='Linen')
+        cls.food = Category.objects.create(name='Food')
+        cls.towel = InventoryItem.objects.create(name='Towel', quantity=4, price='2.00', category=cls.linen)
+        cls.apple = InventoryItem.objects.create(name='Apple', quantity=9, price='0.50', category=cls.food)
+
+    def setUp(self):
+        caches['inventory'].clear()
+        response_cache.reset_stats()
+
+    def test_repeated_reads_are_served_from_cache(self):
+        self.client.get(reverse('inventory_items'))
+        # Only the ETag version lookup reaches the database
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('inventory_items'))
+        self.assertEqual(len(response.json()), 2)
+        self.assertEqual(response_cache.stats()['hits'], 1)
+        self.assertEqual(response_cache.stats()['misses'], 1)
+
+    def test_item_write_only_invalidates_its_category(self):
+        linen_url = reverse('inventory_items_by_category', args=['Linen'])
+        food_url = reverse('inventory_items_by_category', args=['Food'])
+        self.client.get(linen_url)
+        self.client.get(food_url)
+
+        # Generations only move once the write commits
+        with self.captureOnCommitCallbacks(execute=True):
+            self.towel.quantity = 1
+            self.towel.save()
+            self.client.get(linen_url)
+            self.assertEqual(response_cache.stats()['hits'], 1)
+        response_cache.reset_stats()
+
+        self.assertEqual(self.client.get(linen_url).json()[0]['quantity'], 1)
+        self.client.get(food_url)
+        self.assertEqual(response_cache.stats()['misses'], 1)
+        self.assertEqual(response_cache.stats()['hits'], 1)
+
+    def test_moving_an_item_invalidates_both_categories(self):
+        food_url = reverse('inventory_items_by_category', args=['Food'])
+        self.assertEqual(len(self.client.get(food_url).json()), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.towel.category = self.food
+            self.towel.save()
+        self.assertEqual(len(self.client.get(food_url).json()), 2)
+
+    def test_category_rename_invalidates_item_details(self):
+        url = reverse('inventory_item_detail', args=[self.towel.id])
+        self.assertEqual(self.client.get(url).json()['category'], 'Linen')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.linen.name = 'Bath'
+            self.linen.save()
+        self.assertEqual(self.client.get(url).json()['category'], 'Bath')
+        self.assertEqual(self.client.get(reverse('categories')).json()[0]['name'], 'Bath')
+
+
+class BulkRequestActionTests(TestCase):
+    client_class = APIClient
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.objects.create(name='Linen')
+        cls.employee = User.objects.create_user('staff@example.com', 'Sam', 'Staff', 'password123')
+        cls.manager = User.objects.create_user('boss@example.com', 'Max', 'Boss', 'password123', role=User.MANAGER)
+
+    def setUp(self):
+        self.client.force_authenticate(self.manager)
+
+    def create_requests(self, count):
+        items = InventoryItem.objects.bulk_create([
+            InventoryItem(name=f'Item {i}', quantity=0, price='1.00', category=self.category) for i in range(count)
+        ])
+        return InventoryUpdateRequest.objects.bulk_create([
+            InventoryUpdateRequest(item=item, requested_quantity=10 + i, submitted_by=self.employee)
+            for i, item in enumerate(items)
+        ])
+
+    def post(self, action, request_ids):
+        return self.client.post(
+            reverse('inventory_request_bulk_action'), {'action': action, 'request_ids': request_ids}, format='json'
+        )
+
+    def test_approve_applies_quantities_and_reports_each_id(self):
+        first, second, done = self.create_requests(3)
+        InventoryUpdateRequest.objects.filter(pk=done.pk).update(status='rejected')
+
+        response = self.post('approve', [first.id, second.id, done.id, 999999])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([r.get('status', r.get('error')) for r in response.json()['results']], [
+            'approved', 'approved',
+            'Update request not found or not in pending status', 'Update request not found or not in pending status',
+        ])
+        first.refresh_from_db()
+        self.assertEqual(first.status, 'approved')
+        self.assertEqual(first.approved_by, self.manager)
+        self.assertEqual(InventoryItem.objects.get(pk=second.item_id).quantity, 11)
+        self.assertEqual(InventoryItem.objects.get(pk=done.item_id).quantity, 0)
+
+    def test_reject_leaves_items_untouched(self):
+        update_request, = self.create_requests(1)
+        response = self.post('reject', [update_request.id])
+        self.assertEqual(response.json()['results'], [{'id': update_request.id, 'status': 'rejected'}])
+        self.assertEqual(InventoryItem.objects.get(pk=update_request.item_id).quantity, 0)
+
+    def test_query_count_does_not_depend_on_batch_size(self):
+        counts = []
+        for size in [5, 500]:
+            ids = [r.id for r in self.create_requests(size)]
+            with CaptureQueriesContext(connection) as queries:
+                response = self.post('approve', ids)
+            self.assertEqual(response.status_code, 200)
+            # Ledger and rollup rows are inserted in batches sized by the
+            # backend's parameter limit; the rest is a fixed set of statements
+            ledger_inserts = [
+                query for query in queries
+                if query['sql'].startswith(('INSERT INTO "inventory_stockmovement"', 'INSERT INTO "inventory_stockrollup"'))
+            ]
+            self.assertLessEqual(len(ledger_inserts), size // 50 + 2)
+            counts.append(len(queries) - len(ledger_inserts))
+        self.assertEqual(counts[0], counts[1])
+
+    def test_employees_cannot_use_bulk_actions(self):
+        self.client.force_authenticate(self.employee)
+        self.assertEqual(self.post('approve', [1]).status_code, 403)
+
+    def test_rejects_invalid_payload(self):
+        self.assertEqual(self.post('approve', []).status_code, 400)
+        self.assertEqual(self.post('archive', [1]).status_code, 400)
+
+
+class ConcurrentApprovalTests(TransactionTestCase):
+    """
+    Several managers work the same approval queue from parallel threads
+    while others edit item prices. Every request must be approved exactly
+    once, and neither side may overwrite the other's columns.
+    """
+    workers = 8
+    item_count = 60
+
+    def setUp(self):
+        category = Category.objects.create(name='Linen')
+        employee = User.objects.create_user('staff@example.com', 'Sam', 'Staff', 'password123')
+        self.managers = User.objects.bulk_create([
+            User(email=f'boss{i}@example.com', first_name='Max', last_name='Boss', role=User.MANAGER)
+            for i in range(self.workers)
+        ])
+        self.items = InventoryItem.objects.bulk_create([
+            InventoryItem(name=f'Item {i}', quantity=0, price='1.00', category=category) for i in range(self.item_count)
+        ])
+        self.requests = InventoryUpdateRequest.objects.bulk_create([
+            InventoryUpdateRequest(item=item, requested_quantity=100 + i, submitted_by=employee)
+            for i, item in enumerate(self.items)
+        ])
+
+    def run_in_threads(self, targets):
+        errors = []
+
+        def run(target):
+            try:
+                target()
+            except Exception as exc:  # surfaced through the assertion below
+                errors.append(exc)
+            finally:
+                close_old_connections()
+                connection.close()
+
+        threads = [threading.Thread(target=run, args=(target,)) for target in targets]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+
+    def retry_locked(self, func, attempts=200):
+        # SQLite has no row locks and reports a busy database instead of waiting
+        for attempt in range(attempts):
+            try:
+                return func()
+            except OperationalError as exc:
+                if 'locked' not in str(exc):
+                    raise
+                time.sleep(min(0.001 * 2 ** attempt, 0.05))
+        self.fail(f'Database still locked after {attempts} attempts')
+
+    def test_parallel_approvals_apply_each_request_once(self):
+        approved = []
+        lock = threading.Lock()
+        request_ids = [r.id for r in self.requests]
+
+        def approve(manager):
+            ids = request_ids[:]
+            random.shuffle(ids)
+            for start in range(0, len(ids), 5):
+                batch = ids[start:start + 5]
+                outcomes = self.retry_locked(lambda: apply_request_action(batch, APPROVE, manager))
+                with lock:
+                    approved.extend(o['id'] for o in outcomes if o.get('status') == 'approved')
+
+        def edit_prices(worker):
+            for item in self.items:
+                self.retry_locked(
+                    lambda: InventoryItem.objects.filter(pk=item.pk).update(price=Decimal('2.00') + worker)
+                )
+
+        self.run_in_threads(
+            [lambda m=m: approve(m) for m in self.managers] +
+            [lambda w=w: edit_prices(w) for w in range(2)]
+        )
+
+        self.assertEqual(sorted(approved), sorted(request_ids))
+        self.assertEqual(InventoryUpdateRequest.objects.filter(status='approved').count(), len(request_ids))
+        for update_request in InventoryUpdateRequest.objects.select_related('item'):
+            self.assertEqual(update_request.item.quantity, update_request.requested_quantity)
+            self.assertIn(update_request.item.price, [Decimal('2.00'), Decimal('3.00')])
+
+
+class ItemExportImportTests(TestCase):
+    client_class = APIClient
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.objects.create(name='Linen')
+        cls.towel = InventoryItem.objects.create(name='Towel', quantity=4, price='2.00', category=cls.category)
+        cls.manager = User.objects.create_user('boss@example.com', 'Max', 'Boss', 'password123', role=User.MANAGER)
+
+    def setUp(self):
+        self.client.force_authenticate(self.manager)
+
+    def test_csv_export_round_trips_through_import(self):
+        response = self.client.get(reverse('inventory_items_export', args=['csv']))
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        exported = b''.join(response.streaming_content).decode()
+        self.assertIn(f'{self.towel.id},Towel,Linen,4,2.00,0,0,', exported)
+
+        edited = exported.replace(',Towel,Linen,4,', ',Bath towel,Linen,7,') + ',Sheet,Linen,2,3.50,4,1,\r\n'
+        edited += ',Pillow,Linen,-1,3.50,,,\r\n,Blanket,Nowhere,1,1.999,,,\r\n'
+        upload = SimpleUploadedFile('items.csv', edited.encode())
+        response = self.client.post(reverse('inventory_items_import'), {'file': upload})
+
+        result = response.json()
+        self.assertEqual((result['created'], result['updated'], result['failed']), (1, 1, 2))
+        self.assertEqual(result['errors'][0], {'line': 4, 'errors': {'quantity': 'Quantity cannot be negative.'}})
+        self.assertEqual(set(result['errors'][1]['errors']), {'category', 'price'})
+        self.towel.refresh_from_db()
+        self.assertEqual((self.towel.name, self.towel.quantity), ('Bath towel', 7))
+        self.assertTrue(InventoryItem.objects.filter(name='Sheet', warning_quantity=1).exists())
+
+    def test_unreadable_files_are_rejected_with_their_line(self):
+        header = b'name,category,quantity,price\r\n'
+        upload = SimpleUploadedFile('items.csv', header + b'Sheet,Linen,2,3.50\r\nSh\xe9et,Linen,2,3.50\r\n')
+        response = self.client.post(reverse('inventory_items_import'), {'file': upload})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['line'], 3)
+
+        too_long = b'x' * (csv.field_size_limit() + 1)
+        upload = SimpleUploadedFile('items.csv', header + b'Sheet,Linen,2,3.50\r\n' + too_long + b',Linen,2,3.50\r\n')
+        response = self.client.post(reverse('inventory_items_import'), {'file': upload})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['line'], 3)
+        # The valid rows before the unreadable line are still written
+        self.assertEqual(response.json()['created'], 1)
+        self.assertEqual(InventoryItem.objects.filter(name='Sheet').count(), 2)
+
+    def test_import_command_reports_unreadable_lines(self):
+        with tempfile.NamedTemporaryFile(suffix='.csv') as upload:
+            upload.write(b'name,category,quantity,price\r\nSheet,Linen,2,3.50\r\nSh\xe9et,Linen,2,3.50\r\n')
+            upload.flush()
+            with self.assertRaisesMessage(CommandError, 'line 3:'):
+                call_command('import_inventory', upload.name, stdout=io.StringIO())
+        self.assertTrue(InventoryItem.objects.filter(name='Sheet').exists())
+
+    def test_ndjson_import_can_create_categories(self):
+        lines = b'{"name": "Soap", "category": "Bath", "quantity": 3, "price": "1.25"}\nnot json\n'
+        upload = SimpleUploadedFile('items.ndjson', lines)
+        response = self.client.post(reverse('inventory_items_import') + '?create_categories=1', {'file': upload})
+        self.assertEqual(response.json()['created'], 1)
+        self.assertEqual(response.json()['errors'][0]['line'], 2)
+        self.assertEqual(InventoryItem.objects.get(name='Soap').category.name, 'Bath')
+
+
+class BulkItemUpsertTests(TestCase):
+    client_class = APIClient
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.linen = Category.objects.create(name='Linen')
+        cls.food = Category.objects.create(name='Food')
+        cls.manager = User.objects.create_user('boss@example.com', 'Max', 'Boss', 'password123', role=User.MANAGER)
+
+    def setUp(self):
+        self.client.force_authenticate(self.manager)
+
+    def item_rows(self, count, **overrides):
+        return [dict({
+            'name': f'Item {i}', 'category': 'Linen', 'quantity': i, 'price': '1.00',
+            'recommended_quantity': 10, 'warning_quantity': 2,
+        }, **overrides) for i in range(count)]
+
+    def post(self, rows):
+        return self.client.post(reverse('inventory_items_bulk'), rows, format='json')
+
+    def test_creates_and_updates_in_one_request(self):
+        existing = InventoryItem.objects.create(name='Towel', quantity=1, price='2.00', category=self.linen)
+        rows = self.item_rows(2) + [{'id': existing.id, 'name': 'Towel', 'category': 'Food', 'quantity': 9, 'price': '2.50'}]
+
+        response = self.post(rows)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['name'] for row in response.json()], ['Item 0', 'Item 1', 'Towel'])
+        existing.refresh_from_db()
+        self.assertEqual((existing.quantity, existing.category, str(existing.price)), (9, self.food, '2.50'))
+
+    def test_update_rows_keep_the_fields_they_leave_out(self):
+        towel = InventoryItem.objects.create(
+            name='Towel', quantity=1, price='2.00', category=self.linen, recommended_quantity=10, warning_quantity=3,
+        )
+        response = self.post([{'id': towel.id, 'quantity': 7}])
+        self.assertEqual(response.status_code, 200)
+        towel.refresh_from_db()
+        self.assertEqual(
+            (towel.name, towel.quantity, str(towel.price), towel.category, towel.recommended_quantity, towel.warning_quantity),
+            ('Towel', 7, '2.00', self.linen, 10, 3),
+        )
+        # Supplied fields are still checked against the stored ones
+        response = self.post([{'id': towel.id, 'warning_quantity': 11}])
+        self.assertEqual(response.status_code, 400)
+
+    def test_saving_a_grid_takes_a_handful_of_queries(self):
+        created = self.post(self.item_rows(300)).json()
+        edits = [dict(row, quantity=row['quantity'] + 1) for row in created]
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.post(edits).status_code, 200)
+        # bulk_update and the ledger insert may split into a few batches on
+        # backends with a low bound-parameter limit, but never go per row
+        self.assertLessEqual(len(queries), 16)
+
+    def test_invalid_rows_are_reported_and_nothing_is_written(self):
+        rows = self.item_rows(3)
+        rows[1]['warning_quantity'] = 50
+        rows[2]['category'] = 'Nowhere'
+        rows.append({'id': 999999, 'name': 'Ghost', 'category': 'Linen', 'quantity': 1, 'price': '1.00'})
+
+        response = self.post(rows)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([error['index'] for error in response.json()['errors']], [1, 2, 3])
+        self.assertFalse(InventoryItem.objects.exists())
+
+
+class StockSummaryTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.linen = Category.objects.create(name='Linen')
+        cls.food = Category.objects.create(name='Food')
+        cls.manager = User.objects.create_user('boss@example.com', 'Max', 'Boss', 'password123', role=User.MANAGER)
+
+    def create_item(self, name, quantity, category=None, **fields):
+        fields.setdefault('price', '2.50')
+        fields.setdefault('recommended_quantity', 10)
+        fields.setdefault('warning_quantity', 2)
+        return InventoryItem.objects.create(name=name, quantity=quantity, category=category or self.linen, **fields)
+
+    def summary(self, category):
+        return CategoryStockSummary.objects.values(
+            'item_count', 'total_quantity', 'stock_value', 'low_stock_count', 'critical_count', 'out_of_stock_count',
+        ).get(category=category)
+
+    def test_item_writes_keep_counters_in_step(self):
+        towel = self.create_item('Towel', 20)
+        sheet = self.create_item('Sheet', 1)
+        self.create_item('Pillow', 0)
+        self.assertEqual(self.summary(self.linen), {
+            'item_count': 3, 'total_quantity': 21, 'stock_value': Decimal('52.50'),
+            'low_stock_count': 2, 'critical_count': 2, 'out_of_stock_count': 1,
+        })
+
+        towel.quantity = 5
+        towel.price = '3.00'
+        towel.save()
+        sheet.category = self.food
+        sheet.save()
+        InventoryItem.objects.get(name='Pillow').delete()
+
+        self.assertEqual(self.summary(self.linen), {
+            'item_count': 1, 'total_quantity': 5, 'stock_value': Decimal('15.00'),
+            'low_stock_count': 1, 'critical_count': 0, 'out_of_stock_count': 0,
+        })
+        self.assertEqual(self.summary(self.food)['item_count'], 1)
+        self.assertEqual(find_drift(), {})
+
+    def test_bulk_writes_keep_counters_in_step(self):
+        towel = self.create_item('Towel', 20)
+        update_request = InventoryUpdateRequest.objects.create(item=towel, requested_quantity=1, submitted_by=self.manager)
+        apply_request_action([update_request.id], APPROVE, self.manager)
+
+        bulk_upsert_items([
+            {'id': towel.id, 'name': 'Towel', 'category': 'Food', 'quantity': 7, 'price': '1.00'},
+            {'name': 'Rice', 'category': 'Food', 'quantity': 0, 'price': '4.00'},
+        ])
+        ItemImporter().run(enumerate([
+            {'id': towel.id, 'name': 'Towel', 'category': 'Linen', 'quantity': 3, 'price': '1.00',
+             'recommended_quantity': 10, 'warning_quantity': 3},
+            {'name': 'Sheet', 'category': 'Linen', 'quantity': 12, 'price': '9.99'},
+        ], start=1))
+
+        self.assertEqual(find_drift(), {})
+        self.assertEqual(self.summary(self.linen)['critical_count'], 1)
+        self.assertEqual(self.summary(self.food)['out_of_stock_count'], 1)
+
+    def test_dashboard_reads_the_summary(self):
+        self.create_item('Towel', 0)
+        self.create_item('Rice', 4, category=self.food, price='1.25')
+        totals = self.client.get(reverse('inventory_dashboard')).json()['totals']
+        self.assertEqual(totals, {
+            'total_items': 2, 'total_quantity': 4, 'stock_value': '5.00',
+            'low_stock_items': 2, 'critical_items': 1, 'out_of_stock_items': 1, 'total_categories': 2,
+        })
+
+    def test_command_reports_and_repairs_drift(self):
+        self.create_item('Towel', 20)
+        CategoryStockSummary.objects.filter(category=self.linen).update(item_count=5)
+        CategoryStockSummary.objects.filter(category=self.food).delete()
+
+        with self.assertRaises(CommandError):
+            call_command('rebuild_stock_summary', '--check', stdout=io.StringIO(), stderr=io.StringIO())
+        call_command('rebuild_stock_summary', stdout=io.StringIO(), stderr=io.StringIO())
+        self.assertEqual(find_drift(), {})
+        self.assertEqual(self.summary(self.linen)['item_count'], 1)
+
+
+class ManagerOnlyItemsView(AsyncInventoryItemAPIView):
+    permission_classes = [IsManagerOrAdmin]
+
+
+@WITHOUT_RESPONSE_CACHE
+class AsyncViewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        linen = Category.objects.create(name='Linen')
+        food = Category.objects.create(name='Food')
+        cls.manager = User.objects.create_user('boss@example.com', 'Max', 'Boss', 'password123', role=User.MANAGER)
+        cls.employee = User.objects.create_user('staff@example.com', 'Sam', 'Staff', 'password123')
+        for i in range(12):
+            item = InventoryItem.objects.create(
+                name=f'Item {i:02}', quantity=i, price='1.50', category=linen if i % 2 else food,
+                recommended_quantity=5, warning_quantity=2,
+            )
+            InventoryUpdateRequest.objects.create(item=item, requested_quantity=i + 1, submitted_by=cls.employee)
+        cls.item = item
+        cls.category = linen
+
+    def call_async(self, view_class, path, headers=None, **kwargs):
+        request = AsyncRequestFactory().get(path, headers=headers)
+        return async_to_sync(view_class.as_view())(request, **kwargs)
+
+    def test_reads_match_sync_views(self):
+        cases = [
+            (InventoryItemAPIView, AsyncInventoryItemAPIView, '/?ordering=-name&low_stock=1', {}),
+            (InventoryItemAPIView, AsyncInventoryItemAPIView, '/?page_size=5', {}),
+            (InventoryItemAPIView, AsyncInventoryItemAPIView, '/?ordering=price', {}),
+            (InventoryItemAPIView, AsyncInventoryItemAPIView, '/', {'item_id': self.item.id}),
+            (InventoryItemAPIView, AsyncInventoryItemAPIView, '/', {'item_id': 999}),
+            (InventoryItemAPIView, AsyncInventoryItemAPIView, '/', {'category_name': 'Linen'}),
+            (InventoryItemAPIView, AsyncInventoryItemAPIView, '/', {'category_name': 'Nowhere'}),
+            (CategoryAPIView, AsyncCategoryAPIView, '/', {}),
+            (CategoryAPIView, AsyncCategoryAPIView, '/', {'category_id': self.category.id}),
+            (InventoryUpdateRequestAPIView, AsyncInventoryUpdateRequestAPIView, '/?status=pending', {}),
+            (InventoryUpdateRequestAPIView, AsyncInventoryUpdateRequestAPIView, '/', {'request_id': 999}),
+        ]
+        for sync_view, async_view, path, kwargs in cases:
+            with self.subTest(view=async_view.__name__, path=path, **kwargs):
+                expected = sync_view.as_view()(RequestFactory().get(path), **kwargs).render()
+                response = self.call_async(async_view, path, **kwargs)
+                self.assertEqual(response.status_code, expected.status_code)
+                self.assertEqual(json.loads(response.content), json.loads(expected.content))
+                self.assertEqual(response.get('ETag'), expected.get('ETag'))
+
+    def test_not_modified_without_running_the_handler(self):
+        etag = self.call_async(AsyncCategoryAPIView, '/')['ETag']
+        with self.assertNumQueries(1):
+            response = self.call_async(AsyncCategoryAPIView, '/', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+
+    def test_authentication_and_permissions(self):
+        def status_for(token):
+            headers = {'Authorization': f'Bearer {token}'} if token else None
+            return self.call_async(ManagerOnlyItemsView, '/?page_size=1', headers=headers).status_code
+
+        self.assertEqual(status_for(None), 401)
+        self.assertEqual(status_for('not-a-token'), 401)
+        self.assertEqual(status_for(self.employee.tokens()['access']), 403)
+        self.assertEqual(status_for(self.manager.tokens()['access']), 200)
+        # Tokens without claims load the user with the async ORM
+        self.assertEqual(status_for(RefreshToken.for_user(self.manager).access_token), 200)
+
+    def test_writes_are_handed_to_the_sync_view(self):
+        request = AsyncRequestFactory().post('/', {'name': 'Bath'}, content_type='application/json')
+        response = async_to_sync(AsyncCategoryAPIView.as_view())(request)
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(Category.objects.filter(name='Bath').exists())
+
+
+class InventoryEventTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.manager = User.objects.create_user('boss@example.com', 'Max', 'Boss', 'password123', role=User.MANAGER)
+        cls.category = Category.objects.create(name='Linen')
+        cls.item = InventoryItem.objects.create(
+            name='Towel', quantity=5, price='2.00', category=cls.category, recommended_quantity=10, warning_quantity=2,
+        )
+
+    def published(self, since):
+        with event_hub.condition:
+            _, payload = event_hub.since(since)
+        events = []
+        for block in (payload or b'').decode().strip().split('\n\n'):
+            lines = dict(line.split(': ', 1) for line in block.split('\n') if line)
+            if lines:
+                events.append((lines['event'], json.loads(lines['data'])))
+        return events
+
+    def test_writes_publish_compact_events_on_commit(self):
+        start = event_hub.sequence
+        with self.captureOnCommitCallbacks(execute=True):
+            self.item.quantity = 7
+            self.item.price = '2.00'
+            self.item.save()
+            self.assertEqual(self.published(start), [])
+        self.assertEqual(self.published(start), [
+            ('item', {'id': self.item.id, 'action': 'updated', 'fields': ['quantity'], 'quantity': 7}),
+        ])
+
+        update_request = InventoryUpdateRequest.objects.create(item=self.item, requested_quantity=9, submitted_by=self.manager)
+        start = event_hub.sequence
+        with self.captureOnCommitCallbacks(execute=True):
+            apply_request_action([update_request.id], APPROVE, self.manager)
+        self.assertEqual(self.published(start), [
+            ('request', {'id': update_request.id, 'item': self.item.id, 'action': 'updated', 'status': 'approved'}),
+            ('item', {'id': self.item.id, 'action': 'updated', 'fields': ['quantity'], 'quantity': 9}),
+        ])
+
+    def test_bulk_saves_describe_their_changes(self):
+        row = {'name': 'Towel', 'quantity': 9, 'price': '2.00', 'category': 'Linen', 'recommended_quantity': 10, 'warning_quantity': 2}
+        start = event_hub.sequence
+        with self.captureOnCommitCallbacks(execute=True):
+            (_, sheet_id), _ = bulk_upsert_items([dict(row, id=self.item.id), dict(row, name='Sheet')])
+        self.assertEqual(self.published(start), [('reset', {})])
+
+        start = event_hub.sequence
+        with self.captureOnCommitCallbacks(execute=True):
+            bulk_upsert_items([dict(row, id=self.item.id, quantity=4), dict(row, id=sheet_id, name='Sheet', price='3.00')])
+        # Updated rows name their changed fields, so clients patch instead of refetching
+        self.assertEqual(self.published(start), [
+            ('item', {'id': self.item.id, 'action': 'updated', 'fields': ['quantity'], 'quantity': 4}),
+            ('item', {'id': sheet_id, 'action': 'updated', 'fields': ['price'], 'quantity': 9}),
+        ])
+
+    def test_resume_from_last_event_id(self):
+        hub = EventHub(buffer_size=3)
+        hub.publish('item', {'id': 1})
+        first = f'{hub.epoch}-{hub.sequence}'
+        hub.publish('item', {'id': 2})
+
+        self.assertEqual(hub.resume_point(first), 1)
+        stream = hub.stream(first)
+        self.assertIn(b'retry:', next(stream))
+        self.assertEqual(next(stream), f'id: {hub.epoch}-2\nevent: item\ndata: {{"id":2}}\n\n'.encode())
+
+        # Unknown epochs and ids that fell out of the buffer ask for a reload
+        self.assertIn(b'event: reset', next(hub.stream('0-1')))
+        for i in range(3):
+            hub.publish('item', {'id': i})
+        self.assertIn(b'event: reset', next(hub.stream(first)))
+
+    def test_idle_async_streams_wake_on_publish(self):
+        hub = EventHub(heartbeat=5)
+
+        async def read_two():
+            stream = hub.astream()
+            await stream.__anext__()
+            threading.Timer(0.05, hub.publish, ['item', {'id': 1}]).start()
+            chunk = await stream.__anext__()
+            await stream.aclose()
+            return chunk
+
+        self.assertIn(b'event: item', async_to_sync(read_two)())
+        self.assertEqual(hub.waiters, set())
+
+    def test_endpoint_streams_events(self):
+        response = self.client.get(reverse('inventory_events'), headers={'Accept': 'text/event-stream'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        chunks = iter(response.streaming_content)
+        self.assertIn(b'retry:', next(chunks))
+        event_hub.publish('item', {'id': self.item.id})
+        self.assertIn(f'"id":{self.item.id}'.encode(), next(chunks))
+        response.close()
+
+
+class DeltaSyncTests(TestCase):
+    client_class = APIClient
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.linen = Category.objects.create(name='Linen')
+        cls.food = Category.objects.create(name='Food')
+        for i in range(4):
+            InventoryItem.objects.create(name=f'Item {i}', quantity=i, price='1.00', category=cls.linen if i % 2 else cls.food)
+
+    def changes(self, since=None):
+        params = {'since': since} if since else {}
+        response = self.client.get(reverse('inventory_items_changes'), params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def age_everything(self, seconds=120):
+        # Move past the overlap window so the cursor is not held back
+        past = timezone.now() - timedelta(seconds=seconds)
+        InventoryItem.objects.update(last_updated=past)
+        InventoryItemTombstone.objects.update(deleted_at=past)
+
+    def test_returns_only_changes_since_the_cursor(self):
+        self.age_everything()
+        first = self.changes()
+        self.assertEqual(len(first['changed']), 4)
+        self.assertFalse(first['has_more'])
+
+        self.assertEqual(self.changes(first['next'])['changed'], [])
+        item = InventoryItem.objects.get(name='Item 2')
+        item.quantity = 40
+        item.save()
+        changes = self.changes(first['next'])
+        self.assertEqual([row['quantity'] for row in changes['changed']], [40])
+        # Recent changes are sent again until they settle
+        self.assertEqual(len(self.changes(changes['next'])['changed']), 1)
+
+    def test_deletes_and_category_cascades_leave_tombstones(self):
+        self.age_everything()
+        cursor = self.changes()['next']
+        linen_ids = set(InventoryItem.objects.filter(category=self.linen).values_list('id', flat=True))
+        self.client.force_authenticate(User.objects.create_user('boss@example.com', 'Max', 'Boss', 'password123', role=User.MANAGER))
+        self.assertEqual(self.client.delete(reverse('category_detail', args=[self.linen.id])).status_code, 204)
+        self.assertEqual(set(self.changes(cursor)['deleted']), linen_ids)
+
+    def test_pages_follow_the_index_and_cost_a_fixed_number_of_queries(self):
+        self.age_everything()
+        feed = ChangeFeed(page_size=3)
+        with self.assertNumQueries(2):
+            page = feed.read()
+        self.assertTrue(page['has_more'])
+        rest = feed.read(page['next'])
+        self.assertEqual(len(page['changed']) + len(rest['changed']), 4)
+        self.assertFalse(rest['has_more'])
+
+    def test_bad_and_expired_cursors(self):
+        response = self.client.get(reverse('inventory_items_changes'), {'since': 'garbage'})
+        self.assertEqual(response.status_code, 404)
+        naive = base64.urlsafe_b64encode(b'[["2024-01-01T00:00:00",1],["2024-01-01T00:00:00",1]]').decode()
+        response = self.client.get(reverse('inventory_items_changes'), {'since': naive})
+        self.assertEqual(response.status_code, 404)
+        old = ChangeFeed().encode_cursor(None, (timezone.now() - timedelta(days=365), 0))
+        response = self.client.get(reverse('inventory_items_changes'), {'since': old})
+        self.assertEqual(response.status_code, 410)
+
+
+class NameSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.linen = Category.objects.create(name='Linen')
+        cls.toiletries = Category.objects.create(name='Toiletries')
+        for name, category in [
+            ('Bath Towel', cls.linen), ('Hand Towel', cls.linen), ('Pillow Case', cls.linen),
+            ('Shampoo', cls.toiletries), ('Towel Hooks', cls.toiletries),
+        ]:
+            InventoryItem.objects.create(name=name, quantity=1, price='1.00', category=category)
+
+    def setUp(self):
+        name_search.reset()
+
+    def search(self, query, **params):
+        response = self.client.get(reverse('inventory_search'), {'q': query, **params})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_prefixes_and_typos_are_ranked_by_similarity(self):
+        names = [item['name'] for item in self.search('towe')['items']]
+        self.assertEqual(set(names), {'Bath Towel', 'Hand Towel', 'Towel Hooks'})
+        self.assertEqual(self.search('shampo')['items'][0]['name'], 'Shampoo')
+        self.assertEqual(self.search('pilow case')['items'][0]['name'], 'Pillow Case')
+        self.assertEqual(self.search('toilet')['categories'][0]['name'], 'Toiletries')
+        self.assertEqual(len(self.search('towel', limit=1)['items']), 1)
+        self.assertEqual(self.client.get(reverse('inventory_search')).status_code, 400)
+
+    def test_index_follows_writes(self):
+        self.search('towel')
+        item = InventoryItem.objects.get(name='Shampoo')
+        with self.captureOnCommitCallbacks(execute=True):
+            item.name = 'Conditioner'
+            item.save()
+            InventoryItem.objects.get(name='Hand Towel').delete()
+        self.assertEqual(self.search('shampoo')['items'], [])
+        self.assertEqual(self.search('conditoner')['items'][0]['id'], item.id)
+        self.assertNotIn('Hand Towel', [row['name'] for row in self.search('towel')['items']])
+
+    def test_other_processes_writes_are_caught_up(self):
+        self.search('towel')
+        # bulk_create sends no signals; the change feed picks it up
+        InventoryItem.objects.bulk_create([InventoryItem(name='Beach Towel', quantity=1, price='1.00', category=self.linen)])
+        name_search.next_sync = 0
+        self.assertIn('Beach Towel', [row['name'] for row in self.search('beach')['items']])
+
+    def test_compaction_keeps_live_names(self):
+        index = TrigramIndex()
+        index.load([(1, 'Bath Towel'), (2, 'Soap')])
+        for i in range(1500):
+            index.add(2, f'Soap {i}')
+        self.assertLess(len(index.keys), 1500)
+        self.assertEqual([key for key, _, _ in index.search('soap 1499', 5)][:1], [2])
+        self.assertEqual([key for key, _, _ in index.search('towel', 5)], [1])
+
+
+class StockLedgerTests(TestCase):
+    client_class = APIClient
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.manager = User.objects.create_user('boss@example.com', 'Max', 'Boss', 'password123', role=User.MANAGER)
+        cls.employee = User.objects.create_user('staff@example.com', 'Sam', 'Staff', 'password123')
+        cls.category = Category.objects.create(name='Linen')
+        cls.item = InventoryItem.objects.create(name='Towel', quantity=20, price='1.00', category=cls.category)
+
+    def put_quantity(self, user, quantity):
+        self.client.force_authenticate(user)
+        data = {'name': 'Towel', 'quantity': quantity, 'price': '1.00', 'category': 'Linen'}
+        return self.client.put(reverse('inventory_item_detail', args=[self.item.id]), data, format='json')
+
+    def movements(self):
+        return list(
+            StockMovement.objects.filter(item=self.item).order_by('id')
+            .values_list('quantity_before', 'quantity_after', 'delta', 'source', 'actor_id', 'update_request_id')
+        )
+
+    def stored_rollups(self):
+        return sorted(
+            (row['period'], row['bucket_start'], row['quantity_in'], row['quantity_out'], row['net_change'], row['movement_count'])
+            for row in StockRollup.objects.filter(item=self.item).values()
+        )
+
+    def test_every_quantity_change_is_recorded_with_source_and_actor(self):
+        self.assertEqual(self.put_quantity(self.manager, 15).status_code, 200)
+        self.assertEqual(self.put_quantity(self.employee, 3).status_code, 202)
+        requests = [
+            InventoryUpdateRequest.objects.create(item=self.item, requested_quantity=quantity, submitted_by=self.employee)
+            for quantity in (12, 30)
+        ]
+        apply_request_action([r.id for r in requests], APPROVE, self.manager)
+        self.assertEqual(self.movements()[1:], [
+            (20, 15, -5, StockMovement.MANAGER_EDIT, self.manager.id, None),
+            (15, 12, -3, StockMovement.APPROVED_REQUEST, self.manager.id, requests[0].id),
+            (12, 30, 18, StockMovement.APPROVED_REQUEST, self.manager.id, requests[1].id),
+        ])
+
+        upload = SimpleUploadedFile('items.csv', f'id,name,quantity,price,category\n{self.item.id},Towel,25,1.00,Linen\n'.encode())
+        self.client.force_authenticate(self.manager)
+        self.assertEqual(self.client.post(reverse('inventory_items_import'), {'file': upload}).status_code, 200)
+        self.assertEqual(self.movements()[-1], (30, 25, -5, StockMovement.IMPORT, self.manager.id, None))
+
+        movement = StockMovement.objects.first()
+        with self.assertRaises(ValueError):
+            movement.save()
+        with self.assertRaises(ValueError):
+            movement.delete()
+
+    def test_rollups_match_the_ledger_and_serve_usage(self):
+        self.put_quantity(self.manager, 15)
+        self.put_quantity(self.manager, 18)
+        bulk_upsert_items([{'id': self.item.id, 'name': 'Towel', 'quantity': 10, 'price': '1.00', 'category': 'Linen'}], actor=self.manager)
+
+        stored = self.stored_rollups()
+        expected = sorted(
+            (period, row['bucket'], row['quantity_in'], row['quantity_out'], row['net_change'], row['movement_count'])
+            for period in (StockRollup.HOUR, StockRollup.DAY)
+            for row in compute_rollups(period).filter(item_id=self.item.id)
+        )
+        self.assertEqual(stored, expected)
+        day = [row for row in stored if row[0] == StockRollup.DAY]
+        # 20 at creation, then -5, +3 and -8
+        self.assertEqual(day[0][2:], (23, 13, 10, 4))
+
+        rebuild_rollups()
+        self.assertEqual(self.stored_rollups(), stored)
+
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('inventory_item_usage', args=[self.item.id]), {'days': 90})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([bucket['quantity_out'] for bucket in response.json()['buckets']], [13])
+        self.assertEqual(self.client.get(reverse('inventory_item_usage', args=[self.item.id]), {'period': 'week'}).status_code, 400)
+
+class ReorderForecastTests(TestCase):
+    client_class = APIClient
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.manager = User.objects.create_user('boss@example.com', 'Max', 'Boss', 'password123', role=User.MANAGER)
+        cls.employee = User.objects.create_user('staff@example.com', 'Sam', 'Staff', 'password123')
+        category = Category.objects.create(name='Linen')
+        start = timezone.now() - timedelta(days=30)
+        history = {
+            # 10 a day; the restock between day 2 and 3 is left out
+            'Towel': [(0, 100), (1, 90), (2, 80), (3, 200), (4, 190)],
+            # 2, 6 and 0 a day over 2, 1 and 2 days
+            'Soap': [(0, 50), (2, 46), (3, 40), (5, 40)],
+            # Too little history
+            'Lamp': [(0, 9), (1, 8)],
+        }
+        cls.items = {}
+        for name, counts in history.items():
+            item = InventoryItem.objects.create(
+                name=name, quantity=60, price='1.00', category=category, recommended_quantity=10, warning_quantity=2,
+            )
+            cls.items[name] = item
+            for day, quantity in counts:
+                InventoryUpdateRequest.objects.create(
+                    item=item, requested_quantity=quantity, submitted_by=cls.employee, approved_by=cls.manager,
+                    status='approved', approved_at=start + timedelta(days=day),
+                )
+        InventoryUpdateRequest.objects.create(item=cls.items['Lamp'], requested_quantity=0, submitted_by=cls.employee)
+
+    def test_rates_variability_and_levels(self):
+        suggestions = ReorderForecaster().compute(ReorderForecaster().load_history())
+        rows = {row['item']: row for row in suggestion_rows(suggestions)}
+        self.assertEqual(set(rows), {self.items['Towel'].id, self.items['Soap'].id})
+
+        towel = rows[self.items['Towel'].id]
+        self.assertEqual((towel['rate'], towel['std']), (10, 0))
+        # 7 days of lead time, then 14 more until the next review
+        self.assertEqual((towel['warning_quantity'], towel['recommended_quantity']), (70, 210))
+
+        soap = rows[self.items['Soap'].id]
+        self.assertEqual((soap['rate'], soap['std']), (2, 2.191))
+        self.assertEqual((soap['warning_quantity'], soap['recommended_quantity']), (24, 52))
+
+    def test_applies_changed_levels_and_keeps_summaries_in_step(self):
+        suggestions, updated = ReorderForecaster().run()
+        self.assertEqual(updated, 2)
+        levels = dict((name, (warning, recommended)) for name, warning, recommended in
+                      InventoryItem.objects.values_list('name', 'warning_quantity', 'recommended_quantity'))
+        self.assertEqual(levels, {'Towel': (70, 210), 'Soap': (24, 52), 'Lamp': (2, 10)})
+        # Towel, at 60, is now below its warning level; Soap is still above both
+        self.assertEqual(CategoryStockSummary.objects.values_list('critical_count', 'low_stock_count').get(), (1, 1))
+        self.assertEqual(find_drift(), {})
+        self.assertEqual(ReorderForecaster().run()[1], 0)
+
+    def test_endpoint_previews_and_applies_for_managers(self):
+        self.client.force_authenticate(self.employee)
+        self.assertEqual(self.client.post(reverse('inventory_forecast'), {}, format='json').status_code, 403)
+
+        self.client.force_authenticate(self.manager)
+        response = self.client.post(reverse('inventory_forecast'), {'dry_run': True, 'lead_time_days': 3}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.json()['forecast'], response.json()['updated']), (2, 0))
+        self.assertEqual(InventoryItem.objects.get(name='Towel').warning_quantity, 2)
+
+        response = self.client.post(reverse('inventory_forecast'), {'lead_time_days': 3}, format='json')
+        self.assertEqual(response.json()['updated'], 2)
+        self.assertEqual(InventoryItem.objects.get(name='Towel').warning_quantity, 30)
+        self.assertEqual(self.client.post(reverse('inventory_forecast'), {'service_level': 2}, format='json').status_code, 400)
+
+class SeedInventoryTests(TestCase):
+    def test_seeds_batches_and_keeps_summaries_in_step(self):
+        out = io.StringIO()
+        args = ['--categories', '4', '--users', '12', '--items', '300', '--requests', '500', '--batch-size', '128']
+        call_command('seed_inventory', *args, stdout=out)
+        self.assertIn('300 items', out.getvalue())
+        self.assertEqual((Category.objects.count(), InventoryItem.objects.count(), InventoryUpdateRequest.objects.count()), (4, 300, 500))
+        self.assertEqual(User.objects.filter(email__endswith='@seed.example.com', role=User.MANAGER).count(), 2)
+        self.assertEqual(find_drift(), {})
+
+        requests = InventoryUpdateRequest.objects
+        self.assertFalse(requests.filter(status='pending', approved_at__isnull=False).exists())
+        self.assertFalse(requests.exclude(status='pending').filter(approved_at__isnull=True).exists())
+        # Timestamps are spread over the history window rather than all being now
+        self.assertTrue(requests.filter(created_at__lt=timezone.now() - timedelta(days=365)).exists())
+
+        # Categories and users are matched on a second run; items and requests are added
+        call_command('seed_inventory', *args, stdout=out)
+        self.assertEqual((Category.objects.count(), User.objects.count(), InventoryItem.objects.count()), (4, 12, 600))
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class ApiBenchmarkTests(TestCase):
+    def test_every_route_has_a_scenario(self):
+        self.assertEqual(ApiBenchmark().coverage(), [])
+
+    def test_scenarios_succeed_and_report_metrics(self):
+        InventorySeeder(categories=2, users=3, items=50, requests=100).run()
+        # The login and email verification views print() as they go
+        with contextlib.redirect_stdout(io.StringIO()):
+            results = ApiBenchmark(iterations=2, warmup=0, memory_samples=1).run()
+        self.assertEqual(len(results), len(scenarios()))
+        failures = [(result['route'], result['method'], result['status']) for result in results if result['errors']]
+        self.assertEqual(failures, [])
+        for result in results:
+            self.assertLessEqual(result['p50_ms'], result['p95_ms'])
+            self.assertLessEqual(result['p95_ms'], result['p99_ms'])
+            self.assertGreater(result['throughput_rps'], 0)
+            self.assertGreater(result['peak_memory_kb'], 0)
+        json.dumps(results)
+
+
+class RequestMetricsTests(TestCase):
+    client_class = APIClient
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user('admin@example.com', 'Ada', 'Admin', 'password123', role=User.ADMIN)
+        cls.manager = User.objects.create_user('boss@example.com', 'Max', 'Boss', 'password123', role=User.MANAGER)
+        category = Category.objects.create(name='Linen')
+        InventoryItem.objects.create(name='Towel', quantity=20, price='1.00', category=category)
+
+    def setUp(self):
+        metrics_registry.reset()
+        response_cache.backend.clear()
+
+    def scrape(self):
+        self.client.force_authenticate(self.admin)
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        return dict(
+            line.rsplit(' ', 1) for line in response.content.decode().splitlines() if not line.startswith('#')
+        )
+
+    def test_records_time_queries_serializer_time_and_size_per_route(self):
+        self.client.force_authenticate(self.manager)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('inventory_items'))
+        # Read now; the next request clears the connection's query log
+        query_count = len(queries)
+        self.client.get('/api/v1/nowhere/')
+
+        samples = self.scrape()
+        labels = '{route="inventory_items",method="GET"}'
+        self.assertEqual(samples[f'http_request_duration_seconds_count{labels}'], '1')
+        self.assertEqual(samples[f'http_request_db_queries_sum{labels}'], str(query_count))
+        self.assertGreater(float(samples[f'http_request_db_seconds_sum{labels}']), 0)
+        self.assertGreater(float(samples[f'http_request_serializer_seconds_sum{labels}']), 0)
+        self.assertEqual(samples[f'http_response_size_bytes_sum{labels}'], str(len(response.content)))
+        self.assertEqual(samples['http_responses_total{route="inventory_items",method="GET",status="200"}'], '1')
+        self.assertEqual(samples['http_responses_total{route="unmatched",method="GET",status="404"}'], '1')
+        # Buckets are cumulative and end with every request
+        self.assertEqual(samples['http_request_duration_seconds_bucket{route="inventory_items",method="GET",le="+Inf"}'], '1')
+
+    def test_unknown_methods_share_one_label(self):
+        for method in ('BREW', 'PURGE', 'SPAM'):
+            self.client.generic(method, '/api/v1/nowhere/')
+        samples = self.scrape()
+        self.assertEqual(samples['http_request_duration_seconds_count{route="unmatched",method="other"}'], '3')
+        self.assertFalse([name for name in samples if 'BREW' in name])
+
+    def test_model_serializers_count_towards_serializer_time(self):
+        metrics = RequestMetrics()
+        token = active_metrics.set(metrics)
+        try:
+            InventoryItemSerializer(InventoryItem.objects.all(), many=True).data
+        finally:
+            active_metrics.reset(token)
+        self.assertGreater(metrics.serializer_time, 0)
+        self.assertFalse(metrics.serializing)
+
+    def test_only_admins_can_scrape(self):
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 401)
+        self.client.force_authenticate(self.manager)
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 403)
+
+class RequestProfilingTests(TestCase):
+    client_class = APIClient
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user('admin@example.com', 'Ada', 'Admin', 'password123', role=User.ADMIN)
+        cls.manager = User.objects.create_user('boss@example.com', 'Max', 'Boss', 'password123', role=User.MANAGER)
+        category = Category.objects.create(name='Linen')
+        InventoryItem.objects.create(name='Towel', quantity=20, price='1.00', category=category)
+
+    def setUp(self):
+        response_cache.backend.clear()
+
+    def get_as(self, user, **extra):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {user.tokens()['access']}")
+        return self.client.get(reverse('inventory_items'), **extra)
+
+    def test_admin_can_profile_a_request(self):
+        response = self.get_as(self.admin, HTTP_X_PROFILE='1')
+        self.assertEqual(response.status_code, 200)
+        profile = RequestProfile.objects.get(pk=response['X-Profile-Id'])
+        self.assertEqual((profile.user_id, profile.view_name, profile.status_code), (self.admin.id, 'inventory_items', 200))
+        self.assertIn('views.py', profile.stats)
+        self.assertTrue(bytes(profile.data))
+        self.assertEqual(response['X-Profile-Url'], reverse('admin:inventory_requestprofile_change', args=[profile.pk]))
+
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.admin.tokens()['access']}")
+        response = self.client.get(reverse('inventory_items'), {'profile': '1'})
+        self.assertIn('X-Profile-Id', response)
+
+    def test_other_roles_and_unauthenticated_flags_are_ignored(self):
+        response = self.get_as(self.manager, HTTP_X_PROFILE='1')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('X-Profile-Id', response)
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer not-a-token')
+        self.assertEqual(self.client.get(reverse('inventory_items'), {'profile': '1'}).status_code, 401)
+        self.assertFalse(RequestProfile.objects.exists())
+
+    @override_settings(SLOW_QUERY_THRESHOLD_MS=0)
+    def test_slow_queries_are_stored_with_view_and_stack(self):
+        with self.assertLogs('inventory.profiling', 'WARNING') as logs, CaptureQueriesContext(connection) as queries:
+            self.get_as(self.manager)
+        # All but the INSERT that stores them
+        query_count = len(queries) - 1
+        slow = list(SlowQuery.objects.all())
+        self.assertEqual(len(slow), query_count)
+        self.assertEqual(len(logs.output), query_count)
+        self.assertEqual(set(query.view_name for query in slow), {'inventory_items'})
+        item_query = next(query for query in slow if 'inventory_inventoryitem' in query.sql)
+        self.assertIn('inventory/views.py', item_query.stack)
+        self.assertTrue(all(query.stack for query in slow))
+
+    def test_default_threshold_skips_fast_queries(self):
+        self.get_as(self.manager)
+        self.assertFalse(SlowQuery.objects.exists())
+
+    def test_a_profile_that_cannot_be_stored_does_not_fail_the_request(self):
+        def refuse_profiles(execute, sql, params, many, context):
+            if 'inventory_requestprofile' in sql:
+                raise DatabaseError('disk full')
+            return execute(sql, params, many, context)
+
+        with self.assertLogs('inventory.profiling', 'ERROR'), connection.execute_wrapper(refuse_profiles):
+            response = self.get_as(self.admin, HTTP_X_PROFILE='1')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('X-Profile-Id', response)
+
+    def test_purge_removes_profiling_rows_past_retention(self):
+        old = timezone.now() - timedelta(days=15)
+        SlowQuery.objects.create(view_name='inventory_items', method='GET', path='/', sql='SELECT 1', duration=1, stack='', created_at=old)
+        SlowQuery.objects.create(view_name='inventory_items', method='GET', path='/', sql='SELECT 2', duration=1, stack='')
+        self.get_as(self.admin, HTTP_X_PROFILE='1')
+        RequestProfile.objects.update(created_at=old)
+        self.get_as(self.admin, HTTP_X_PROFILE='1')
+
+        call_command('purge_profiling', stdout=io.StringIO())
+        self.assertEqual(list(SlowQuery.objects.values_list('sql', flat=True)), ['SELECT 2'])
+        self.assertEqual(RequestProfile.objects.count(), 1)
+
+@override_settings(DATABASE_REPLICAS=['replica'], DATABASE_PRIMARY_PIN_SECONDS=30)
+class ReplicaRoutingTests(TestCase):
+    """Runs against a second test database, created here as the replica, with rows of its own."""
+    client_class = APIClient
+    # Resolved when the class is set up, after the replica exists; naming it
+    # here would have the test runner look for it in settings
+    databases = '__all__'
+
+    @classmethod
+    def setUpClass(cls):
+        # connections.settings is settings.DATABASES
+        replica = dict(connections.settings['default'])
+        replica['TEST'] = dict(replica['TEST'], NAME=None, MIRROR=None)
+        connections.settings['replica'] = replica
+        cls.replica_name = replica['NAME']
+        connections['replica'].creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections['replica'].creation.destroy_test_db(cls.replica_name, verbosity=0)
+        del connections['replica']
+        del connections.settings['replica']
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.manager = User.objects.create_user('boss@example.com', 'Max', 'Boss', 'password123', role=User.MANAGER)
+        category = Category.objects.create(name='Primary linen')
+        item = InventoryItem.objects.create(name='Primary towel', quantity=20, price='1.00', category=category)
+        InventoryUpdateRequest.objects.create(item=item, requested_quantity=5, submitted_by=cls.manager)
+        # bulk_create sends no signals, so nothing is written back to the primary
+        replica_category, = Category.objects.using('replica').bulk_create([Category(name='Replica linen')])
+        InventoryItem.objects.using('replica').bulk_create([
+            InventoryItem(name='Replica towel', quantity=3, price='1.00', category=replica_category),
+        ])
+        cls.replicate_versions()
+
+    @staticmethod
+    def replicate_versions():
+        # Replicas that are behind the primary's table versions are passed over
+        TableVersion.objects.using('replica').all().delete()
+        TableVersion.objects.using('replica').bulk_create([
+            TableVersion(name=row.name, version=row.version, updated_at=row.updated_at) for row in TableVersion.objects.all()
+        ])
+
+    def setUp(self):
+        response_cache.backend.clear()
+        self.client.force_authenticate(self.manager)
+
+    def item_names(self, **headers):
+        return [item['name'] for item in self.client.get(reverse('inventory_items'), headers=headers).json()]
+
+    def test_reads_go_to_the_replica_and_writes_to_the_primary(self):
+        self.assertEqual(self.item_names(), ['Replica towel'])
+        self.assertEqual([category['name'] for category in self.client.get(reverse('categories')).json()], ['Replica linen'])
+        self.assertEqual(self.client.get(reverse('inventory_requests')).json(), [])
+
+        response = self.client.post(reverse('categories'), {'name': 'Towels', 'description': ''}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(Category.objects.using('default').filter(name='Towels').exists())
+        self.assertFalse(Category.objects.using('replica').filter(name='Towels').exists())
+
+    def test_a_client_that_wrote_reads_from_the_primary_until_the_pin_expires(self):
+        self.assertEqual(self.item_names(), ['Replica towel'])
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse('categories'), {'name': 'Towels', 'description': ''}, format='json', headers={'Origin': 'http://localhost:5173'},
+            )
+        pin = response[PIN_HEADER]
+        # The SPA is cross-origin, so it can only read and resend the pin if CORS lets it
+        self.assertIn(PIN_HEADER, response['Access-Control-Expose-Headers'])
+        self.assertAlmostEqual(float(pin), time.time() + 30, delta=5)
+        # The replica's copy is still cached, but a pinned client skips it
+        self.assertEqual(self.item_names(**{PIN_HEADER: pin}), ['Primary towel'])
+
+        # Unpinned, the replica is still used once it has caught up with the write
+        response_cache.backend.clear()
+        self.assertEqual(self.item_names(**{PIN_HEADER: '1.0'}), ['Primary towel'])
+        self.replicate_versions()
+        response_cache.backend.clear()
+        self.assertEqual(self.item_names(**{PIN_HEADER: '1.0'}), ['Replica towel'])
+        self.assertEqual(self.item_names(**{PIN_HEADER: 'junk'}), ['Replica towel'])
+
+    def test_validators_come_from_the_primary(self):
+        response = self.client.get(reverse('inventory_items'))
+        self.assertEqual(response.json()[0]['name'], 'Replica towel')
+        etag = response['ETag']
+        # A write the replica has not seen yet: the old ETag must not get a 304
+        InventoryItem.objects.filter(name='Primary towel').update(quantity=1)
+        TableVersion.bump(InventoryItem)
+        response = self.client.get(reverse('inventory_items'), headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        # ...and its body comes from the primary, so the new ETag describes it
+        self.assertEqual(response.json()[0]['name'], 'Primary towel')
+
+    def test_failed_writes_do_not_pin(self):
+        response = self.client.post(reverse('categories'), {}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertNotIn(PIN_HEADER, response)
+
+    def test_router_outside_replica_views(self):
+        router = ReplicaRouter()
+        self.assertIsNone(router.db_for_read(InventoryItem))
+        self.assertEqual(router.db_for_write(InventoryItem), 'default')
+        replica_item = InventoryItem.objects.using('replica').get()
+        self.assertTrue(router.allow_relation(replica_item, Category.objects.get()))
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_without_replicas_everything_uses_the_primary(self):
+        self.assertEqual(self.item_names(), ['Primary towel'])
+        response = self.client.post(reverse('categories'), {'name': 'Towels', 'description': ''}, format='json')
+        self.assertNotIn(PIN_HEADER, response)
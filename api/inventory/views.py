@@ -1,27 +1,66 @@
 from rest_framework import status, views
 from rest_framework.response import Response
-from .models import InventoryItem, Category, InventoryUpdateRequest
-from .serializers import InventoryItemSerializer, CategorySerializer, InventoryUpdateRequestSerializer
+from .models import InventoryItem, Category, InventoryUpdateRequest, StockMovement, StockRollup, critical_stock, warning_stock
+from .serializers import InventoryItemSerializer, CategorySerializer, InventoryUpdateRequestSerializer, InventoryRequestBulkActionSerializer, ReorderForecastSerializer
+from .fast_serializers import InventoryItemValuesSerializer, CategoryValuesSerializer, InventoryUpdateRequestValuesSerializer
 from .permissions import IsManagerOrAdmin
+from .filters import filter_items, get_item_ordering, TRUE_VALUES
+from .pagination import KeysetPagination
+from .conditional import conditional_get
+from .services import apply_request_action, bulk_upsert_items, APPROVE, REJECT
+from .bulk_io import ImportFileError, ItemImporter, decode_lines, export_rows, stream_csv, stream_ndjson, read_csv, read_ndjson
+from .events import event_hub
+from .changes import ChangeFeed
+from .search import name_search
+from .ledger import movement_source, usage
+from .forecast import ReorderForecaster, suggestion_rows
+from .cache import cached_get, response_cache, ITEMS, CATEGORIES, CATEGORY_NAMES, item_generation, category_generation
+from backend.routers import replica_reads
 from django.shortcuts import get_object_or_404
+from django.http import StreamingHttpResponse
+from django.core.handlers.asgi import ASGIRequest
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.parsers import MultiPartParser
 from django.contrib.auth import get_user_model
+from decimal import Decimal
+from django.db.models import Case, DecimalField, FloatField, IntegerField, Value, When
+from django.db.models.functions import Cast, Coalesce
 from django.utils import timezone
+from datetime import timedelta
+
+def item_generations(request, item_id=None, category_name=None):
+    if item_id:
+        return [item_generation(item_id), CATEGORY_NAMES]
+    if category_name:
+        return [category_generation(category_name)]
+    return [ITEMS]
+
+def category_generations(request, category_id=None):
+    return [CATEGORIES]
 
 class InventoryItemAPIView(views.APIView):
     serializer_class = InventoryItemSerializer
 
+    def get_queryset(self):
+        # The serializer renders category by name, so join it up front
+        return InventoryItem.objects.select_related('category')
+
     def post(self, request):
         serializer = self.serializer_class(data=request.data)
         if serializer.is_valid():
-            serializer.save()
+            with movement_source(StockMovement.MANAGER_EDIT, request.user):
+                serializer.save()
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+    @replica_reads
+    @conditional_get(InventoryItem, Category)
+    @cached_get(item_generations)
     def get(self, request, item_id=None, category_name=None):
         # Case when an item_id is provided for detail view
         if item_id:
             try:
-                item = InventoryItem.objects.get(id=item_id)
+                item = self.get_queryset().get(id=item_id)
                 serializer = self.serializer_class(item)
                 return Response(serializer.data, status=status.HTTP_200_OK)
             except InventoryItem.DoesNotExist:
@@ -29,20 +68,30 @@ class InventoryItemAPIView(views.APIView):
         # Case when category_name is provided for filtering
         elif category_name:
             category = get_object_or_404(Category, name=category_name)
-            items = InventoryItem.objects.filter(category=category)
-            serializer = self.serializer_class(items, many=True)
-            return Response(serializer.data, status=status.HTTP_200_OK)
+            items = self.get_queryset().filter(category=category)
         # Default case, list all items
         else:
-            items = InventoryItem.objects.all()
-            serializer = self.serializer_class(items, many=True)
-            return Response(serializer.data, status=status.HTTP_200_OK)
+            items = self.get_queryset()
+        return self.list_items(request, filter_items(items, request))
+
+    def list_items(self, request, items):
+        # Lists are rendered from .values() rows, skipping model instances
+        items = InventoryItemValuesSerializer.get_values(items)
+        paginator = KeysetPagination(get_item_ordering(request, default='name'))
+        # Pagination is opt-in so clients that expect a plain list keep working
+        if paginator.is_requested(request):
+            page = paginator.paginate_queryset(items, request)
+            return paginator.get_paginated_response(InventoryItemValuesSerializer.serialize(page))
+
+        ordering = get_item_ordering(request)
+        if ordering:
+            items = items.order_by(ordering, f"{'-' if ordering.startswith('-') else ''}id")
+        return Response(InventoryItemValuesSerializer.serialize(items), status=status.HTTP_200_OK)
 
     User = get_user_model()
     
     def put(self, request, item_id):
-        item = get_object_or_404(InventoryItem, id=item_id)
-        print(f"User: {request.user}, Role: {getattr(request.user, 'role', 'Unknown')}")
+        item = get_object_or_404(self.get_queryset(), id=item_id)
 
         # Determine if the user is an employee
         if request.user.role == 'employee':
@@ -63,14 +112,251 @@ class InventoryItemAPIView(views.APIView):
             # If the user is not an employee (i.e., a manager or admin), proceed with the update as usual
             serializer = self.serializer_class(item, data=request.data)
             if serializer.is_valid():
-                serializer.save()
+                with movement_source(StockMovement.MANAGER_EDIT, request.user):
+                    serializer.save()
                 return Response(serializer.data, status=status.HTTP_200_OK)
             else:
                 return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+class InventoryItemBulkAPIView(views.APIView):
+    permission_classes = [IsManagerOrAdmin]
+    max_rows = 1000
+
+    def post(self, request):
+        rows = request.data
+        if not isinstance(rows, list) or not rows:
+            return Response({"error": "Expected a non-empty list of items."}, status=status.HTTP_400_BAD_REQUEST)
+        if len(rows) > self.max_rows:
+            return Response({"error": f"At most {self.max_rows} items can be saved at once."}, status=status.HTTP_400_BAD_REQUEST)
+
+        item_ids, errors = bulk_upsert_items(rows, actor=request.user)
+        if errors:
+            return Response({"errors": errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        items = InventoryItemValuesSerializer.get_values(InventoryItem.objects.filter(id__in=item_ids))
+        by_id = dict((row['id'], row) for row in InventoryItemValuesSerializer.serialize(items))
+        return Response([by_id[item_id] for item_id in item_ids], status=status.HTTP_200_OK)
+
+EXPORT_FORMATS = {
+    'csv': (stream_csv, 'text/csv'),
+    'ndjson': (stream_ndjson, 'application/x-ndjson'),
+}
+
+class InventoryItemChangesAPIView(views.APIView):
+    def get(self, request):
+        # Pass the returned 'next' back as since; keep polling while has_more
+        return Response(ChangeFeed().read(request.query_params.get('since')), status=status.HTTP_200_OK)
+
+class InventorySearchAPIView(views.APIView):
+    max_limit = 50
+
+    def get(self, request):
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response({"error": "Provide a search term in 'q'."}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limit = min(max(int(request.query_params.get('limit', 10)), 1), self.max_limit)
+        except ValueError:
+            return Response({"error": "limit must be a number."}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(name_search.search(query, limit), status=status.HTTP_200_OK)
+
+class InventoryItemUsageAPIView(views.APIView):
+    # Longest window per period; hourly buckets add up quickly
+    max_days = {StockRollup.HOUR: 31, StockRollup.DAY: 3650}
+
+    def get(self, request, item_id):
+        period = request.query_params.get('period', StockRollup.DAY)
+        if period not in self.max_days:
+            return Response({"error": f"period must be one of: {', '.join(self.max_days)}."}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            days = min(max(int(request.query_params.get('days', 90)), 1), self.max_days[period])
+        except ValueError:
+            return Response({"error": "days must be a number."}, status=status.HTTP_400_BAD_REQUEST)
+        if not InventoryItem.objects.filter(id=item_id).exists():
+            return Response({"error": "Item not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        buckets = usage(item_id, period, timezone.now() - timedelta(days=days))
+        return Response({'item': item_id, 'period': period, 'days': days, 'buckets': list(buckets)}, status=status.HTTP_200_OK)
+
+class InventoryForecastAPIView(views.APIView):
+    permission_classes = [IsManagerOrAdmin]
+    serializer_class = ReorderForecastSerializer
+
+    def post(self, request):
+        serializer = self.serializer_class(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        options = dict(serializer.validated_data)
+        dry_run, limit = options.pop('dry_run'), options.pop('limit')
+        suggestions, updated = ReorderForecaster(**options).run(dry_run=dry_run)
+        return Response({
+            'dry_run': dry_run,
+            'forecast': len(suggestions['item']),
+            'updated': updated,
+            'suggestions': suggestion_rows(suggestions, limit),
+        }, status=status.HTTP_200_OK)
+
+class InventoryItemExportAPIView(views.APIView):
+    permission_classes = [IsManagerOrAdmin]
+
+    def get(self, request, export_format):
+        if export_format not in EXPORT_FORMATS:
+            return Response({"error": f"Unsupported export format. Use one of: {', '.join(EXPORT_FORMATS)}."}, status=status.HTTP_404_NOT_FOUND)
+
+        # Rows are streamed in chunks so memory stays flat however big the table is
+        stream, content_type = EXPORT_FORMATS[export_format]
+        rows = export_rows(filter_items(InventoryItem.objects.all(), request))
+        response = StreamingHttpResponse(stream(rows), content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="inventory-items.{export_format}"'
+        return response
+
+class InventoryItemImportAPIView(views.APIView):
+    permission_classes = [IsManagerOrAdmin]
+    parser_classes = [MultiPartParser]
+
+    def post(self, request):
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({"error": "Upload a CSV or NDJSON file in the 'file' field."}, status=status.HTTP_400_BAD_REQUEST)
+
+        reader = read_ndjson if upload.name.lower().endswith(('.ndjson', '.jsonl')) else read_csv
+        create_categories = request.query_params.get('create_categories', '').lower() in TRUE_VALUES
+        importer = ItemImporter(create_categories=create_categories, actor=request.user)
+        try:
+            result = importer.run(reader(decode_lines(upload.file)))
+        except ImportFileError as exc:
+            return Response({"error": str(exc), "line": exc.line, **importer.result}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(result, status=status.HTTP_200_OK)
+
+class InventoryDashboardAPIView(views.APIView):
+    default_limit = 5
+    max_limit = 50
+
+    def get_limit(self, request):
+        try:
+            limit = int(request.query_params.get('limit', self.default_limit))
+        except ValueError:
+            return self.default_limit
+        return max(1, min(limit, self.max_limit))
+
+    @conditional_get(InventoryItem, Category)
+    def get(self, request):
+        limit = self.get_limit(request)
+        items = InventoryItem.objects.all()
+
+        # Per-category counters come from the summary table, one row per
+        # category, and the totals are summed from those rows
+        categories = list(
+            Category.objects.annotate(
+                total=Coalesce('stock_summary__item_count', 0),
+                low_stock=Coalesce('stock_summary__low_stock_count', 0),
+                critical=Coalesce('stock_summary__critical_count', 0),
+                out_of_stock=Coalesce('stock_summary__out_of_stock_count', 0),
+                total_quantity=Coalesce('stock_summary__total_quantity', 0),
+                stock_value=Coalesce('stock_summary__stock_value', Value(Decimal(0)), output_field=DecimalField(max_digits=20, decimal_places=2)),
+            )
+            .order_by('-critical', '-low_stock', 'name')
+            .values('id', 'name', 'total', 'low_stock', 'critical', 'out_of_stock', 'total_quantity', 'stock_value')
+        )
+        totals = {
+            'total_items': 0, 'total_quantity': 0, 'stock_value': Decimal(0),
+            'low_stock_items': 0, 'critical_items': 0, 'out_of_stock_items': 0,
+        }
+        for category in categories:
+            totals['total_items'] += category['total']
+            totals['total_quantity'] += category.pop('total_quantity')
+            totals['stock_value'] += Decimal(category.pop('stock_value'))
+            totals['low_stock_items'] += category['low_stock']
+            totals['critical_items'] += category['critical']
+            totals['out_of_stock_items'] += category['out_of_stock']
+        totals['total_categories'] = len(categories)
+        totals['stock_value'] = f"{totals['stock_value']:.2f}"
+
+        # Most urgent low-stock items first, then the lowest fill ratio
+        stock_ratio = Case(
+            When(recommended_quantity__gt=0, then=Cast('quantity', FloatField()) / Cast('recommended_quantity', FloatField())),
+            When(quantity__gt=0, then=Value(1.0)),
+            default=Value(0.0),
+            output_field=FloatField(),
+        )
+        status_priority = Case(
+            When(critical_stock(), then=Value(0)),
+            When(warning_stock(), then=Value(1)),
+            default=Value(2),
+            output_field=IntegerField(),
+        )
+        low_stock_preview = (
+            items.low_stock()
+            .annotate(status_priority=status_priority, stock_ratio=stock_ratio)
+            .order_by('status_priority', 'stock_ratio', 'name', 'id')
+            .values('id', 'name', 'quantity', 'recommended_quantity', 'warning_quantity', 'status_priority', 'category__name')[:limit]
+        )
+        out_of_stock_preview = (
+            items.out_of_stock()
+            .order_by('quantity', 'name', 'id')
+            .values('id', 'name', 'quantity', 'recommended_quantity', 'warning_quantity', 'category__name')[:limit]
+        )
+
+        return Response({
+            'totals': totals,
+            'categories': categories,
+            'low_stock': [_preview_row(row) for row in low_stock_preview],
+            'out_of_stock': [_preview_row(row) for row in out_of_stock_preview],
+        }, status=status.HTTP_200_OK)
+
+def _preview_row(row):
+    row['category'] = row.pop('category__name')
+    priority = row.pop('status_priority', None)
+    if priority is None:
+        row['status'] = 'out_of_stock'
+    else:
+        row['status'] = 'critical' if priority == 0 else 'warning'
+    return row
+
+class InventoryCacheStatsAPIView(views.APIView):
+    permission_classes = [IsManagerOrAdmin]
+
+    def get(self, request):
+        return Response(response_cache.stats(), status=status.HTTP_200_OK)
+
+class EventStreamRenderer(BaseRenderer):
+    # Lets EventSource's Accept: text/event-stream through content negotiation
+    media_type = 'text/event-stream'
+    format = 'event-stream'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return JSONRenderer().render(data)
+
+class InventoryEventsAPIView(views.APIView):
+    """
+    Server-sent events for item and update request changes (see events.py).
+    Under ASGI each client is a suspended coroutine; under WSGI each holds a
+    worker thread, so serve this route from an ASGI worker. The hub is in
+    process memory, so a client only hears about writes handled by the same
+    process; the frontend leaves it off unless VITE_INVENTORY_EVENTS is set.
+    Other deployments sync through the changes endpoint (changes.py).
+    """
+    renderer_classes = [EventStreamRenderer, JSONRenderer]
+
+    def get(self, request):
+        last_event_id = request.headers.get('Last-Event-ID') or request.query_params.get('last_event_id')
+        if isinstance(request._request, ASGIRequest):
+            stream = event_hub.astream(last_event_id)
+        else:
+            stream = event_hub.stream(last_event_id)
+        response = StreamingHttpResponse(stream, content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        # Stop nginx from buffering the stream
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
 class CategoryAPIView(views.APIView):
     serializer_class = CategorySerializer
 
+    @replica_reads
+    @conditional_get(Category)
+    @cached_get(category_generations)
     def get(self, request, category_id=None):
         if category_id:
             try:
@@ -80,9 +366,8 @@ class CategoryAPIView(views.APIView):
             except Category.DoesNotExist:
                 return Response({"error": "Category not found"}, status=status.HTTP_404_NOT_FOUND)
 
-        categories = Category.objects.all()
-        serializer = self.serializer_class(categories, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        categories = CategoryValuesSerializer.get_values(Category.objects.all())
+        return Response(CategoryValuesSerializer.serialize(categories), status=status.HTTP_200_OK)
 
     def post(self, request):
         serializer = self.serializer_class(data=request.data)
@@ -115,18 +400,26 @@ class CategoryAPIView(views.APIView):
 class InventoryUpdateRequestAPIView(views.APIView):
     serializer_class = InventoryUpdateRequestSerializer
 
+    def get_queryset(self):
+        return InventoryUpdateRequest.objects.select_related('submitted_by', 'approved_by')
+
+    @replica_reads
+    @conditional_get(InventoryUpdateRequest)
     def get(self, request, request_id=None):
         if request_id:
             try:
-                update_request = InventoryUpdateRequest.objects.get(id=request_id)
+                update_request = self.get_queryset().get(id=request_id)
                 serializer = self.serializer_class(update_request)
                 return Response(serializer.data, status=status.HTTP_200_OK)
             except InventoryUpdateRequest.DoesNotExist:
                 return Response({"error": "Update request not found"}, status=status.HTTP_404_NOT_FOUND)
 
-        update_requests = InventoryUpdateRequest.objects.all()
-        serializer = self.serializer_class(update_requests, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        update_requests = InventoryUpdateRequest.objects.order_by('created_at', 'id')
+        request_status = request.query_params.get('status')
+        if request_status:
+            update_requests = update_requests.filter(status=request_status)
+        update_requests = InventoryUpdateRequestValuesSerializer.get_values(update_requests)
+        return Response(InventoryUpdateRequestValuesSerializer.serialize(update_requests), status=status.HTTP_200_OK)
 
     def post(self, request):
         serializer = self.serializer_class(data=request.data, context={'request': request})
@@ -136,24 +429,17 @@ class InventoryUpdateRequestAPIView(views.APIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
     def put(self, request, request_id):
-        update_request = get_object_or_404(InventoryUpdateRequest, id=request_id)
+        update_request = get_object_or_404(self.get_queryset(), id=request_id)
         action = request.data.get('action', '').lower()
 
         if action in ['approve', 'reject']:
             if not request.user.role in ['manager', 'admin']:
                 return Response({"error": "Unauthorized. Only managers or admins can approve or reject requests."}, status=status.HTTP_403_FORBIDDEN)
 
-            update_request.status = action
-            update_request.approved_by = request.user
-            update_request.approved_at = timezone.now()
-
-            if action == 'approve':
-                # Applying changes from the update request to the item
-                inventory_item = update_request.item
-                inventory_item.quantity = update_request.requested_quantity
-                inventory_item.save()
-
-            update_request.save()
+            # Claims the request atomically, so a concurrent approval can't apply it twice
+            outcome, = apply_request_action([update_request.id], action, request.user)
+            if 'error' in outcome:
+                return Response({"error": "Update request is not in pending status"}, status=status.HTTP_409_CONFLICT)
             return Response({"message": f"Inventory update request {action}d."}, status=status.HTTP_200_OK)
 
         # If not approving or rejecting, proceed with a regular update
@@ -176,31 +462,26 @@ class InventoryRequestActionAPIView(views.APIView):
     permission_classes = [IsManagerOrAdmin]
 
     def post(self, request, request_id, action):
-        try:
-            update_request = InventoryUpdateRequest.objects.get(id=request_id, status='pending')
-        except InventoryUpdateRequest.DoesNotExist:
-            return Response({"error": "Update request not found or not in pending status"}, status=status.HTTP_404_NOT_FOUND)
-        
-        if action == "approve":
-            # Applying changes from the update request to the item
-            inventory_item = update_request.item
-            inventory_item.quantity = update_request.requested_quantity
-            inventory_item.save()
-
-            update_request.status = 'approved'
-            update_request.approved_by = request.user  # Set the approver
-            update_request.approved_at = timezone.now()  # Recording the approval time
-            update_request.save()
+        if action not in [APPROVE, REJECT]:
+            return Response({"error": "Invalid action specified."}, status=status.HTTP_400_BAD_REQUEST)
 
+        outcome, = apply_request_action([request_id], action, request.user)
+        if 'error' in outcome:
+            return Response({"error": outcome['error']}, status=status.HTTP_404_NOT_FOUND)
+
+        if action == APPROVE:
             return Response({"message": "Inventory update request approved and changes applied."}, status=status.HTTP_200_OK)
+        return Response({"message": "Inventory update request rejected."}, status=status.HTTP_200_OK)
 
-        elif action == "reject":
-            update_request.status = 'rejected'
-            update_request.approved_by = request.user  # Recording rejection
-            update_request.approved_at = timezone.now()  # Record the rejection time
-            update_request.save()
+class InventoryRequestBulkActionAPIView(views.APIView):
+    permission_classes = [IsManagerOrAdmin]
+    serializer_class = InventoryRequestBulkActionSerializer
 
-            return Response({"message": "Inventory update request rejected."}, status=status.HTTP_200_OK)
+    def post(self, request):
+        serializer = self.serializer_class(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-        else:
-            return Response({"error": "Invalid action specified."}, status=status.HTTP_400_BAD_REQUEST)
\ No newline at end of file
+        action = serializer.validated_data['action']
+        results = apply_request_action(serializer.validated_data['request_ids'], action, request.user)
+        return Response({"action": action, "results": results}, status=status.HTTP_200_OK)
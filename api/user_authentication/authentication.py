@@ -0,0 +1,139 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from .models import TOKEN_CLAIMS, TokenClaimsUser, User
+
+
+class UserCache:
+    """
+    Small per-process LRU of User rows keyed by id, with a TTL. Keys are
+    stringified since tokens may carry the id as a string. Entries are
+    dropped by the User signals in signals.py; the TTL bounds how stale
+    another process's copy can get.
+    """
+
+    def __init__(self, maxsize=1024, ttl=60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, user_id):
+        user_id = str(user_id)
+        with self.lock:
+            entry = self.entries.get(user_id)
+            if entry is None:
+                return None
+            user, expires = entry
+            if expires < time.monotonic():
+                del self.entries[user_id]
+                return None
+            self.entries.move_to_end(user_id)
+        # Callers get their own copy so the shared instance is never mutated
+        return copy.copy(user)
+
+    def set(self, user_id, user):
+        user_id = str(user_id)
+        with self.lock:
+            self.entries[user_id] = (user, time.monotonic() + self.ttl)
+            self.entries.move_to_end(user_id)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def invalidate(self, user_id):
+        with self.lock:
+            self.entries.pop(str(user_id), None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+user_cache = UserCache(maxsize=settings.AUTH_USER_CACHE_SIZE, ttl=settings.AUTH_USER_CACHE_TTL)
+
+
+def get_cached_user(user_id):
+    user = user_cache.get(user_id)
+    if user is None:
+        try:
+            user = User.objects.get(**{api_settings.USER_ID_FIELD: user_id})
+        except User.DoesNotExist:
+            raise AuthenticationFailed('User not found', code='user_not_found')
+        user_cache.set(user_id, copy.copy(user))
+    return user
+
+
+async def aget_cached_user(user_id):
+    user = user_cache.get(user_id)
+    if user is None:
+        try:
+            user = await User.objects.aget(**{api_settings.USER_ID_FIELD: user_id})
+        except User.DoesNotExist:
+            raise AuthenticationFailed('User not found', code='user_not_found')
+        user_cache.set(user_id, copy.copy(user))
+    return user
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that skips the per-request User query. Access tokens
+    from User.tokens() carry the user's name, role and status as claims, so
+    the user is built straight from them; tokens without the claims fall
+    back to user_cache. Claims are only as fresh as the token, which
+    lives for SIMPLE_JWT['ACCESS_TOKEN_LIFETIME'].
+    """
+
+    def get_user(self, validated_token):
+        if api_settings.CHECK_REVOKE_TOKEN:
+            # Needs the stored password hash, so always read the row
+            return super().get_user(validated_token)
+
+        user = self.get_claims_user(validated_token)
+        if user is None:
+            user = get_cached_user(self.get_user_id(validated_token))
+        return self.check_user(user)
+
+    async def aauthenticate(self, request):
+        """authenticate() for async views; only a cache miss touches the database."""
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        validated_token = self.get_validated_token(raw_token)
+        return await self.aget_user(validated_token), validated_token
+
+    async def aget_user(self, validated_token):
+        if api_settings.CHECK_REVOKE_TOKEN:
+            return await sync_to_async(super().get_user)(validated_token)
+
+        user = self.get_claims_user(validated_token)
+        if user is None:
+            user = await aget_cached_user(self.get_user_id(validated_token))
+        return self.check_user(user)
+
+    def get_user_id(self, validated_token):
+        try:
+            return validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken('Token contained no recognizable user identification')
+
+    def get_claims_user(self, validated_token):
+        if all(claim in validated_token for claim in TOKEN_CLAIMS):
+            return TokenClaimsUser.from_claims(self.get_user_id(validated_token), validated_token)
+        return None
+
+    def check_user(self, user):
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed('User is inactive', code='user_inactive')
+        return user
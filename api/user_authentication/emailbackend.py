@@ -3,6 +3,8 @@ import smtplib
 
 class CustomEmailBackend(EmailBackend):
     def open(self):
+        # Returns False when already connected, so send_messages() on an
+        # open backend reuses the connection instead of logging in again
         if self.connection:
             return False
         try:
@@ -11,8 +13,13 @@ class CustomEmailBackend(EmailBackend):
             if self.use_tls:
                 self.connection.starttls(context=self.ssl_context)
                 self.connection.ehlo('localhost')
-            self.connection.login(self.username, self.password)
+            if self.username and self.password:
+                self.connection.login(self.username, self.password)
             return True
         except:
+            # Don't leave a half-open connection behind for the next open()
+            if self.connection:
+                self.connection.close()
+                self.connection = None
             if not self.fail_silently:
                 raise
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from user_authentication.revocation import revocation_store
+
+
+class Command(BaseCommand):
+    help = 'Delete revoked refresh tokens that have expired and no longer need to be remembered.'
+
+    def handle(self, *args, **options):
+        deleted = revocation_store.purge()
+        self.stdout.write(self.style.SUCCESS(f'Purged {deleted} expired revoked tokens.'))
@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from user_authentication.outbox import OutboxWorker
+
+
+class Command(BaseCommand):
+    help = 'Send queued emails in batches over one SMTP connection per batch, retrying failures with backoff.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, help='Emails per SMTP connection; defaults to OUTBOX_BATCH_SIZE.')
+        parser.add_argument('--watch', action='store_true', help='Keep polling for new emails instead of exiting once drained.')
+        parser.add_argument('--interval', type=float, default=5, help='Seconds between polls with --watch.')
+
+    def handle(self, *args, **options):
+        while True:
+            worker = OutboxWorker(batch_size=options['batch_size'])
+            stats = worker.drain()
+            if any(stats.values()) or not options['watch']:
+                self.stdout.write(
+                    f"Sent {stats['sent']}, will retry {stats['retried']}, gave up on {stats['failed']}."
+                )
+            if not options['watch']:
+                return
+            time.sleep(options['interval'])
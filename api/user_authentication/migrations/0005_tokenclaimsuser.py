@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:25
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user_authentication', '0004_outboxemail'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TokenClaimsUser',
+            fields=[
+            ],
+            options={
+                'proxy': True,
+                'indexes': [],
+                'constraints': [],
+            },
+            bases=('user_authentication.user',),
+        ),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin
 from rest_framework_simplejwt.tokens import RefreshToken
 
@@ -31,6 +32,10 @@ class UserManager(BaseUserManager):
         extra_fields.setdefault('role', User.MANAGER)
         return self.create_user(email, password, **extra_fields)
 
+# User fields copied into access tokens by User.tokens(), so requests can
+# rebuild the user without a query (see TokenClaimsUser)
+TOKEN_CLAIMS = ['email', 'first_name', 'last_name', 'role', 'is_active', 'is_verified']
+
 class User(AbstractBaseUser, PermissionsMixin):
     EMPLOYEE = 'employee'
     MANAGER = 'manager'
@@ -65,10 +70,87 @@ class User(AbstractBaseUser, PermissionsMixin):
 
     def tokens(self):
         refresh = RefreshToken.for_user(self)
+        access = refresh.access_token
+        # Read by ClaimsJWTAuthentication instead of loading the user. Only
+        # the access token carries them; the refresh view adds them afresh
+        self.add_token_claims(access)
         return {
             'refresh': str(refresh),
-            'access': str(refresh.access_token)
+            'access': str(access)
         }
 
+    def add_token_claims(self, token):
+        for claim in TOKEN_CLAIMS:
+            token[claim] = getattr(self, claim)
+
     def has_inventory_permission(self):
         return self.role in {self.MANAGER, self.ADMIN}
+
+class TokenClaimsUser(User):
+    """
+    A User rebuilt from access token claims by ClaimsJWTAuthentication. It
+    works anywhere a User is assigned to a foreign key, but only the claimed
+    fields are filled in, so it refuses to be saved.
+    """
+    class Meta:
+        proxy = True
+
+    @classmethod
+    def from_claims(cls, user_id, claims):
+        user = cls(id=cls._meta.pk.to_python(user_id), **{claim: claims[claim] for claim in TOKEN_CLAIMS})
+        user._state.adding = False
+        return user
+
+    def save(self, *args, **kwargs):
+        raise NotImplementedError('Users built from token claims cannot be saved; load the User instead.')
+
+    def delete(self, *args, **kwargs):
+        raise NotImplementedError('Users built from token claims cannot be deleted; load the User instead.')
+
+class OutboxEmail(models.Model):
+    """
+    An email waiting to be sent. Request handlers only insert rows here;
+    manage.py send_outbox delivers them over one SMTP connection per batch.
+    """
+    PENDING = 'pending'
+    SENT = 'sent'
+    FAILED = 'failed'
+
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (SENT, 'Sent'),
+        (FAILED, 'Failed'),
+    ]
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    html_body = models.TextField(blank=True)
+    from_email = models.CharField(max_length=255, blank=True)
+    to_email = models.EmailField(max_length=255)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # The worker's queue: pending emails that are due, oldest first
+            models.Index(fields=['next_attempt_at', 'id'], condition=models.Q(status='pending'), name='outbox_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} to {self.to_email} ({self.status})"
+
+class RevokedToken(models.Model):
+    """
+    A refresh token revoked before its expiry, e.g. on logout. Rows are only
+    needed until expires_at; see revocation.py for the in-process copy that
+    requests actually check.
+    """
+    jti = models.CharField(max_length=255, unique=True)
+    expires_at = models.DateTimeField(db_index=True)
+    revoked_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    def __str__(self):
+        return f"{self.jti} (expires {self.expires_at})"
@@ -0,0 +1,114 @@
+import smtplib
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db.models import F
+from django.utils import timezone
+
+from .models import OutboxEmail
+
+
+def enqueue_email(subject, body, to_email, html_body='', from_email=''):
+    """Queue an email for the send_outbox worker; costs one INSERT."""
+    return OutboxEmail.objects.create(
+        subject=subject, body=body, html_body=html_body, from_email=from_email or '', to_email=to_email,
+    )
+
+
+def retry_delay(attempts):
+    # Exponential backoff: base, 2x base, 4x base, ... capped
+    return timedelta(seconds=min(settings.OUTBOX_RETRY_DELAY * 2 ** (attempts - 1), settings.OUTBOX_MAX_RETRY_DELAY))
+
+
+def build_message(email, connection):
+    message = EmailMultiAlternatives(
+        subject=email.subject,
+        body=email.body,
+        from_email=email.from_email or None,
+        to=[email.to_email],
+        connection=connection,
+    )
+    if email.html_body:
+        message.attach_alternative(email.html_body, 'text/html')
+    return message
+
+
+class OutboxWorker:
+    """
+    Drains OutboxEmail in batches. Each batch is claimed by pushing its
+    next_attempt_at forward by a lease, so several workers can run at once
+    and a crashed worker's batch is picked up again once the lease runs out.
+    All messages in a batch go out over one SMTP connection.
+    """
+
+    def __init__(self, batch_size=None, max_attempts=None, lease_seconds=300):
+        self.batch_size = batch_size or settings.OUTBOX_BATCH_SIZE
+        self.max_attempts = max_attempts or settings.OUTBOX_MAX_ATTEMPTS
+        self.lease = timedelta(seconds=lease_seconds)
+        self.stats = {'sent': 0, 'retried': 0, 'failed': 0}
+
+    def claim_batch(self):
+        now = timezone.now()
+        due = OutboxEmail.objects.filter(status=OutboxEmail.PENDING, next_attempt_at__lte=now)
+        ids = list(due.order_by('next_attempt_at', 'id').values_list('id', flat=True)[:self.batch_size])
+        if not ids:
+            return []
+        lease_until = now + self.lease
+        if not due.filter(id__in=ids).update(next_attempt_at=lease_until):
+            return []
+        # Rows another worker claimed first carry that worker's lease instead
+        return list(OutboxEmail.objects.filter(id__in=ids, next_attempt_at=lease_until).order_by('id'))
+
+    def send_batch(self):
+        """Send one claimed batch; returns the number of emails it held."""
+        emails = self.claim_batch()
+        if not emails:
+            return 0
+
+        connection = get_connection(fail_silently=False)
+        sent = []
+        try:
+            for index, email in enumerate(emails):
+                try:
+                    connection.open()
+                except Exception as exc:
+                    # Nothing else in the batch can go out either
+                    for pending in emails[index:]:
+                        self.record_failure(pending, exc)
+                    break
+                try:
+                    # The connection is already open, so send_messages reuses it
+                    connection.send_messages([build_message(email, connection)])
+                except Exception as exc:
+                    self.record_failure(email, exc)
+                    if isinstance(exc, smtplib.SMTPServerDisconnected) or not isinstance(exc, smtplib.SMTPException):
+                        connection.close()
+                else:
+                    sent.append(email.id)
+        finally:
+            connection.close()
+
+        if sent:
+            OutboxEmail.objects.filter(id__in=sent).update(
+                status=OutboxEmail.SENT, sent_at=timezone.now(), attempts=F('attempts') + 1, last_error='',
+            )
+            self.stats['sent'] += len(sent)
+        return len(emails)
+
+    def record_failure(self, email, exc):
+        attempts = email.attempts + 1
+        changes = {'attempts': attempts, 'last_error': f'{type(exc).__name__}: {exc}'[:2000]}
+        if attempts >= self.max_attempts:
+            changes['status'] = OutboxEmail.FAILED
+            self.stats['failed'] += 1
+        else:
+            changes['next_attempt_at'] = timezone.now() + retry_delay(attempts)
+            self.stats['retried'] += 1
+        OutboxEmail.objects.filter(id=email.id).update(**changes)
+
+    def drain(self):
+        """Send batches until nothing is due; returns the counts for this run."""
+        while self.send_batch():
+            pass
+        return self.stats
@@ -0,0 +1,125 @@
+import threading
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.utils import timezone
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .authentication import get_cached_user
+from .models import RevokedToken
+
+
+class RevocationStore:
+    """
+    Revoked refresh token ids, held in a per-process dict of jti -> expiry
+    so checking a token is a dict lookup. RevokedToken rows make revocations
+    durable and visible to other processes: each process pulls rows revoked
+    since its last sync at most every sync_interval seconds, so a logout
+    reaches every worker within that window. Entries are dropped once their
+    token would have expired anyway, both here and in the table.
+    """
+    # Re-read a little before the last sync so rows from transactions that
+    # committed late are not missed
+    sync_overlap = timedelta(seconds=60)
+
+    def __init__(self, sync_interval=5, purge_interval=3600):
+        self.sync_interval = sync_interval
+        self.purge_interval = purge_interval
+        self.entries = {}
+        self.lock = threading.Lock()
+        self.synced_at = None
+        self.next_sync = 0
+        self.next_purge = 0
+
+    def is_revoked(self, jti):
+        if time.monotonic() >= self.next_sync:
+            self.sync()
+        expires = self.entries.get(jti)
+        return expires is not None and expires > time.time()
+
+    def revoke(self, jti, exp):
+        """Revoke a token id until its exp (a Unix timestamp)."""
+        expires_at = datetime.fromtimestamp(exp, tz=dt_timezone.utc)
+        RevokedToken.objects.get_or_create(jti=jti, defaults={'expires_at': expires_at})
+        with self.lock:
+            self.entries[jti] = exp
+        if time.monotonic() >= self.next_purge:
+            self.purge()
+
+    def sync(self):
+        started = timezone.now()
+        rows = RevokedToken.objects.filter(expires_at__gt=started)
+        if self.synced_at is not None:
+            rows = rows.filter(revoked_at__gte=self.synced_at - self.sync_overlap)
+        rows = list(rows.values_list('jti', 'expires_at'))
+        now = time.time()
+        with self.lock:
+            for jti, expires_at in rows:
+                self.entries[jti] = expires_at.timestamp()
+            # Expired tokens fail verification anyway, so forget them
+            for jti in [jti for jti, expires in self.entries.items() if expires <= now]:
+                del self.entries[jti]
+            self.synced_at = started
+            self.next_sync = time.monotonic() + self.sync_interval
+
+    def purge(self):
+        """Delete rows for tokens that have expired; returns how many went."""
+        self.next_purge = time.monotonic() + self.purge_interval
+        deleted, _ = RevokedToken.objects.filter(expires_at__lte=timezone.now()).delete()
+        return deleted
+
+    def reset(self):
+        with self.lock:
+            self.entries.clear()
+            self.synced_at = None
+            self.next_sync = 0
+            self.next_purge = 0
+
+
+revocation_store = RevocationStore(
+    sync_interval=settings.TOKEN_REVOCATION_SYNC_INTERVAL,
+    purge_interval=settings.TOKEN_REVOCATION_PURGE_INTERVAL,
+)
+
+
+class RevocableRefreshToken(RefreshToken):
+    def verify(self, *args, **kwargs):
+        super().verify(*args, **kwargs)
+        if revocation_store.is_revoked(self.payload.get('jti')):
+            raise TokenError('Token is revoked')
+
+    def revoke(self):
+        revocation_store.revoke(self.payload['jti'], self.payload['exp'])
+
+
+class RevocableTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    TokenRefreshSerializer that checks the revocation store, and reads the
+    user through the authentication cache instead of querying it. The new
+    access token gets the same claims User.tokens() adds.
+    """
+    token_class = RevocableRefreshToken
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        user = get_cached_user(refresh.payload.get(api_settings.USER_ID_CLAIM))
+        if not api_settings.USER_AUTHENTICATION_RULE(user):
+            raise AuthenticationFailed(self.error_messages['no_active_account'], 'no_active_account')
+
+        access = refresh.access_token
+        user.add_token_claims(access)
+        data = {'access': str(access)}
+
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            if api_settings.BLACKLIST_AFTER_ROTATION:
+                refresh.revoke()
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            data['refresh'] = str(refresh)
+        return data
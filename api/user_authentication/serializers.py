@@ -1,13 +1,15 @@
 from rest_framework import serializers
+from backend.timing import TimedSerializerMixin
 from .models import User
 from django.contrib.auth.tokens import PasswordResetTokenGenerator
-from rest_framework_simplejwt.tokens import RefreshToken, TokenError
+from rest_framework_simplejwt.tokens import TokenError
 from rest_framework.exceptions import AuthenticationFailed
 from django.utils.encoding import smart_str, force_str, smart_bytes, DjangoUnicodeDecodeError
 from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
+from .revocation import RevocableRefreshToken
 
 
-class RegisterSerializer(serializers.ModelSerializer):
+class RegisterSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     first_name = serializers.CharField(max_length=30)
     last_name = serializers.CharField(max_length=30)
     password = serializers.CharField(max_length=68, min_length=6, write_only=True)
@@ -21,7 +23,7 @@ class RegisterSerializer(serializers.ModelSerializer):
         return User.objects.create_user(**validated_data)
 
 
-class EmailVerificationSerializer(serializers.ModelSerializer):
+class EmailVerificationSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     token = serializers.CharField(max_length=555)
     
     class Meta:
@@ -29,7 +31,7 @@ class EmailVerificationSerializer(serializers.ModelSerializer):
         fields = ['token']
 
 
-class LoginSerializer(serializers.Serializer):
+class LoginSerializer(TimedSerializerMixin, serializers.Serializer):
     email = serializers.EmailField(max_length=255, min_length=3)
     password = serializers.CharField(max_length=68, min_length=6, write_only=True)
     tokens = serializers.SerializerMethodField()
@@ -58,7 +60,7 @@ class LoginSerializer(serializers.Serializer):
         raise AuthenticationFailed('Invalid credentials, try again')
 
 
-class ResetPasswordEmailRequestSerializer(serializers.Serializer):
+class ResetPasswordEmailRequestSerializer(TimedSerializerMixin, serializers.Serializer):
     email = serializers.EmailField(min_length=2)
     redirect_url = serializers.CharField(max_length=500, required=False)
 
@@ -66,7 +68,7 @@ class ResetPasswordEmailRequestSerializer(serializers.Serializer):
         fields = ['email']
 
 
-class SetNewPasswordSerializer(serializers.Serializer):
+class SetNewPasswordSerializer(TimedSerializerMixin, serializers.Serializer):
     password = serializers.CharField(min_length=6, max_length=68, write_only=True)
     token = serializers.CharField(min_length=1, write_only=True)
     uidb64 = serializers.CharField(min_length=1, write_only=True)
@@ -90,10 +92,10 @@ class SetNewPasswordSerializer(serializers.Serializer):
             raise AuthenticationFailed('The reset link is invalid', 401)
 
 
-class LogoutSerializer(serializers.Serializer):
+class LogoutSerializer(TimedSerializerMixin, serializers.Serializer):
     refresh = serializers.CharField()
 
-    default_error_message = {
+    default_error_messages = {
         'bad_token': ('Token is expired or invalid')
     }
 
@@ -103,6 +105,6 @@ class LogoutSerializer(serializers.Serializer):
 
     def save(self, **kwargs):
         try:
-            RefreshToken(self.token).blacklist()
+            RevocableRefreshToken(self.token).revoke()
         except TokenError:
             self.fail('bad_token')
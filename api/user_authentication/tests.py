@@ -1,3 +1,266 @@
-from django.test import TestCase
+import io
+import socketserver
+import threading
+from datetime import timedelta
 
-# Create your tests here.
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from inventory.models import Category, InventoryItem, InventoryUpdateRequest
+from .authentication import user_cache
+from .models import OutboxEmail, RevokedToken, TokenClaimsUser, User
+from .outbox import OutboxWorker
+from .revocation import RevocationStore, revocation_store
+from .utils import Util
+
+
+class FakeSMTPHandler(socketserver.StreamRequestHandler):
+    """Just enough SMTP for smtplib: no auth, no TLS, refuses RCPT for rejected addresses."""
+
+    def reply(self, line):
+        self.wfile.write(f'{line}\r\n'.encode())
+
+    def handle(self):
+        server = self.server
+        server.connections += 1
+        recipients = []
+        self.reply('220 localhost ready')
+        while True:
+            line = self.rfile.readline().decode().strip()
+            if not line:
+                return
+            command = line[:4].upper()
+            if command in ('EHLO', 'HELO'):
+                self.reply('250 localhost')
+            elif command == 'MAIL':
+                recipients = []
+                self.reply('250 OK')
+            elif command == 'RCPT':
+                address = line.split(':', 1)[1].strip('<> ')
+                if address in server.rejected:
+                    self.reply('550 No such user')
+                else:
+                    recipients.append(address)
+                    self.reply('250 OK')
+            elif command == 'DATA':
+                self.reply('354 End data with <CR><LF>.<CR><LF>')
+                data = []
+                while True:
+                    data_line = self.rfile.readline()
+                    if data_line in (b'.\r\n', b''):
+                        break
+                    data.append(data_line)
+                server.messages.append((recipients, b''.join(data)))
+                self.reply('250 OK')
+            elif command == 'QUIT':
+                self.reply('221 Bye')
+                return
+            else:
+                # RSET, NOOP
+                self.reply('250 OK')
+
+
+class FakeSMTPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), FakeSMTPHandler)
+        self.connections = 0
+        self.messages = []
+        self.rejected = set()
+
+
+class OutboxTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.smtp = FakeSMTPServer()
+        threading.Thread(target=cls.smtp.serve_forever, daemon=True).start()
+        cls.smtp_settings = override_settings(
+            EMAIL_BACKEND='user_authentication.emailbackend.CustomEmailBackend',
+            EMAIL_HOST='127.0.0.1',
+            EMAIL_PORT=cls.smtp.server_address[1],
+            EMAIL_USE_TLS=False,
+            EMAIL_HOST_USER='',
+            EMAIL_HOST_PASSWORD='',
+            EMAIL_TIMEOUT=5,
+        )
+        cls.smtp_settings.enable()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.smtp_settings.disable()
+        cls.smtp.shutdown()
+        cls.smtp.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        self.smtp.connections = 0
+        self.smtp.messages = []
+        self.smtp.rejected = set()
+
+    def queue(self, *addresses):
+        for address in addresses:
+            Util.send_email({'email_subject': 'Hello', 'email_body': '<p>Hi there</p>', 'to_email': address})
+
+    def test_requests_only_enqueue(self):
+        response = self.client.post(reverse('register'), {
+            'email': 'new@example.com', 'first_name': 'New', 'last_name': 'Person', 'password': 'password123',
+        })
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.smtp.connections, 0)
+        self.assertEqual(OutboxEmail.objects.get().to_email, 'new@example.com')
+
+    def test_worker_sends_a_batch_over_one_connection(self):
+        self.queue('a@example.com', 'b@example.com', 'c@example.com')
+
+        out = io.StringIO()
+        call_command('send_outbox', stdout=out)
+        self.assertIn('Sent 3', out.getvalue())
+        self.assertEqual(self.smtp.connections, 1)
+        self.assertEqual([recipients for recipients, _ in self.smtp.messages], [['a@example.com'], ['b@example.com'], ['c@example.com']])
+        self.assertIn(b'text/html', self.smtp.messages[0][1])
+        self.assertFalse(OutboxEmail.objects.exclude(status=OutboxEmail.SENT).exists())
+
+    def test_failures_back_off_then_give_up(self):
+        self.smtp.rejected = {'bounce@example.com'}
+        self.queue('bounce@example.com', 'ok@example.com')
+
+        stats = OutboxWorker(max_attempts=2).drain()
+        self.assertEqual(stats, {'sent': 1, 'retried': 1, 'failed': 0})
+        bounce = OutboxEmail.objects.get(to_email='bounce@example.com')
+        self.assertEqual((bounce.status, bounce.attempts), (OutboxEmail.PENDING, 1))
+        self.assertGreater(bounce.next_attempt_at, timezone.now())
+        self.assertIn('SMTPRecipientsRefused', bounce.last_error)
+
+        # Not due yet, so a second run leaves it alone
+        self.assertEqual(OutboxWorker(max_attempts=2).drain(), {'sent': 0, 'retried': 0, 'failed': 0})
+
+        OutboxEmail.objects.filter(id=bounce.id).update(next_attempt_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(OutboxWorker(max_attempts=2).drain()['failed'], 1)
+        self.assertEqual(OutboxEmail.objects.get(id=bounce.id).status, OutboxEmail.FAILED)
+
+    def test_unreachable_server_retries_the_whole_batch(self):
+        self.queue('a@example.com', 'b@example.com')
+        with override_settings(EMAIL_PORT=1):
+            stats = OutboxWorker().drain()
+        self.assertEqual(stats['retried'], 2)
+        self.assertEqual(set(OutboxEmail.objects.values_list('attempts', flat=True)), {1})
+
+
+class ClaimsAuthenticationTests(TestCase):
+    client_class = APIClient
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.manager = User.objects.create_user('boss@example.com', 'Max', 'Boss', 'password123', role=User.MANAGER)
+        cls.employee = User.objects.create_user('staff@example.com', 'Sam', 'Staff', 'password123')
+        category = Category.objects.create(name='Linen')
+        cls.item = InventoryItem.objects.create(name='Towel', quantity=1, price='1.00', category=category)
+
+    def setUp(self):
+        user_cache.clear()
+
+    def authenticate(self, token):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def bulk_action(self):
+        return self.client.post(reverse('inventory_request_bulk_action'), {}, format='json')
+
+    def test_role_checks_need_no_user_query(self):
+        self.authenticate(self.manager.tokens()['access'])
+        with self.assertNumQueries(0):
+            self.assertEqual(self.bulk_action().status_code, 400)
+
+        self.authenticate(self.employee.tokens()['access'])
+        with self.assertNumQueries(0):
+            self.assertEqual(self.bulk_action().status_code, 403)
+
+    def test_claims_user_can_be_assigned_to_relations(self):
+        self.authenticate(self.employee.tokens()['access'])
+        response = self.client.post(reverse('inventory_requests'), {'item': self.item.id, 'requested_quantity': 5})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['submitted_by_first_name'], 'Sam')
+        self.assertEqual(InventoryUpdateRequest.objects.get().submitted_by, self.employee)
+        self.assertEqual(response.wsgi_request.user.pk, self.employee.pk)
+
+        with self.assertRaises(NotImplementedError):
+            TokenClaimsUser.from_claims(self.employee.id, {
+                'email': 'x@example.com', 'first_name': '', 'last_name': '', 'role': User.ADMIN,
+                'is_active': True, 'is_verified': True,
+            }).save()
+
+    def test_tokens_without_claims_use_the_user_cache(self):
+        # Access tokens from the refresh view carry only the user id
+        self.authenticate(RefreshToken.for_user(self.manager).access_token)
+        with self.assertNumQueries(1):
+            self.assertEqual(self.bulk_action().status_code, 400)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.bulk_action().status_code, 400)
+
+        self.manager.role = User.EMPLOYEE
+        self.manager.save()
+        self.assertEqual(self.bulk_action().status_code, 403)
+
+    def test_inactive_users_are_rejected(self):
+        self.employee.is_active = False
+        self.employee.save()
+        self.authenticate(self.employee.tokens()['access'])
+        self.assertEqual(self.bulk_action().status_code, 401)
+        self.authenticate(RefreshToken.for_user(self.employee).access_token)
+        self.assertEqual(self.bulk_action().status_code, 401)
+
+
+class TokenRevocationTests(TestCase):
+    client_class = APIClient
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('staff@example.com', 'Sam', 'Staff', 'password123')
+
+    def setUp(self):
+        revocation_store.reset()
+        user_cache.clear()
+        self.tokens = self.user.tokens()
+
+    def refresh(self):
+        return self.client.post(reverse('token_refresh'), {'refresh': self.tokens['refresh']}, format='json')
+
+    def test_logout_revokes_the_refresh_token(self):
+        response = self.refresh()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(AccessToken(response.json()['access'])['role'], User.EMPLOYEE)
+
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.tokens['access']}")
+        self.assertEqual(self.client.post(reverse('logout'), {'refresh': self.tokens['refresh']}).status_code, 204)
+        self.assertEqual(self.refresh().status_code, 401)
+        self.assertEqual(self.client.post(reverse('logout'), {'refresh': 'garbage'}).status_code, 400)
+
+    def test_refreshing_does_not_touch_the_database(self):
+        self.refresh()
+        with self.assertNumQueries(0):
+            self.assertEqual(self.refresh().status_code, 200)
+
+    def test_other_processes_pick_up_revocations_on_sync(self):
+        jti = RefreshToken(self.tokens['refresh'])['jti']
+        store = RevocationStore(sync_interval=3600)
+        self.assertFalse(store.is_revoked(jti))
+
+        revocation_store.revoke(jti, RefreshToken(self.tokens['refresh'])['exp'])
+        with self.assertNumQueries(0):
+            self.assertFalse(store.is_revoked(jti))
+        store.next_sync = 0
+        self.assertTrue(store.is_revoked(jti))
+
+    def test_expired_revocations_are_purged(self):
+        RevokedToken.objects.create(jti='old', expires_at=timezone.now() - timedelta(seconds=1))
+        RevokedToken.objects.create(jti='live', expires_at=timezone.now() + timedelta(hours=1))
+        out = io.StringIO()
+        call_command('purge_revoked_tokens', stdout=out)
+        self.assertIn('Purged 1', out.getvalue())
+        self.assertEqual(list(RevokedToken.objects.values_list('jti', flat=True)), ['live'])
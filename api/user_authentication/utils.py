@@ -1,30 +1,17 @@
-from django.core.mail import EmailMessage, send_mail
 from django.utils.html import strip_tags
 import os
-import threading
 
-
-class EmailThread(threading.Thread):
-
-    def __init__(self, email):
-        self.email = email
-        threading.Thread.__init__(self)
-
-    def run(self):
-        self.email
+from .outbox import enqueue_email
 
 
 class Util:
 
     @staticmethod
     def send_email(data):
-        plain_message = strip_tags(data['email_body'])
-        EmailThread(
-            send_mail(subject=data['email_subject'],
-                          message=plain_message,
-                          from_email=os.environ.get('OUTLOOK_EMAIL'),
-                          recipient_list=[data['to_email']],
-                          html_message=data['email_body'],
-                          fail_silently=False
-                          )
-                ).start()
\ No newline at end of file
+        # Queued for manage.py send_outbox so requests never wait on SMTP
+        enqueue_email(subject=data['email_subject'],
+                      body=strip_tags(data['email_body']),
+                      to_email=data['to_email'],
+                      html_body=data['email_body'],
+                      from_email=os.environ.get('OUTLOOK_EMAIL')
+                      )
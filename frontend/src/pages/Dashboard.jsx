@@ -2,6 +2,7 @@ import React, {
   useCallback,
   useEffect,
   useMemo,
+  useRef,
   useState,
 } from "react";
 import { useNavigate } from "react-router-dom";
@@ -18,6 +19,7 @@ import {
 import MainLayout from "../components/MainLayout";
 import DashboardCard from "../components/DashboardCard";
 import SearchBar from "../components/SearchBar";
+import useInventoryEvents, { applyItemEvent } from "../utilities/useInventoryEvents";
 import SkeletonLoader from "../components/SkeletonLoader";
 import API from "../utilities/Axios";
 
@@ -94,6 +96,7 @@ function Dashboard() {
   const [filteredItems, setFilteredItems] = useState([]);
   const [categories, setCategories] = useState(["All categories"]);
   const [isLoading, setIsLoading] = useState(true);
+  const [reloadCount, setReloadCount] = useState(0);
   const [error, setError] = useState(null);
 
   const navigate = useNavigate();
@@ -139,27 +142,82 @@ function Dashboard() {
     return () => {
       isMounted = false;
     };
+  }, [reloadCount]);
+
+  // Patch changed items from the change stream; the filtered view updates
+  // the items it shows but only picks up new ones on the next search
+  const setLoadedItems = useCallback((update) => {
+    setInventoryItems(update);
+    setFilteredItems((prevItems) =>
+      update(prevItems).filter((item) =>
+        prevItems.some((shown) => shown.id === item.id)
+      )
+    );
   }, []);
 
-  // Search handler wrapped with useCallback
+  useInventoryEvents({
+    onItem: (event) => applyItemEvent(setLoadedItems, event),
+    onReset: () => setReloadCount((count) => count + 1),
+  });
+
+  const searchTimer = useRef(null);
+  const latestSearch = useRef(0);
+
+  // Search handler wrapped with useCallback. Plain substring hits on item and
+  // category names show up at once; the server's ranked, typo tolerant name
+  // search then adds its matches ahead of them. Results from stale keystrokes
+  // are ignored.
   const handleSearch = useCallback(
     (searchTerm, category) => {
-      const trimmedTerm = searchTerm.trim().toLowerCase();
-      const normalizedCategory = category;
-
-      const filtered = inventoryItems.filter((item) => {
+      const trimmedTerm = searchTerm.trim();
+      const lowerTerm = trimmedTerm.toLowerCase();
+      const matchesCategory = (item) =>
+        category === "" || (item.category || "Uncategorized") === category;
+      const substringMatches = inventoryItems.filter((item) => {
         const categoryName = item.category || "Uncategorized";
-        const matchesCategory =
-          normalizedCategory === "" || categoryName === normalizedCategory;
-        const matchesSearch =
-          trimmedTerm === "" ||
-          item.name.toLowerCase().includes(trimmedTerm) ||
-          categoryName.toLowerCase().includes(trimmedTerm);
-
-        return matchesCategory && matchesSearch;
+        return (
+          item.name.toLowerCase().includes(lowerTerm) ||
+          categoryName.toLowerCase().includes(lowerTerm)
+        );
       });
 
-      setFilteredItems(filtered);
+      clearTimeout(searchTimer.current);
+      const searchId = ++latestSearch.current;
+      setFilteredItems(substringMatches.filter(matchesCategory));
+      if (trimmedTerm === "") {
+        return;
+      }
+
+      searchTimer.current = setTimeout(async () => {
+        try {
+          const response = await API.get("inventory/search/", {
+            params: { q: trimmedTerm, limit: 50 },
+          });
+          if (searchId !== latestSearch.current) {
+            return;
+          }
+
+          // Ranked item matches first, then every substring hit the top 50
+          // left out, then the items of matching categories
+          const matchedCategories = new Set(
+            response.data.categories.map((match) => match.name)
+          );
+          const categoryItems = inventoryItems.filter((item) =>
+            matchedCategories.has(item.category)
+          );
+          const merged = new Map();
+          [...response.data.items, ...substringMatches, ...categoryItems].forEach(
+            (item) => {
+              if (!merged.has(item.id)) {
+                merged.set(item.id, item);
+              }
+            }
+          );
+          setFilteredItems([...merged.values()].filter(matchesCategory));
+        } catch (searchError) {
+          console.error("Error searching inventory:", searchError);
+        }
+      }, 200);
     },
     [inventoryItems]
   );
@@ -6,8 +6,12 @@ import API from "../utilities/Axios";
 import EditModal from "../components/EditModal";
 import ConfirmDeleteModal from "../components/DeleteButton";
 import ToastStack from "../components/ToastStack";
-import { deleteInventoryItem } from "../utilities/InventoryAPI";
+import {
+  bulkSaveInventoryItems,
+  deleteInventoryItem,
+} from "../utilities/InventoryAPI";
 import SkeletonLoader from "../components/SkeletonLoader";
+import useInventoryEvents, { applyItemEvent } from "../utilities/useInventoryEvents";
 import { FaSort } from "react-icons/fa";
 
 const formatCategoryLabel = (rawCategory) =>
@@ -43,10 +47,17 @@ const InventoryManagement = () => {
   const { category } = useParams();
   const [inventoryItems, setInventoryItems] = useState([]);
   const [loading, setLoading] = useState(true);
+  const [reloadCount, setReloadCount] = useState(0);
   const [isEditModalOpen, setIsEditModalOpen] = useState(false);
   const [currentItem, setCurrentItem] = useState(null);
-  const { role } = useAuth();
+  const { tokens, role } = useAuth();
   const formattedCategory = formatCategoryLabel(category);
+  // Managers edit quantities in the grid and save every changed row in one
+  // request to the bulk endpoint
+  const canEditInGrid = role === "manager" || role === "admin";
+  const [quantityEdits, setQuantityEdits] = useState({});
+  const [isSavingEdits, setIsSavingEdits] = useState(false);
+  const editCount = Object.keys(quantityEdits).length;
 
   const openEditModal = (item) => {
     setCurrentItem(item);
@@ -155,6 +166,57 @@ const InventoryManagement = () => {
     }
   };
 
+  const editQuantity = (item, value) => {
+    setQuantityEdits((prevEdits) => {
+      const nextEdits = { ...prevEdits };
+      if (value === String(item.quantity)) {
+        delete nextEdits[item.id];
+      } else {
+        nextEdits[item.id] = value;
+      }
+      return nextEdits;
+    });
+  };
+
+  const saveQuantityEdits = async () => {
+    // Rows carry only the id and what changed; the server keeps the rest
+    const rows = Object.entries(quantityEdits).map(([id, quantity]) => ({
+      id: Number(id),
+      quantity: Number(quantity),
+    }));
+    setIsSavingEdits(true);
+    try {
+      const savedItems = await bulkSaveInventoryItems(rows, tokens?.access);
+      const savedById = new Map(savedItems.map((item) => [item.id, item]));
+      setInventoryItems((prevItems) =>
+        prevItems.map((item) => savedById.get(item.id) ?? item)
+      );
+      setQuantityEdits({});
+      pushToast({
+        tone: "success",
+        title: "Changes saved",
+        description: `Updated ${savedItems.length} item${savedItems.length === 1 ? "" : "s"}.`,
+      });
+    } catch (error) {
+      // Nothing is written unless every row is valid
+      const rowErrors = error?.response?.data?.errors;
+      const firstError = Array.isArray(rowErrors) ? rowErrors[0] : null;
+      const failedItem = firstError ? rows[firstError.index] : null;
+      const failedName = failedItem
+        ? inventoryItems.find((item) => item.id === failedItem.id)?.name
+        : null;
+      pushToast({
+        tone: "error",
+        title: "Save failed",
+        description: failedName
+          ? `${failedName}: ${Object.values(firstError.errors).flat().join(" ")}`
+          : "We couldn't save your changes. Please try again.",
+      });
+    } finally {
+      setIsSavingEdits(false);
+    }
+  };
+
   const [sortConfig, setSortConfig] = useState({
     key: null,
     direction: "ascending",
@@ -252,7 +314,18 @@ const InventoryManagement = () => {
     };
 
     fetchItems();
-  }, [category]);
+  }, [category, reloadCount]);
+
+  // Keep the list current from the change stream instead of re-pulling it
+  useInventoryEvents({
+    onItem: (event) =>
+      applyItemEvent(
+        setInventoryItems,
+        event,
+        (item) => item.category === decodeURIComponent(category)
+      ),
+    onReset: () => setReloadCount((count) => count + 1),
+  });
 
   // if (loading) {
   //   return <SkeletonLoader />;
@@ -285,6 +358,28 @@ const InventoryManagement = () => {
             </div>
 
             <div className="flex shrink-0 gap-4">
+              {canEditInGrid && editCount > 0 && (
+                <div className="flex flex-col justify-center gap-2">
+                  <button
+                    type="button"
+                    onClick={saveQuantityEdits}
+                    disabled={isSavingEdits}
+                    className="rounded-full bg-indigo-600 px-5 py-2 text-sm font-semibold text-white shadow-lg shadow-indigo-500/30 transition hover:bg-indigo-500 disabled:cursor-not-allowed disabled:opacity-60"
+                  >
+                    {isSavingEdits
+                      ? "Saving..."
+                      : `Save ${editCount} change${editCount === 1 ? "" : "s"}`}
+                  </button>
+                  <button
+                    type="button"
+                    onClick={() => setQuantityEdits({})}
+                    disabled={isSavingEdits}
+                    className="text-xs font-semibold text-slate-500 transition hover:text-slate-700 dark:text-slate-400 dark:hover:text-slate-200"
+                  >
+                    Discard
+                  </button>
+                </div>
+              )}
               <div className="rounded-3xl border border-slate-200/70 bg-white px-5 py-4 text-right shadow-lg shadow-slate-200/60 dark:border-white/10 dark:bg-white/5 dark:shadow-black/10">
                 <p className="text-xs font-medium uppercase tracking-[0.24em] text-slate-500 dark:text-slate-400">
                   Items Tracked
@@ -376,7 +471,22 @@ const InventoryManagement = () => {
                           </p>
                         </td>
                         <td className="px-6 py-4 text-base font-medium text-slate-700 dark:text-slate-200">
-                          {item.quantity}
+                          {canEditInGrid ? (
+                            <input
+                              type="number"
+                              min="0"
+                              aria-label={`Quantity of ${item.name}`}
+                              value={quantityEdits[item.id] ?? item.quantity}
+                              onChange={(event) => editQuantity(item, event.target.value)}
+                              className={`w-24 rounded-xl border bg-white px-3 py-1.5 text-sm text-slate-900 focus:outline-none focus:ring-2 focus:ring-indigo-500/40 dark:bg-slate-900/60 dark:text-white ${
+                                item.id in quantityEdits
+                                  ? "border-indigo-400 dark:border-indigo-400/70"
+                                  : "border-slate-200 dark:border-white/10"
+                              }`}
+                            />
+                          ) : (
+                            item.quantity
+                          )}
                         </td>
                         <td className="px-6 py-4 text-base font-semibold text-emerald-600 dark:text-emerald-300">
                           {formatPrice(item.price)}
@@ -1,5 +1,30 @@
 import axios from "axios"
 
-export default axios.create({
+const api = axios.create({
   baseURL: "http://localhost:8000/api/v1/",
-})
\ No newline at end of file
+})
+
+// After a write the API answers with X-Primary-Pin, an expiry time in epoch
+// seconds. Sending it back until then keeps our reads off lagging read
+// replicas, so we see our own changes (see api/backend/routers.py).
+const PIN_HEADER = "X-Primary-Pin"
+let primaryPin = null
+
+api.interceptors.response.use((response) => {
+  const pin = response.headers[PIN_HEADER.toLowerCase()]
+  if (pin) {
+    primaryPin = pin
+  }
+  return response
+})
+
+api.interceptors.request.use((config) => {
+  if (primaryPin && Number(primaryPin) * 1000 > Date.now()) {
+    config.headers[PIN_HEADER] = primaryPin
+  } else {
+    primaryPin = null
+  }
+  return config
+})
+
+export default api
@@ -14,6 +14,20 @@ export const updateInventoryItem = async (itemId, itemData, accessToken) => {
   }
 };
 
+export const bulkSaveInventoryItems = async (items, accessToken) => {
+  try {
+    const response = await Axios.post(`/inventory/items/bulk/`, items, {
+      headers: {
+        Authorization: `Bearer ${accessToken}`,
+      },
+    });
+    return response.data;
+  } catch (error) {
+    console.error("Error saving inventory items:", error.response || error);
+    throw error;
+  }
+};
+
 export const deleteInventoryItem = async (itemId, accessToken) => {
   try {
     await Axios.delete(`/inventory/items/${itemId}/`, {
@@ -30,5 +44,6 @@ export const deleteInventoryItem = async (itemId, accessToken) => {
 
 export default {
   updateInventoryItem,
+  bulkSaveInventoryItems,
   deleteInventoryItem
 };
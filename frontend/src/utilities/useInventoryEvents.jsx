@@ -0,0 +1,73 @@
+import { useEffect, useRef } from "react";
+import API from "./Axios";
+
+// Subscribes to the server-sent inventory change stream. EventSource
+// reconnects on its own and resumes from the last event id it saw; a
+// "reset" event means some changes were missed and lists should be reloaded.
+//
+// Off unless VITE_INVENTORY_EVENTS=true: the stream holds a worker open per
+// client and only carries changes made in the same server process, so it
+// needs a long-running ASGI deployment. The serverless one has neither.
+export const inventoryEventsEnabled = import.meta.env.VITE_INVENTORY_EVENTS === "true";
+
+const useInventoryEvents = ({ onItem, onRequest, onReset }) => {
+  const handlers = useRef({});
+  handlers.current = { onItem, onRequest, onReset };
+
+  useEffect(() => {
+    if (!inventoryEventsEnabled) {
+      return undefined;
+    }
+    const source = new EventSource(`${API.defaults.baseURL}inventory/events/`);
+    const listen = (type, handlerName) =>
+      source.addEventListener(type, (event) => {
+        const handler = handlers.current[handlerName];
+        if (handler) {
+          handler(JSON.parse(event.data));
+        }
+      });
+
+    listen("item", "onItem");
+    listen("request", "onRequest");
+    listen("reset", "onReset");
+
+    return () => source.close();
+  }, []);
+};
+
+// Applies an item event to a list held in state. Quantity-only changes are
+// patched in place; anything else fetches just that item. Items for which
+// belongs(item) is false are dropped, e.g. after moving to another category.
+export const applyItemEvent = async (setItems, event, belongs = () => true) => {
+  if (event.action === "deleted") {
+    setItems((prevItems) => prevItems.filter((item) => item.id !== event.id));
+    return;
+  }
+
+  if (event.fields && event.fields.length === 1 && event.fields[0] === "quantity") {
+    setItems((prevItems) =>
+      prevItems.map((item) =>
+        item.id === event.id ? { ...item, quantity: event.quantity } : item
+      )
+    );
+    return;
+  }
+
+  try {
+    const response = await API.get(`inventory/items/${event.id}/`);
+    const updated = response.data;
+    setItems((prevItems) => {
+      const others = prevItems.filter((item) => item.id !== updated.id);
+      if (!belongs(updated)) {
+        return others;
+      }
+      return prevItems.some((item) => item.id === updated.id)
+        ? prevItems.map((item) => (item.id === updated.id ? updated : item))
+        : [...others, updated];
+    });
+  } catch (error) {
+    console.error("Error fetching changed inventory item:", error);
+  }
+};
+
+export default useInventoryEvents;